@@ -0,0 +1,347 @@
+"""
+server.py
+Headless HTTP inference API (ASGI, Starlette) next to the Streamlit apps.
+
+Endpoints (request bodies are the raw file bytes, spooled per request; see utils.upload_spool):
+    POST /transcribe?language=en        audio file -> TranscriptionResult JSON (422 for an unknown language)
+    POST /transcribe/stream             audio file -> NDJSON partial/final events
+    POST /caption[?url=...]             image file (or URL) -> {"caption": ...}
+    GET  /health                        liveness
+    GET  /ready                         200 once models are warm, 503 before
+    GET  /metrics[?format=json]         Prometheus text (or JSON) snapshot of utils.metrics
+
+Models come from the process-wide ModelRegistry and are warmed up (loaded
+plus one dummy inference) in a background thread at startup. Inference runs in the threadpool; at most
+GENAI_API_MAX_CONCURRENCY requests run at once and a request that cannot get
+a slot within GENAI_API_QUEUE_TIMEOUT seconds gets 503 with Retry-After.
+
+Run (from the apps directory):
+    uvicorn api.server:app --port 8000
+In-process client (no network, models loaded on first request):
+    from starlette.testclient import TestClient
+    with TestClient(create_app(warmup=False)) as client:
+        client.post("/transcribe", content=open("audio_to_text/sample_files/first.wav", "rb").read())
+"""
+from __future__ import annotations
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Dict, Optional
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from audio_to_text.services.audio_decoder import AudioTooLongError, load_audio_source
+from audio_to_text.services.audio_transcriber import DEFAULT_MODEL_NAME
+from audio_to_text.services.batching import get_dynamic_batcher
+from audio_to_text.services.decoding import UnsupportedLanguageError, check_language
+from audio_to_text.services.model_loader import ModelLoader, warm_up as warm_up_whisper
+from audio_to_text.services.speech_transcriber import TARGET_RATE, SpeechTranscriber
+from audio_to_text.services.transcription_cache import get_transcription_cache, transcription_cache_key
+from utils.metrics import get_metrics, observe_stage, register_queue
+from utils.upload_spool import MAX_AUDIO_SECONDS, SpooledUpload, UploadTooLargeError
+
+MAX_CONCURRENCY = int(os.environ.get("GENAI_API_MAX_CONCURRENCY", "2"))
+QUEUE_TIMEOUT = float(os.environ.get("GENAI_API_QUEUE_TIMEOUT", "30"))
+MAX_BODY_MB = int(os.environ.get("GENAI_API_MAX_BODY_MB", "50"))
+STREAM_CHUNK_SECONDS = 0.5  # audio fed to the streaming transcriber per step
+
+
+class Busy(Exception):
+    """No inference slot became free within the queue timeout."""
+
+
+class InferenceAPI:
+    """
+    Shared state behind the HTTP routes: model loaders, readiness flags and the
+    concurrency limiter. One instance per app.
+    """
+
+    def __init__(self, whisper_model: str = DEFAULT_MODEL_NAME, caption: bool = True,
+                 max_concurrency: int = MAX_CONCURRENCY, queue_timeout: float = QUEUE_TIMEOUT):
+        self.whisper_loader = ModelLoader(whisper_model)
+        self.caption_enabled = caption
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.ready: Dict[str, bool] = {"whisper": False}
+        if caption:
+            self.ready["caption"] = False
+        self.errors: Dict[str, str] = {}
+        self._caption_service = None
+        self._caption_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None  # created on the server's event loop
+        self.waiting = 0  # requests waiting for a slot
+        register_queue("api", lambda: {("api/slots",): self.waiting})
+
+    # ---------- Models ----------
+
+    def caption_service(self):
+        """Shared ImageCaptionService (imports transformers on first use)."""
+        if self._caption_service is None:
+            with self._caption_lock:
+                if self._caption_service is None:
+                    from image_to_text.services.caption_cache import get_caption_cache
+                    from image_to_text.services.image_caption_service import ImageCaptionService
+                    from image_to_text.services.model_loader import CaptionModelLoader
+                    loader = CaptionModelLoader()
+                    self._caption_service = ImageCaptionService(loader, cache=get_caption_cache(),
+                                                                model_id=loader.key.model_id)
+        return self._caption_service
+
+    def warm_up(self):
+        """
+        Load every model and run one dummy inference each (1 s of audio, a
+        224x224 caption), flagging each as ready (runs on a background thread).
+        """
+        try:
+            warm_up_whisper(self.whisper_loader.model_name)
+            self.ready["whisper"] = True
+        except Exception as e:
+            self.errors["whisper"] = str(e)
+        if self.caption_enabled:
+            try:
+                from image_to_text.services.model_loader import warm_up as warm_up_captioner
+                warm_up_captioner()
+                self.caption_service()
+                self.ready["caption"] = True
+            except Exception as e:
+                self.errors["caption"] = str(e)
+
+    # ---------- Concurrency ----------
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Busy() from None
+        finally:
+            self.waiting -= 1
+            observe_stage("api", "slot_wait", time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    # ---------- Work (threadpool) ----------
+
+    def transcribe(self, data: memoryview, language: Optional[str]) -> dict:
+        loader = self.whisper_loader
+        key = transcription_cache_key(data, loader.key.model_id,
+                                      {"language": language} if language else None)
+        cache = get_transcription_cache()
+        result = cache.get(key)
+        if result is None:
+            # Concurrent API requests share batched model passes
+            result = get_dynamic_batcher(loader).transcribe(data, language=language, max_seconds=MAX_AUDIO_SECONDS)
+            cache.put(key, result)
+        self.ready["whisper"] = True
+        return result.to_dict()
+
+    def caption(self, data: Optional[memoryview], url: Optional[str]) -> str:
+        service = self.caption_service()
+        img = service.load_image_from_url(url) if url else service.load_image_from_bytes(data)
+        caption = service.generate_caption(img)
+        if self.caption_enabled:
+            self.ready["caption"] = True
+        return caption
+
+
+async def spool_body(request: Request) -> SpooledUpload:
+    """
+    Spool the request body chunk by chunk (in memory, then an anonymous temp
+    file), enforcing GENAI_API_MAX_BODY_MB. The caller closes the spool.
+    Raises:
+        UploadTooLargeError
+    """
+    limit = MAX_BODY_MB * 1024 * 1024
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise UploadTooLargeError(f"body larger than {MAX_BODY_MB} MB")
+    spool = SpooledUpload(max_bytes=limit)
+    try:
+        async for chunk in request.stream():
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def error(status: int, message: str, **headers) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers or None)
+
+
+def busy() -> JSONResponse:
+    return error(503, "all inference slots are busy", **{"Retry-After": "5"})
+
+
+async def health(request: Request) -> Response:
+    return JSONResponse({"status": "ok"})
+
+
+async def ready(request: Request) -> Response:
+    api: InferenceAPI = request.app.state.api
+    is_ready = all(api.ready.values())
+    return JSONResponse({"ready": is_ready, "models": api.ready, "errors": api.errors},
+                        status_code=200 if is_ready else 503)
+
+
+async def metrics(request: Request) -> Response:
+    if request.query_params.get("format") == "json":
+        return JSONResponse(get_metrics().snapshot())
+    return Response(get_metrics().to_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+async def transcribe(request: Request) -> Response:
+    api: InferenceAPI = request.app.state.api
+    language = request.query_params.get("language") or None
+    try:
+        # Rejected here: the batcher is shared with other clients' requests
+        check_language(language)
+    except UnsupportedLanguageError as e:
+        return error(422, str(e))
+    try:
+        body = await spool_body(request)
+    except UploadTooLargeError as e:
+        return error(413, str(e))
+    with body:
+        if not body.size:
+            return error(400, "empty request body; send the audio file bytes")
+        try:
+            async with api.slot():
+                result = await run_in_threadpool(api.transcribe, body.buffer(), language)
+        except Busy:
+            return busy()
+        except AudioTooLongError as e:
+            return error(413, str(e))
+        except (RuntimeError, ValueError) as e:  # undecodable audio
+            return error(422, f"could not transcribe audio: {e}")
+    return JSONResponse(result)
+
+
+async def transcribe_stream(request: Request) -> Response:
+    """
+    Feed the uploaded audio through a SpeechTranscriber in real-time sized
+    chunks and stream its partial and final hypotheses as NDJSON lines.
+    """
+    api: InferenceAPI = request.app.state.api
+    try:
+        body = await spool_body(request)
+    except UploadTooLargeError as e:
+        return error(413, str(e))
+    with body:
+        if not body.size:
+            return error(400, "empty request body; send the audio file bytes")
+        try:
+            audio = await run_in_threadpool(load_audio_source, body.buffer(), MAX_AUDIO_SECONDS)
+        except AudioTooLongError as e:
+            return error(413, str(e))
+        except (RuntimeError, ValueError) as e:
+            return error(422, f"could not decode audio: {e}")
+
+    async def events() -> AsyncIterator[bytes]:
+        stt = SpeechTranscriber(model_name=api.whisper_loader.model_name)
+        step = int(STREAM_CHUNK_SECONDS * TARGET_RATE)
+
+        def feed(chunk: np.ndarray):
+            stt.add_frame(chunk, TARGET_RATE)
+            return stt.maybe_partial_decode(), stt.finalize_if_complete()
+
+        try:
+            async with api.slot():
+                for start in range(0, audio.shape[-1], step):
+                    partial, final = await run_in_threadpool(feed, audio[start:start + step])
+                    offset = round(min(start + step, audio.shape[-1]) / TARGET_RATE, 3)
+                    if partial:
+                        yield (json.dumps({"type": "partial", "time": offset, "text": partial},
+                                          ensure_ascii=False) + "\n").encode("utf-8")
+                    if final:
+                        yield (json.dumps({"type": "final", "time": offset, "text": final},
+                                          ensure_ascii=False) + "\n").encode("utf-8")
+                tail = await run_in_threadpool(stt.force_decode)
+                if tail:
+                    yield (json.dumps({"type": "final", "time": round(audio.shape[-1] / TARGET_RATE, 3),
+                                       "text": tail}, ensure_ascii=False) + "\n").encode("utf-8")
+        except Busy:
+            yield (json.dumps({"type": "error", "error": "all inference slots are busy"}) + "\n").encode("utf-8")
+        yield b'{"type": "end"}\n'
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+async def caption(request: Request) -> Response:
+    api: InferenceAPI = request.app.state.api
+    if not api.caption_enabled:
+        return error(404, "captioning is disabled on this server")
+    url = request.query_params.get("url")
+    try:
+        body = SpooledUpload() if url else await spool_body(request)
+    except UploadTooLargeError as e:
+        return error(413, str(e))
+    with body:
+        if not (url or body.size):
+            return error(400, "send the image bytes as the body or pass ?url=")
+        try:
+            async with api.slot():
+                text = await run_in_threadpool(api.caption, None if url else body.buffer(), url)
+        except Busy:
+            return busy()
+        except (OSError, ValueError) as e:  # ImageFetchError, PIL.UnidentifiedImageError
+            return error(422, f"could not load image: {e}")
+    return JSONResponse({"caption": text})
+
+
+def create_app(warmup: bool = True, whisper_model: str = DEFAULT_MODEL_NAME, caption_enabled: bool = True,
+               max_concurrency: int = MAX_CONCURRENCY, queue_timeout: float = QUEUE_TIMEOUT) -> Starlette:
+    """
+    Build the ASGI app.
+    Args:
+        warmup: Load models in a background thread at startup (/ready turns 200 when done)
+        whisper_model: Whisper variant to serve
+        caption_enabled: Serve /caption (needs transformers)
+        max_concurrency: Requests running inference at once
+        queue_timeout: Seconds a request may wait for a slot before 503
+    """
+    api = InferenceAPI(whisper_model, caption=caption_enabled, max_concurrency=max_concurrency,
+                       queue_timeout=queue_timeout)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        if warmup:
+            threading.Thread(target=api.warm_up, daemon=True, name="api-warmup").start()
+        yield
+
+    app = Starlette(routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/ready", ready, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/transcribe", transcribe, methods=["POST"]),
+        Route("/transcribe/stream", transcribe_stream, methods=["POST"]),
+        Route("/caption", caption, methods=["POST"]),
+    ], lifespan=lifespan)
+    app.state.api = api
+    return app
+
+
+app = create_app(caption_enabled=os.environ.get("GENAI_API_CAPTION", "1") != "0")
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Gen AI inference API")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run("api.server:app", host=args.host, port=args.port)
@@ -3,31 +3,151 @@
 Usage:
 	python apps/audo_to_text/cli/cli.py --audio path/to/file.wav --model tiny
 
+Batch mode (model loaded once, results streamed to JSONL, resumable):
+	python -m audio_to_text.cli.cli --input-dir recordings/ --glob "**/*.wav" --output transcripts.jsonl
+	python -m audio_to_text.cli.cli --manifest files.txt --output transcripts.jsonl --workers 8
+
+Add --store to also bulk-insert the transcripts into the results store
+(/tmp/resources/results/results.sqlite3), searchable from the UI.
+
+Add --profile to print per-stage timings (load_audio, mel, encode,
+detect_language, decode, ...) and counters when the run finishes.
+
 In future this can be extended with options (device selection, decoding
-parameters, batch directories, output formats, JSON export, etc.).
+parameters, output formats, etc.).
 """
 from __future__ import annotations
 import argparse
+import json
+import time
 from pathlib import Path
+from typing import Iterator, List, Set
 from audio_to_text.services.model_loader import ModelLoader
-from audio_to_text.services.audio_transcriber import AudioFileTranscriber, DEFAULT_AUDIO_PATH, DEFAULT_MODEL_NAME
+from audio_to_text.services.audio_transcriber import AudioFileTranscriber, DEFAULT_AUDIO_PATH, DEFAULT_MODEL_NAME, DEFAULT_BATCH_SIZE
+from audio_to_text.services.batch_transcriber import BatchTranscriber
+from utils.inference_backend import BACKENDS, DEFAULT_BACKEND
+from utils.metrics import FORMATS, get_metrics, set_metrics_enabled
+from utils.results_store import BULK_CHUNK, get_results_store, transcription_record
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a", ".webm"}
 
 
 def parse_args() -> argparse.Namespace:
 	parser = argparse.ArgumentParser(description="Whisper audio file transcription")
 	parser.add_argument("--audio", type=Path, default=DEFAULT_AUDIO_PATH, help="Path to input audio file")
 	parser.add_argument("--model", type=str, default=DEFAULT_MODEL_NAME, help="Whisper model variant (tiny/base/small/...)" )
+	parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Windows decoded per batch for audio longer than 30 s")
+	parser.add_argument("--language", type=str, default=None, help="Force a language code (skips language detection)")
+	parser.add_argument("--device", type=str, default=None, help="Torch device (cpu/cuda); defaults to cuda when available")
+	parser.add_argument("--backend", type=str, default=DEFAULT_BACKEND, choices=BACKENDS, help="Inference backend: default, int8 (CPU dynamic quantization) or torchscript (cached traced encoder)")
+	parser.add_argument("--profile", action="store_true", help="Print per-stage timings and counters at the end")
+	parser.add_argument("--profile-format", type=str, default="table", choices=FORMATS, help="Output format of --profile")
+	batch = parser.add_argument_group("batch mode")
+	batch.add_argument("--input-dir", type=Path, default=None, help="Transcribe every audio file under this directory")
+	batch.add_argument("--glob", type=str, default="*", help="Glob pattern inside --input-dir (e.g. '**/*.wav')")
+	batch.add_argument("--manifest", type=Path, default=None, help="Text file listing one audio path per line")
+	batch.add_argument("--output", type=Path, default=Path("transcripts.jsonl"), help="JSONL file results are appended to")
+	batch.add_argument("--workers", type=int, default=None, help="CPU workers for audio decoding and mel computation")
+	batch.add_argument("--store", action="store_true", help="Also save transcripts in the searchable results store")
 	return parser.parse_args()
 
 
+def iter_input_files(args: argparse.Namespace) -> Iterator[Path]:
+	"""Yield audio paths from --input-dir/--glob and/or --manifest."""
+	if args.input_dir:
+		for path in sorted(args.input_dir.glob(args.glob)):
+			if path.is_file() and path.suffix.lower() in AUDIO_EXTENSIONS:
+				yield path
+	if args.manifest:
+		with open(args.manifest, "r", encoding="utf-8") as f:
+			for line in f:
+				line = line.strip()
+				if line and not line.startswith("#"):
+					yield Path(line)
+
+
+def load_completed(output: Path) -> Set[str]:
+	"""Paths already transcribed successfully in a previous run of the same output file."""
+	done: Set[str] = set()
+	if not output.exists():
+		return done
+	with open(output, "r", encoding="utf-8") as f:
+		for line in f:
+			try:
+				record = json.loads(line)
+			except ValueError:
+				continue  # truncated last line from an interrupted run
+			if "error" not in record:
+				done.add(record["path"])
+	return done
+
+
+def run_batch(args: argparse.Namespace, model, model_id: str):
+	"""Transcribe many files with one model, streaming results to JSONL (and the results store with --store)."""
+	completed = load_completed(args.output)
+	paths: List[Path] = [p for p in iter_input_files(args) if str(p) not in completed]
+	print(f"{len(paths)} files to transcribe ({len(completed)} already in {args.output})")
+
+	# With --store each file is hashed from the bytes read for decoding, not read again
+	transcriber = BatchTranscriber(model, batch_size=args.batch_size, workers=args.workers, language=args.language,
+								   model_id=model_id if args.store else None)
+	store = get_results_store() if args.store else None
+	pending: List[dict] = []
+	started = time.perf_counter()
+	n_ok = n_failed = 0
+	audio_seconds = 0.0
+	with open(args.output, "a", encoding="utf-8") as out:
+		for path, result in transcriber.run(paths):
+			if isinstance(result, Exception):
+				n_failed += 1
+				record = {"path": str(path), "error": str(result)}
+			else:
+				n_ok += 1
+				audio_seconds += result.duration
+				record = {"path": str(path), **result.to_dict()}
+				if store is not None:
+					# Same key as the UI, so a file transcribed in both is stored once
+					key = transcriber.content_hashes.pop(path)
+					pending.append(transcription_record(result, source=str(path), content_hash=key, model=model_id))
+			out.write(json.dumps(record, ensure_ascii=False) + "\n")
+			out.flush()
+			if len(pending) >= BULK_CHUNK:
+				store.add_many(pending)
+				pending = []
+	if pending:
+		store.add_many(pending)
+
+	elapsed = time.perf_counter() - started
+	print(f"Transcribed {n_ok} files ({n_failed} failed) in {elapsed:.1f}s")
+	if elapsed > 0:
+		print(f"Throughput: {n_ok / elapsed:.2f} files/s, {audio_seconds / elapsed:.1f}x realtime "
+			  f"({audio_seconds / 3600:.2f} h of audio)")
+
+
+def run_single(args: argparse.Namespace, model):
+	transcriber = AudioFileTranscriber(audio_path=args.audio, model=model, batch_size=args.batch_size)
+	result = transcriber.transcribe_detailed(language=args.language)
+	if result.language_probs:
+		print(f"Language: {result.language} (p={result.language_probs.get(result.language, 0.0):.2f})")
+	else:
+		print(f"Language: {result.language} (forced)")
+	print("--- Transcript ---")
+	print(result.text)
+
+
 def main():
 	args = parse_args()
-	model = ModelLoader(args.model).load()
-	transcriber = AudioFileTranscriber(audio_path=args.audio, model=model)
-	lang, text = transcriber.transcribe()
-	print(f"Language: {lang}")
-	print("--- Transcript ---")
-	print(text)
+	if args.profile:
+		set_metrics_enabled(True)
+	loader = ModelLoader(args.model, device=args.device, backend=args.backend)
+	with loader.lease() as model:
+		if args.input_dir or args.manifest:
+			run_batch(args, model, loader.key.model_id)
+		else:
+			run_single(args, model)
+	if args.profile:
+		print("--- Profile ---")
+		print(get_metrics().render(args.profile_format))
 
 
 if __name__ == "__main__":
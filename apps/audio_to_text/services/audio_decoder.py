@@ -0,0 +1,218 @@
+"""In-memory audio decoding.
+
+Turns paths, raw bytes or file-like buffers into float32 mono samples at
+16 kHz without touching the filesystem. PCM/float WAV data is parsed in
+process and viewed directly from the input buffer (other sample rates go
+through the polyphase resampler); compressed formats are
+piped through ffmpeg over stdin/stdout instead of going via a temp file.
+
+An optional max_seconds limit is checked from the WAV header before any
+samples are converted; for compressed input ffmpeg stops just past the
+limit, so an over-long upload is never decoded in full.
+"""
+from __future__ import annotations
+import struct
+import subprocess
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+import numpy as np
+import whisper
+from whisper.audio import SAMPLE_RATE
+from utils.upload_spool import SpooledUpload, spool_upload
+from .resampler import resample
+
+AudioSource = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_PCM_DTYPES = {8: np.uint8, 16: np.int16, 32: np.int32}
+_FLOAT_DTYPES = {32: np.float32, 64: np.float64}
+
+
+class UnsupportedWavError(ValueError):
+    """WAV layout that the in-process reader does not handle (falls back to ffmpeg)."""
+
+
+class AudioTooLongError(ValueError):
+    """Audio longer than the caller's max_seconds limit."""
+
+
+def as_buffer(source: AudioSource) -> memoryview:
+    """
+    Return a memoryview over in-memory audio without copying where possible.
+    Args:
+        source: bytes-like object or file-like buffer (BytesIO, Streamlit UploadedFile, ...)
+    Returns:
+        memoryview of the encoded audio
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source)
+    if hasattr(source, "getbuffer"):
+        return source.getbuffer()
+    return memoryview(source.read())
+
+
+def is_wav(buffer: memoryview) -> bool:
+    return len(buffer) >= 12 and buffer[0:4] == b"RIFF" and buffer[8:12] == b"WAVE"
+
+
+def _find_chunks(buffer: memoryview):
+    """Return (fmt chunk, data offset, data size) from a RIFF/WAVE buffer."""
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buffer):
+        chunk_id = bytes(buffer[pos:pos + 4])
+        (size,) = struct.unpack_from("<I", buffer, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = buffer[body:body + size]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise UnsupportedWavError("data chunk before fmt chunk")
+            # Streaming writers may leave the size as 0/0xFFFFFFFF: use the rest of the buffer
+            size = min(size, len(buffer) - body) if size else len(buffer) - body
+            return fmt, body, size
+        pos = body + size + (size & 1)  # chunks are word aligned
+    raise UnsupportedWavError("missing fmt or data chunk")
+
+
+def wav_duration(buffer: memoryview) -> Optional[float]:
+    """Duration in seconds from a WAV header, or None if it cannot be read."""
+    try:
+        fmt, _, size = _find_chunks(buffer)
+        if len(fmt) < 16:
+            return None
+        _, _, rate, byte_rate, block_align, _ = struct.unpack_from("<HHIIHH", fmt, 0)
+    except (UnsupportedWavError, struct.error):
+        return None
+    if not byte_rate:
+        return None
+    return (size - size % max(1, block_align)) / byte_rate
+
+
+def _too_long(seconds: float, max_seconds: float) -> AudioTooLongError:
+    return AudioTooLongError(f"audio is {seconds:.0f} s long; the limit is {max_seconds:.0f} s")
+
+
+def check_duration(source: AudioSource, max_seconds: Optional[float]):
+    """
+    Reject WAV audio longer than max_seconds from its header alone (no decoding).
+    Other formats pass; load_audio_source enforces the limit while decoding them.
+    Raises:
+        AudioTooLongError
+    """
+    if not max_seconds:
+        return
+    buffer = as_buffer(source)
+    duration = wav_duration(buffer) if is_wav(buffer) else None
+    if duration is not None and duration > max_seconds:
+        raise _too_long(duration, max_seconds)
+
+
+def spool_audio(source: AudioSource, max_seconds: Optional[float] = None,
+                max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Copy an uploaded or recorded clip into its own spool (see utils.upload_spool),
+    rejecting it before any decoding if it is too large or (for WAV) too long.
+    Raises:
+        UploadTooLargeError, AudioTooLongError
+    """
+    spool = spool_upload(source, max_bytes=max_bytes)
+    try:
+        check_duration(spool.buffer(), max_seconds)
+    except AudioTooLongError:
+        spool.close()
+        raise
+    return spool
+
+
+def decode_wav(buffer: memoryview) -> np.ndarray:
+    """
+    Decode a PCM or IEEE-float WAV buffer to 16 kHz.
+    Samples are viewed in place with np.frombuffer; the only copies are the
+    conversion to float32, the mono downmix for multi-channel input and,
+    for other sample rates, the resampled output.
+    Raises:
+        UnsupportedWavError for layouts handled by the ffmpeg fallback
+    """
+    fmt, offset, size = _find_chunks(buffer)
+    if len(fmt) < 16:
+        raise UnsupportedWavError("truncated fmt chunk")
+    audio_format, channels, rate, _, block_align, bits = struct.unpack_from("<HHIIHH", fmt, 0)
+    if audio_format == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        (audio_format,) = struct.unpack_from("<H", fmt, 24)
+    if audio_format == _WAVE_FORMAT_PCM and bits in _PCM_DTYPES:
+        dtype = _PCM_DTYPES[bits]
+    elif audio_format == _WAVE_FORMAT_IEEE_FLOAT and bits in _FLOAT_DTYPES:
+        dtype = _FLOAT_DTYPES[bits]
+    else:
+        raise UnsupportedWavError(f"format {audio_format} with {bits} bits")
+    # Malformed headers go to the ffmpeg fallback instead of failing (or misreading frames) here
+    if not channels or not rate or block_align != channels * bits // 8:
+        raise UnsupportedWavError(f"inconsistent header: {channels} channels, {rate} Hz, block align {block_align}")
+
+    count = (size // block_align) * channels
+    samples = np.frombuffer(buffer, dtype=np.dtype(dtype).newbyteorder("<"), count=count, offset=offset)
+    if dtype is np.uint8:
+        audio = (samples.astype(np.float32) - 128.0) / 128.0
+    elif dtype in (np.int16, np.int32):
+        audio = samples.astype(np.float32) / float(np.iinfo(dtype).max + 1)
+    else:
+        audio = samples.astype(np.float32, copy=False)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    if rate != SAMPLE_RATE:
+        audio = resample(audio, rate, SAMPLE_RATE)
+    return audio
+
+
+def decode_with_ffmpeg(buffer: memoryview, sr: int = SAMPLE_RATE, max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Decode compressed audio by piping it through ffmpeg (stdin -> stdout).
+    Raises:
+        AudioTooLongError: if max_seconds is given and the audio is longer
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sr),
+    ]
+    if max_seconds:
+        cmd += ["-t", f"{max_seconds + 1:.3f}"]  # stop decoding just past the limit
+    cmd.append("pipe:1")
+    try:
+        out = subprocess.run(cmd, input=buffer, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+    if max_seconds and len(out) / 2 / sr > max_seconds:
+        raise AudioTooLongError(f"audio is longer than the {max_seconds:.0f} s limit")
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio_source(source: AudioSource, max_seconds: Optional[float] = None) -> np.ndarray:
+    """
+    Load audio from a path, bytes or file-like buffer as float32 mono at 16 kHz.
+    Args:
+        source: file path, raw encoded bytes or a readable buffer
+        max_seconds: optional duration limit
+    Returns:
+        numpy array of samples
+    Raises:
+        AudioTooLongError: if the audio is longer than max_seconds
+    """
+    if isinstance(source, (str, Path)):
+        if Path(source).suffix.lower() != ".wav":
+            audio = whisper.load_audio(str(source))
+            if max_seconds and audio.shape[-1] / SAMPLE_RATE > max_seconds:
+                raise _too_long(audio.shape[-1] / SAMPLE_RATE, max_seconds)
+            return audio
+        source = Path(source).read_bytes()
+    buffer = as_buffer(source)
+    check_duration(buffer, max_seconds)
+    if is_wav(buffer):
+        try:
+            return decode_wav(buffer)
+        except UnsupportedWavError:
+            pass
+    return decode_with_ffmpeg(buffer, max_seconds=max_seconds)
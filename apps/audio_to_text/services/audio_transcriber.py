@@ -1,9 +1,42 @@
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 import whisper
-from typing import Any
+from whisper.tokenizer import get_tokenizer
+from typing import Any, Callable, Dict, List, Optional
+from utils.metrics import request_timer, stage_timer
+from .audio_decoder import AudioSource, load_audio_source
+from .decoding import decode_features, decoding_options, detect_language_from_features, encode
+from .long_form import (
+    DEFAULT_OVERLAP_SECONDS,
+    TranscriptSegment,
+    segments_to_text,
+    stitch_segments,
+    tokens_to_segments,
+    windowed_log_mel,
+)
 
 DEFAULT_AUDIO_PATH = Path("./apps/audo_to_text/sample_files/first.wav")
 DEFAULT_MODEL_NAME = "tiny"
+DEFAULT_BATCH_SIZE = 8
+
+
+@dataclass
+class TranscriptionResult:
+    """Full output of a transcription run."""
+    language: str
+    text: str
+    language_probs: Dict[str, float] = field(default_factory=dict)  # empty when language was forced
+    segments: List[TranscriptSegment] = field(default_factory=list)
+    duration: float = 0.0  # audio length in seconds
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TranscriptionResult":
+        segments = [TranscriptSegment(**seg) for seg in data.get("segments", [])]
+        return cls(data["language"], data["text"], data.get("language_probs", {}), segments,
+                   data.get("duration", 0.0))
 
 
 class AudioFileTranscriber:
@@ -12,21 +45,49 @@ class AudioFileTranscriber:
     The model is supplied externally (e.g. by an application layer) to allow
     reuse across multiple transcriptions, centralized device placement, and
     future sharing with streaming pathways.
+
+    The audio may be a file path, raw encoded bytes or a file-like buffer;
+    in-memory input is decoded without writing a temp file.
+
+    Audio longer than one 30 s Whisper window is transcribed in long-form
+    mode: overlapping windows are decoded in batches and stitched together
+    by timestamp. Pass long_form=True/False to force either path.
+
+    Every stage (load_audio, mel, encode, detect_language, decode, stitch)
+    is timed through utils.metrics.
     """
 
-    def __init__(self, audio_path: Path, model: Any):
+    def __init__(self, audio_path: AudioSource, model: Any, long_form: Optional[bool] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, overlap_seconds: float = DEFAULT_OVERLAP_SECONDS):
         self.audio_path = audio_path
         self._model = model  # Preloaded whisper model instance
+        self.long_form = long_form
+        self.batch_size = max(1, batch_size)
+        self.overlap_seconds = overlap_seconds
 
     @property
     def model(self):
         return self._model
 
-    def load_and_prepare_audio(self):
-        audio = whisper.load_audio(str(self.audio_path))
+    def decoding_options(self, **kwargs) -> whisper.DecodingOptions:
+        return decoding_options(self.model, **kwargs)
+
+    def load_audio(self):
+        with stage_timer("whisper", "load_audio"):
+            return load_audio_source(self.audio_path)
+
+    def is_long_form(self, audio) -> bool:
+        if self.long_form is not None:
+            return self.long_form
+        return audio.shape[-1] > whisper.audio.N_SAMPLES
+
+    def prepare_mel(self, audio):
         audio = whisper.pad_or_trim(audio)
-        mel = whisper.log_mel_spectrogram(audio).to(self.model.device)
-        return audio, mel
+        return whisper.log_mel_spectrogram(audio, n_mels=self.model.dims.n_mels).to(self.model.device)
+
+    def load_and_prepare_audio(self):
+        audio = self.load_audio()
+        return whisper.pad_or_trim(audio), self.prepare_mel(audio)
 
     def detect_language(self, mel):
         _, probs = self.model.detect_language(mel)
@@ -34,12 +95,71 @@ class AudioFileTranscriber:
         return lang, probs
 
     def decode_audio(self, mel):
-        options = whisper.DecodingOptions()
+        options = self.decoding_options()
         result = whisper.decode(self.model, mel, options)
         return result.text
 
-    def transcribe(self):
-        _, mel = self.load_and_prepare_audio()
-        lang, _ = self.detect_language(mel)
-        text = self.decode_audio(mel)
-        return lang, text
+    def get_tokenizer(self, language: Optional[str] = None):
+        return get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=self.model.num_languages,
+            language=language,
+            task="transcribe",
+        )
+
+    def transcribe_detailed(self, language: Optional[str] = None,
+                            progress: Optional[Callable[[float, str], None]] = None) -> TranscriptionResult:
+        """Load the audio and transcribe it (see transcribe_audio)."""
+        return self.transcribe_audio(self.load_audio(), language=language, progress=progress)
+
+    def transcribe_audio(self, audio, language: Optional[str] = None,
+                         progress: Optional[Callable[[float, str], None]] = None) -> TranscriptionResult:
+        """Transcribe decoded samples with a single encoder pass per window.
+
+        The encoder output is reused for language detection and decoding, and
+        detection runs only once (on the first window). Passing language skips
+        detection entirely. Long audio is split into overlapping windows that
+        are decoded in batches and stitched by timestamp.
+
+        Args:
+            audio: float32 mono samples at 16 kHz
+            language: optional language code to force (e.g. 'en')
+            progress: optional callback(fraction_done, partial_text) invoked after each batch
+        Returns:
+            TranscriptionResult with language, text, probabilities and segments
+        """
+        with request_timer("transcribe"):
+            return self._transcribe_audio(audio, language, progress)
+
+    def _transcribe_audio(self, audio, language: Optional[str],
+                          progress: Optional[Callable[[float, str], None]]) -> TranscriptionResult:
+        with stage_timer("whisper", "mel"):
+            if self.is_long_form(audio):
+                mel, offsets = windowed_log_mel(audio, n_mels=self.model.dims.n_mels,
+                                                overlap_seconds=self.overlap_seconds)
+            else:
+                mel, offsets = self.prepare_mel(audio).unsqueeze(0), [0.0]
+
+        probs: Dict[str, float] = {}
+        tokenizer = self.get_tokenizer()
+        per_window: List[List[TranscriptSegment]] = []
+        for start in range(0, mel.shape[0], self.batch_size):
+            features = encode(self.model, mel[start:start + self.batch_size])
+            if language is None:
+                languages, all_probs = detect_language_from_features(self.model, features[:1])
+                language, probs = languages[0], all_probs[0]
+            results = decode_features(self.model, features, self.decoding_options(language=language))
+            for result, offset in zip(results, offsets[start:start + self.batch_size]):
+                per_window.append(tokens_to_segments(result.tokens, tokenizer, offset))
+            if progress is not None:
+                partial = stitch_segments(per_window, offsets[:len(per_window)], self.overlap_seconds)
+                progress(len(per_window) / mel.shape[0], segments_to_text(partial))
+
+        duration = audio.shape[-1] / whisper.audio.SAMPLE_RATE
+        with stage_timer("whisper", "stitch"):
+            segments = stitch_segments(per_window, offsets, self.overlap_seconds, duration)
+        return TranscriptionResult(language, segments_to_text(segments), probs, segments, duration)
+
+    def transcribe(self, language: Optional[str] = None):
+        result = self.transcribe_detailed(language=language)
+        return result.language, result.text
@@ -0,0 +1,185 @@
+"""Batch transcription of many recordings with a single loaded model.
+
+Audio decoding and log-mel computation run on a CPU worker pool while the
+calling thread decodes batches of 30 s windows through the model. Windows
+from different files share batches, so short clips are decoded together
+and long recordings are split across batches. Results are yielded as soon
+as every window of a file has been decoded.
+
+Prefetching is bounded by memory, not by a file count: new files are only
+handed to the pool while the prepared-but-undecoded mel windows stay under
+GENAI_BATCH_PREFETCH_MB, so a run of multi-hour recordings cannot pile up
+gigabytes of windows ahead of the model.
+"""
+from __future__ import annotations
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import torch
+from whisper.audio import SAMPLE_RATE
+from whisper.tokenizer import get_tokenizer
+from utils.metrics import count_requests, record_batch, stage_timer
+from .audio_decoder import load_audio_source
+from .audio_transcriber import DEFAULT_BATCH_SIZE, TranscriptionResult
+from .decoding import decode_batch
+from .transcription_cache import transcription_cache_key
+from .long_form import (
+    DEFAULT_OVERLAP_SECONDS,
+    TranscriptSegment,
+    segments_to_text,
+    stitch_segments,
+    tokens_to_segments,
+    windowed_log_mel,
+)
+
+DEFAULT_PREFETCH_BYTES = int(os.environ.get("GENAI_BATCH_PREFETCH_MB", "512")) * 1024 * 1024
+
+
+@dataclass(eq=False)
+class PreparedAudio:
+    """Mel windows of one file, filled in window by window as batches finish."""
+    path: Path
+    mel: torch.Tensor
+    offsets: List[float]
+    duration: float
+    per_window: List[Optional[List[TranscriptSegment]]] = field(default_factory=list)
+    language: Optional[str] = None
+    language_probs: Dict[str, float] = field(default_factory=dict)
+    remaining: int = 0
+    content_hash: Optional[str] = None  # transcription cache key, when the transcriber has a model_id
+
+
+class BatchTranscriber:
+    """
+    Transcribe an iterable of audio files, streaming (path, result) pairs.
+    Failed files yield (path, exception) instead of stopping the run.
+
+    With a model_id, each file's transcription cache key is computed from the
+    bytes read for decoding and left in content_hashes[path] when the file is
+    yielded (callers pop the entries they use).
+    """
+
+    def __init__(self, model, batch_size: int = DEFAULT_BATCH_SIZE, workers: Optional[int] = None,
+                 overlap_seconds: float = DEFAULT_OVERLAP_SECONDS, language: Optional[str] = None,
+                 prefetch_bytes: int = DEFAULT_PREFETCH_BYTES, model_id: Optional[str] = None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.workers = workers or os.cpu_count() or 1
+        self.overlap_seconds = overlap_seconds
+        self.language = language
+        self.prefetch_bytes = prefetch_bytes
+        self.model_id = model_id
+        self.content_hashes: Dict[Path, str] = {}
+        self._tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                        task="transcribe")
+        self._buffered_bytes = 0  # mel windows prepared but not yet released
+        self._buffered_lock = threading.Lock()
+
+    def _buffer(self, nbytes: int):
+        with self._buffered_lock:
+            self._buffered_bytes += nbytes
+
+    def prepare(self, path: Path) -> PreparedAudio:
+        """Decode audio and compute mel windows (runs on the worker pool)."""
+        content_hash = None
+        with stage_timer("whisper", "load_audio"):
+            if self.model_id is None:
+                audio = load_audio_source(path)
+            else:
+                data = path.read_bytes()  # read once for both the cache key and decoding
+                content_hash = transcription_cache_key(data, self.model_id)
+                audio = load_audio_source(data)
+        with stage_timer("whisper", "mel"):
+            mel, offsets = windowed_log_mel(audio, n_mels=self.model.dims.n_mels,
+                                            overlap_seconds=self.overlap_seconds)
+        count_requests("transcribe")
+        self._buffer(mel.nbytes)
+        return PreparedAudio(path=path, mel=mel, offsets=offsets,
+                             duration=audio.shape[-1] / SAMPLE_RATE,
+                             per_window=[None] * len(offsets), remaining=len(offsets),
+                             content_hash=content_hash)
+
+    def _release(self, prepared: PreparedAudio):
+        """Drop a finished or failed file's windows."""
+        if prepared.mel is not None:
+            self._buffer(-prepared.mel.nbytes)
+            prepared.mel = None
+
+    def run(self, paths: Iterable[Path]) -> Iterator[Tuple[Path, Union[TranscriptionResult, Exception]]]:
+        """
+        Transcribe all paths, yielding results in completion order.
+        Args:
+            paths: audio files to transcribe
+        Yields:
+            (path, TranscriptionResult) or (path, exception) for failed files
+        """
+        path_iter = iter(paths)
+        futures: Deque[Tuple[Path, Future]] = deque()
+        pending: Deque[Tuple[PreparedAudio, int]] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="audio-prep") as pool:
+            def refill():
+                # Keep every worker busy while the model decodes, but stop submitting once the
+                # prepared windows reach the memory budget (a file's size is only known once it
+                # is decoded, so at most one file per worker is in preparation at a time)
+                preparing = sum(1 for _, future in futures if not future.done())
+                while preparing < self.workers and (
+                        self._buffered_bytes < self.prefetch_bytes or not (futures or pending)):
+                    path = next(path_iter, None)
+                    if path is None:
+                        return
+                    futures.append((path, pool.submit(self.prepare, path)))
+                    preparing += 1
+
+            refill()
+            while futures or pending:
+                while futures and len(pending) < self.batch_size:
+                    path, future = futures.popleft()
+                    try:
+                        prepared = future.result()
+                    except Exception as exc:
+                        yield path, exc
+                        refill()
+                        continue
+                    pending.extend((prepared, i) for i in range(len(prepared.offsets)))
+                    refill()
+                batch = []
+                while pending and len(batch) < self.batch_size:
+                    prepared, i = pending.popleft()
+                    if prepared.remaining >= 0:  # skip the rest of a file that already failed
+                        batch.append((prepared, i))
+                if batch:
+                    yield from self._decode(batch)
+                refill()
+
+    def _decode(self, batch: List[Tuple[PreparedAudio, int]]):
+        mel = torch.stack([prepared.mel[i] for prepared, i in batch])
+        record_batch("whisper", len(batch))
+        try:
+            results, languages, probs = decode_batch(self.model, mel, language=self.language)
+        except Exception as exc:
+            for prepared in dict.fromkeys(p for p, _ in batch):
+                if prepared.remaining >= 0:
+                    prepared.remaining = -1
+                    self._release(prepared)
+                    yield prepared.path, exc
+            return
+        for (prepared, i), result, language, lang_probs in zip(batch, results, languages, probs):
+            if prepared.remaining < 0:
+                continue  # an earlier batch already failed this file
+            prepared.per_window[i] = tokens_to_segments(result.tokens, self._tokenizer, prepared.offsets[i])
+            if i == 0:
+                prepared.language, prepared.language_probs = language, lang_probs
+            prepared.remaining -= 1
+            if prepared.remaining == 0:
+                segments = stitch_segments(prepared.per_window, prepared.offsets,
+                                           self.overlap_seconds, prepared.duration)
+                self._release(prepared)  # release windows as soon as the file is done
+                if prepared.content_hash is not None:
+                    self.content_hashes[prepared.path] = prepared.content_hash
+                yield prepared.path, TranscriptionResult(prepared.language, segments_to_text(segments),
+                                                         prepared.language_probs, segments, prepared.duration)
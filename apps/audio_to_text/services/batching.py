@@ -0,0 +1,240 @@
+"""Cross-request dynamic batching in front of a shared Whisper model.
+
+Concurrent callers (UI sessions, background jobs) each submit the mel
+windows of their clip. A single batching thread takes the first pending
+window, keeps collecting for at most max_wait_ms or until max_batch_size
+windows are waiting, and runs them through one encoder/decoder pass
+(decode_batch). Each caller gets its window's result back through a Future.
+
+Windows whose callers forced different languages are decoded in separate
+passes of the same batch; windows with no forced language share one
+encoder pass and are grouped by detected language (see decode_batch).
+transcribe_audio only leaves the first window of a clip unforced: the rest
+are submitted in the language detected there.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+import torch
+import whisper
+from whisper.audio import SAMPLE_RATE
+from whisper.tokenizer import get_tokenizer
+from utils.metrics import observe_stage, record_batch, register_queue, request_timer, stage_timer
+from .audio_decoder import AudioSource, load_audio_source
+from .audio_transcriber import DEFAULT_BATCH_SIZE, TranscriptionResult
+from .decoding import check_language, decode_batch
+from .long_form import DEFAULT_OVERLAP_SECONDS, segments_to_text, stitch_segments, tokens_to_segments, windowed_log_mel
+
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("GENAI_BATCH_MAX_SIZE", str(DEFAULT_BATCH_SIZE)))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("GENAI_BATCH_MAX_WAIT_MS", "10"))
+LATENCY_SAMPLES = 1000  # recent queue latencies kept for percentiles
+
+
+class WindowResult(NamedTuple):
+    """Decoded window returned to a caller."""
+    result: whisper.DecodingResult
+    language: str
+    language_probs: Dict[str, float]
+
+
+class _Pending(NamedTuple):
+    mel: torch.Tensor
+    language: Optional[str]
+    future: Future
+    submitted: float
+
+
+class DynamicBatcher:
+    """
+    Collects mel windows from concurrent callers into batched model passes.
+    - submit(): queue one (n_mels, 3000) window, returns a Future[WindowResult]
+    - transcribe(): decode a whole clip through the batcher (long audio = several windows)
+    - stats(): batch-size histogram and queue-latency percentiles
+    The model is leased from the model registry for every batch, so it stays
+    pinned only while in use.
+    """
+
+    def __init__(self, model_loader, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, overlap_seconds: float = DEFAULT_OVERLAP_SECONDS):
+        self.model_loader = model_loader
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.overlap_seconds = overlap_seconds
+        self._pending: Deque[_Pending] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._tokenizer = None
+        # Metrics
+        self.batch_sizes: Counter = Counter()
+        self.windows = 0
+        self.failures = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._model_seconds = 0.0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="whisper-batcher")
+            self._thread.start()
+
+    def submit(self, mel: torch.Tensor, language: Optional[str] = None) -> Future:
+        """
+        Queue one mel window for the next batch.
+        Args:
+            mel: (n_mels, N_FRAMES) log-mel window
+            language: language code to force, or None to detect
+        Returns:
+            Future resolving to a WindowResult
+        Raises:
+            UnsupportedLanguageError: for an unknown language code (checked here,
+                so a bad request never reaches a batch shared with other callers)
+        """
+        check_language(language)
+        future: Future = Future()
+        with self._cond:
+            self._pending.append(_Pending(mel, language, future, time.perf_counter()))
+            self._ensure_thread()
+            self._cond.notify()
+        return future
+
+    def _collect(self) -> List[_Pending]:
+        """Block for the first window, then gather more until full or max_wait_ms has passed."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].submitted + self.max_wait_ms / 1000.0
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            record_batch("whisper", len(batch))
+            for item in batch:
+                observe_stage("whisper", "batch_queue", started - item.submitted)
+            try:
+                with self.model_loader.lease() as model:
+                    # Forced languages differ per caller: one pass per distinct setting.
+                    # A failing pass fails only its own windows, not other callers' groups.
+                    for language in dict.fromkeys(item.language for item in batch):
+                        group = [item for item in batch if item.language == language]
+                        try:
+                            mel = torch.stack([item.mel for item in group])
+                            results, languages, probs = decode_batch(model, mel, language=language)
+                            for item, result, lang, lang_probs in zip(group, results, languages, probs):
+                                item.future.set_result(WindowResult(result, lang, lang_probs))
+                        except Exception as exc:
+                            self._fail(group, exc)
+            except Exception as exc:  # the model could not be leased: nothing in the batch ran
+                self._fail(batch, exc)
+            with self._cond:
+                self._latencies.extend(started - item.submitted for item in batch)
+                self._model_seconds += time.perf_counter() - started
+                self.batch_sizes[len(batch)] += 1
+                self.windows += len(batch)
+
+    def _fail(self, items: List[_Pending], exc: Exception):
+        with self._cond:
+            self.failures += 1
+        for item in items:
+            if not item.future.done():
+                item.future.set_exception(exc)
+
+    def _get_tokenizer(self, model):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                            task="transcribe")
+        return self._tokenizer
+
+    def transcribe_audio(self, audio: np.ndarray, language: Optional[str] = None,
+                         progress: Optional[Callable[[float, str], None]] = None) -> TranscriptionResult:
+        """
+        Transcribe decoded samples, sharing model passes with other callers.
+        Args:
+            audio: float32 mono samples at 16 kHz
+            language: optional language code to force
+            progress: optional callback(fraction_done, partial_text) per finished window
+        Returns:
+            TranscriptionResult; language is the first window's (as in long-form mode)
+        """
+        # The lease keeps the model pinned until the request's last window is decoded
+        with request_timer("transcribe"), self.model_loader.lease() as model:
+            return self._transcribe_audio(model, audio, language, progress)
+
+    def _transcribe_audio(self, model, audio: np.ndarray, language: Optional[str],
+                          progress: Optional[Callable[[float, str], None]]) -> TranscriptionResult:
+        with stage_timer("whisper", "mel"):
+            mel, offsets = windowed_log_mel(audio, n_mels=model.dims.n_mels, overlap_seconds=self.overlap_seconds)
+        # Without a forced language, detect it once on the first window and decode the
+        # rest in that language (as AudioFileTranscriber does), not once per window
+        futures = [self.submit(mel[0], language)]
+        first: WindowResult = futures[0].result()
+        futures += [self.submit(window, language or first.language) for window in mel[1:]]
+        tokenizer = self._get_tokenizer(model)
+        per_window = []
+        for future, offset in zip(futures, offsets):
+            window = future.result()
+            per_window.append(tokens_to_segments(window.result.tokens, tokenizer, offset))
+            if progress is not None:
+                partial = stitch_segments(per_window, offsets[:len(per_window)], self.overlap_seconds)
+                progress(len(per_window) / len(offsets), segments_to_text(partial))
+        duration = audio.shape[-1] / SAMPLE_RATE
+        with stage_timer("whisper", "stitch"):
+            segments = stitch_segments(per_window, offsets, self.overlap_seconds, duration)
+        return TranscriptionResult(first.language, segments_to_text(segments), first.language_probs,
+                                   segments, duration)
+
+    def transcribe(self, source: AudioSource, language: Optional[str] = None,
+                   progress: Optional[Callable[[float, str], None]] = None,
+                   max_seconds: Optional[float] = None) -> TranscriptionResult:
+        """
+        Decode a path, bytes or buffer and transcribe it (see transcribe_audio).
+        Raises:
+            AudioTooLongError: if the audio is longer than max_seconds
+        """
+        with stage_timer("whisper", "load_audio"):
+            audio = load_audio_source(source, max_seconds=max_seconds)
+        return self.transcribe_audio(audio, language=language, progress=progress)
+
+    def stats(self) -> dict:
+        """Batches run, windows decoded, batch-size histogram and queue latency (ms)."""
+        with self._cond:
+            latencies = np.array(self._latencies) * 1000.0
+            batches = sum(self.batch_sizes.values())
+            return {
+                "batches": batches,
+                "windows": self.windows,
+                "failures": self.failures,
+                "queued": len(self._pending),
+                "mean_batch_size": self.windows / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "queue_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                "queue_ms_p95": float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+                "model_seconds": self._model_seconds,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+            }
+
+
+_batchers: Dict[Tuple, DynamicBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_dynamic_batcher(model_loader) -> DynamicBatcher:
+    """Return the process-wide DynamicBatcher for a model (one per registry key)."""
+    with _batchers_lock:
+        batcher = _batchers.get(model_loader.key)
+        if batcher is None:
+            batcher = _batchers[model_loader.key] = DynamicBatcher(model_loader)
+            queue = "batcher/" + model_loader.key.model_id
+            register_queue(queue, lambda: {(queue,): len(batcher._pending)})
+        return batcher
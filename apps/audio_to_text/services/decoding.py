@@ -0,0 +1,96 @@
+"""Low-level Whisper decoding helpers that share one encoder pass.
+
+whisper.decode() and model.detect_language() both run the audio encoder
+when handed a mel spectrogram, but skip it when handed encoder output.
+These helpers encode once and reuse the features for language detection
+and decoding. They run under torch.inference_mode(), which skips autograd
+bookkeeping entirely (cheaper than no_grad). Each helper is timed as a
+"whisper" stage (see utils.metrics).
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import torch
+import whisper
+from whisper.tokenizer import LANGUAGES
+from utils.metrics import stage_timer
+
+
+
+class UnsupportedLanguageError(ValueError):
+    """Raised when a forced language is not a Whisper language code."""
+
+
+def check_language(language: Optional[str]) -> Optional[str]:
+    """
+    Validate a forced language code (None means detect).
+    Raises:
+        UnsupportedLanguageError: if Whisper does not know the code
+    """
+    if language is not None and language not in LANGUAGES:
+        raise UnsupportedLanguageError(f"Unsupported language: {language}")
+    return language
+
+
+def decoding_options(model, **kwargs) -> whisper.DecodingOptions:
+    """DecodingOptions with fp16 enabled only for half-precision models."""
+    fp16 = next(model.parameters()).dtype == torch.float16
+    return whisper.DecodingOptions(fp16=fp16, **kwargs)
+
+
+@torch.inference_mode()
+def encode(model, mel: torch.Tensor) -> torch.Tensor:
+    """Run the audio encoder once on a (batch, n_mels, frames) mel tensor."""
+    if mel.ndim == 2:
+        mel = mel.unsqueeze(0)
+    dtype = next(model.parameters()).dtype
+    with stage_timer("whisper", "encode"):
+        return model.embed_audio(mel.to(device=model.device, dtype=dtype))
+
+
+@torch.inference_mode()
+def detect_language_from_features(model, features: torch.Tensor) -> Tuple[List[str], List[Dict[str, float]]]:
+    """Detect the language of each item from encoder output (no re-encoding).
+
+    Returns:
+        (languages, probs): most likely language code and the full
+        probability map for every item in the batch
+    """
+    if not model.is_multilingual:
+        return ["en"] * features.shape[0], [{"en": 1.0} for _ in range(features.shape[0])]
+    with stage_timer("whisper", "detect_language"):
+        _, probs = model.detect_language(features)
+    languages = [max(p, key=p.get) for p in probs]
+    return languages, probs
+
+
+@torch.inference_mode()
+def decode_features(model, features: torch.Tensor, options: whisper.DecodingOptions) -> List[whisper.DecodingResult]:
+    """Decode encoder output; options.language should be set to avoid re-detection."""
+    with stage_timer("whisper", "decode"):
+        return whisper.decode(model, features, options)
+
+
+def decode_batch(model, mel: torch.Tensor, language: Optional[str] = None, **option_kwargs
+                 ) -> Tuple[List[whisper.DecodingResult], List[str], List[Dict[str, float]]]:
+    """Encode, detect language and decode a batch of windows in one encoder pass.
+
+    Windows may come from different recordings: each window's language is
+    detected from the shared encoder output and windows are decoded grouped
+    by language. Passing language skips detection.
+
+    Returns:
+        (results, languages, probs) in batch order; probs are empty when forced
+    """
+    features = encode(model, mel)
+    if language is None:
+        languages, probs = detect_language_from_features(model, features)
+    else:
+        languages, probs = [language] * features.shape[0], [{} for _ in range(features.shape[0])]
+    results: List[Optional[whisper.DecodingResult]] = [None] * features.shape[0]
+    for lang in dict.fromkeys(languages):
+        index = [i for i, l in enumerate(languages) if l == lang]
+        group = features if len(index) == features.shape[0] else features[index]
+        decoded = decode_features(model, group, decoding_options(model, language=lang, **option_kwargs))
+        for i, result in zip(index, decoded):
+            results[i] = result
+    return results, languages, probs
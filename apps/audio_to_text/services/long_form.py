@@ -0,0 +1,132 @@
+"""Helpers for long-form (> 30 s) transcription.
+
+Whisper only sees 30 second windows. Long recordings are split into
+overlapping windows whose log-mel spectrograms are computed in a single
+vectorized pass over the whole signal; decoded windows are then stitched
+back together using the timestamp tokens Whisper emits.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+import numpy as np
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FFT, N_FRAMES, N_SAMPLES, SAMPLE_RATE
+
+DEFAULT_OVERLAP_SECONDS = 5.0
+WINDOW_SECONDS = N_SAMPLES / SAMPLE_RATE
+TIME_PRECISION = HOP_LENGTH * 2 / SAMPLE_RATE  # seconds per timestamp token (0.02)
+
+
+@dataclass
+class TranscriptSegment:
+    """A piece of transcript with absolute start/end times in seconds."""
+    start: float
+    end: float
+    text: str
+
+
+def window_stride_samples(overlap_seconds: float) -> int:
+    """Window stride in samples, rounded to a whole number of mel frames."""
+    overlap = int(round(overlap_seconds * SAMPLE_RATE / HOP_LENGTH)) * HOP_LENGTH
+    return max(HOP_LENGTH, N_SAMPLES - overlap)
+
+
+def windowed_log_mel(audio: np.ndarray, n_mels: int = 80,
+                     overlap_seconds: float = DEFAULT_OVERLAP_SECONDS) -> Tuple[torch.Tensor, List[float]]:
+    """Compute log-mel spectrograms for overlapping 30 s windows of audio.
+
+    The STFT runs once over the (zero padded) signal and windows are taken as
+    strided views of the resulting frames, so overlapping regions are never
+    recomputed. Normalization is applied per window, matching what
+    whisper.log_mel_spectrogram does for a single padded clip.
+
+    Args:
+        audio: float32 mono samples at 16 kHz
+        n_mels: number of mel bins the model expects
+        overlap_seconds: overlap between consecutive windows
+    Returns:
+        (mel, offsets): mel tensor of shape (windows, n_mels, N_FRAMES) and the
+        start time of each window in seconds
+    """
+    audio = torch.as_tensor(audio, dtype=torch.float32)
+    stride = window_stride_samples(overlap_seconds)
+    extra = max(0, audio.shape[-1] - N_SAMPLES)
+    n_windows = 1 + -(-extra // stride)
+    total = (n_windows - 1) * stride + N_SAMPLES
+    audio = torch.nn.functional.pad(audio, (0, total - audio.shape[-1]))
+
+    window = torch.hann_window(N_FFT)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel = whisper.audio.mel_filters(audio.device, n_mels) @ magnitudes
+    log_spec = torch.clamp(mel, min=1e-10).log10()
+
+    windows = log_spec.unfold(-1, N_FRAMES, stride // HOP_LENGTH).permute(1, 0, 2)
+    maxes = windows.amax(dim=(1, 2), keepdim=True)
+    windows = (torch.maximum(windows, maxes - 8.0) + 4.0) / 4.0
+    offsets = [i * stride / SAMPLE_RATE for i in range(n_windows)]
+    return windows.contiguous(), offsets
+
+
+def tokens_to_segments(tokens: Sequence[int], tokenizer, offset: float) -> List[TranscriptSegment]:
+    """Split a decoded token sequence into segments using timestamp tokens.
+
+    Args:
+        tokens: decoded tokens (without the start-of-transcript sequence)
+        tokenizer: whisper tokenizer used for decoding
+        offset: start time of the window in seconds
+    Returns:
+        List of segments with absolute times
+    """
+    segments: List[TranscriptSegment] = []
+    start = None
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            time = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is not None and text_tokens:
+                text = tokenizer.decode(text_tokens).strip()
+                if text:
+                    segments.append(TranscriptSegment(offset + start, offset + time, text))
+                text_tokens = []
+                start = None
+            else:
+                start = time
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        # Window ended without a closing timestamp: assume it runs to the window end
+        text = tokenizer.decode(text_tokens).strip()
+        if text:
+            segments.append(TranscriptSegment(offset + (start or 0.0), offset + WINDOW_SECONDS, text))
+    return segments
+
+
+def stitch_segments(per_window: Sequence[List[TranscriptSegment]], offsets: Sequence[float],
+                    overlap_seconds: float = DEFAULT_OVERLAP_SECONDS,
+                    duration: float = None) -> List[TranscriptSegment]:
+    """Merge segments from overlapping windows into one timeline.
+
+    Each window owns the middle of its span; the overlap shared with a
+    neighbour is split halfway. A segment is kept only by the window that
+    owns its midpoint, so text in overlaps is neither lost nor duplicated.
+    """
+    half = overlap_seconds / 2.0
+    last = len(offsets) - 1
+    merged: List[TranscriptSegment] = []
+    for i, (segments, offset) in enumerate(zip(per_window, offsets)):
+        lo = offset + half if i > 0 else float("-inf")
+        hi = offset + WINDOW_SECONDS - half if i < last else float("inf")
+        for seg in segments:
+            mid = (seg.start + seg.end) / 2.0
+            if lo <= mid < hi:
+                if duration is not None:
+                    seg = TranscriptSegment(min(seg.start, duration), min(seg.end, duration), seg.text)
+                merged.append(seg)
+    return merged
+
+
+def segments_to_text(segments: Sequence[TranscriptSegment]) -> str:
+    """Join segment texts into a single transcript string."""
+    return " ".join(seg.text for seg in segments if seg.text)
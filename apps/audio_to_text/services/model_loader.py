@@ -1,30 +1,94 @@
+from typing import Optional
+import torch
 import whisper
+from utils.file_helper import FileHelper
+from utils.inference_backend import (
+    DEFAULT_BACKEND,
+    configure_threads,
+    load_or_trace,
+    quantize_linear_int8,
+    validate_backend,
+)
+from utils.model_registry import ModelKey, get_model_registry
 
 DEFAULT_MODEL_NAME = "tiny"
+DEFAULT_DTYPE = "float32"
+COMPILED_SUBDIR = "compiled"  # cached TorchScript artifacts under the FileHelper root
+WARMUP_AUDIO_SECONDS = 1.0
 
 class ModelLoader:
     """Simple wrapper around whisper model loading.
 
-    Provides a class-based interface so that future configuration
-    (device placement, caching, quantization, etc.) can be added
-    without changing call sites. Currently minimal by design.
+    Models are shared process-wide through the ModelRegistry, keyed by
+    (model name, device, dtype, backend), so every session and UI component
+    that asks for the same variant gets the same instance.
+
+    Backends (see utils.inference_backend):
+        default: whisper.load_model as is
+        int8: dynamic int8 quantization of all Linear layers (CPU only)
+        torchscript: the audio encoder (fixed 30 s input) traced once and
+            cached on disk; the autoregressive decoder stays eager
     """
 
-    def __init__(self, model_name: str = DEFAULT_MODEL_NAME):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, device: Optional[str] = None,
+                 dtype: str = DEFAULT_DTYPE, backend: Optional[str] = None):
         # Store the requested model name (fallback to default if empty)
         self.model_name = model_name or DEFAULT_MODEL_NAME
-        self._model = None  # Lazy-loaded model reference
+        self.device = device or self.default_device()
+        self.dtype = dtype or DEFAULT_DTYPE
+        self.backend = validate_backend(backend or DEFAULT_BACKEND, self.device)
+        if self.backend == "int8" and self.dtype != "float32":
+            raise ValueError("The int8 backend quantizes float32 weights; use dtype='float32'")
+
+    @staticmethod
+    def default_device() -> str:
+        """Same device choice whisper.load_model makes when none is given."""
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    @property
+    def key(self) -> ModelKey:
+        return ModelKey(self.model_name, self.device, self.dtype, self.backend)
+
+    def encoder_artifact(self):
+        """Path of the cached TorchScript encoder for this model variant."""
+        name = f"whisper-{self.model_name}-encoder-{self.device}-{self.dtype}-torch{torch.__version__}.pt"
+        return FileHelper("audio_to_text").get_subdir(COMPILED_SUBDIR) / name.replace("+", "_")
+
+    def apply_backend(self, model):
+        """Convert a freshly loaded float model to the configured backend."""
+        if self.backend == "int8":
+            return quantize_linear_int8(model, linear_types=(whisper.model.Linear,))
+        if self.backend == "torchscript":
+            def build():
+                mel = torch.zeros(1, model.dims.n_mels, whisper.audio.N_FRAMES,
+                                  dtype=next(model.encoder.parameters()).dtype, device=self.device)
+                return model.encoder, (mel,)
+            model.encoder = load_or_trace(self.encoder_artifact(), build, device=self.device)
+        return model
+
+    def load_uncached(self):
+        """Load a fresh model instance, bypassing the registry."""
+        configure_threads()
+        model = whisper.load_model(self.model_name, device=self.device)
+        if self.dtype == "float16":
+            model = model.half()
+        return self.apply_backend(model.eval())
 
     def load(self):
-        """Load (or return cached) whisper model instance.
+        """Load the shared whisper model into the registry (or look it up).
+
+        The returned instance is not pinned: the registry may evict it once
+        no lease is held, so inference should run under lease() rather than
+        keep this reference.
 
         Returns:
             The loaded whisper model.
         """
-        if self._model is None:
-            # Actual loading call to whisper; could extend with device logic later.
-            self._model = whisper.load_model(self.model_name)
-        return self._model
+        return get_model_registry().get(self.key, self.load_uncached)
+
+    def lease(self):
+        """Context manager pinning the shared model while it is in use."""
+        return get_model_registry().lease(self.key, self.load_uncached)
 
 def load_model(model_name: str = DEFAULT_MODEL_NAME):
     """Functional access preserved for compatibility.
@@ -35,3 +99,18 @@ def load_model(model_name: str = DEFAULT_MODEL_NAME):
         Loaded whisper model instance.
     """
     return ModelLoader(model_name).load()
+
+
+def warm_up(model_name: str = DEFAULT_MODEL_NAME):
+    """Load the shared model and decode one second of silence through the dynamic
+    batcher, so lazy kernel initialization happens before the first real request.
+
+    Args:
+        model_name: Whisper model variant (e.g. 'tiny', 'base').
+    """
+    import numpy as np
+    from .batching import get_dynamic_batcher
+    loader = ModelLoader(model_name)
+    loader.load()
+    get_dynamic_batcher(loader).transcribe_audio(np.zeros(int(WARMUP_AUDIO_SECONDS * whisper.audio.SAMPLE_RATE),
+                                                          dtype=np.float32))
@@ -0,0 +1,158 @@
+"""PDF export of transcripts.
+
+PDFs are rendered on demand and memoised by a hash of the text, so Streamlit
+reruns reuse the bytes instead of rebuilding the document. Text is set in a
+Unicode TrueType font (DejaVu Sans) when one is available, falling back to
+the built-in Arial with '?' for unsupported characters otherwise. Layout is
+streamed: paragraphs are wrapped lazily, one output line at a time, and
+emitted as single-line cells; word widths are memoised since transcripts
+repeat the same words constantly.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import fpdf
+from fpdf import FPDF
+from utils.file_helper import FileHelper
+
+FONT_CANDIDATES = (
+    os.environ.get("GENAI_PDF_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Debian/Ubuntu: fonts-dejavu-core
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",  # Fedora
+    "/Library/Fonts/DejaVuSans.ttf",  # macOS: brew install --cask font-dejavu
+)
+FONT_SIZE = 12
+LINE_HEIGHT = 7  # mm
+EMPTY_TEXT = "(No transcription)"
+MEMO_ENTRIES = 8  # rendered PDFs kept per process
+
+_memo: "OrderedDict[str, bytes]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def find_unicode_font() -> Optional[str]:
+    """Path of the first available Unicode TTF font, or None."""
+    for candidate in FONT_CANDIDATES:
+        if candidate and Path(candidate).is_file():
+            return candidate
+    return None
+
+
+def pdf_cache_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _new_document() -> Tuple[FPDF, bool]:
+    """A4 document with the Unicode font selected when available; returns (pdf, unicode)."""
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    font = find_unicode_font()
+    unicode = False
+    if font:
+        # Parsed TTF metrics are pickled under the resource root instead of the font directory
+        fpdf.set_global("FPDF_CACHE_MODE", 2)
+        fpdf.set_global("FPDF_CACHE_DIR", str(FileHelper("audio_to_text").get_subdir("font_cache")))
+        try:
+            pdf.add_font("DejaVu", "", font, uni=True)
+            pdf.set_font("DejaVu", size=FONT_SIZE)
+            unicode = True
+        except Exception:
+            unicode = False
+    if not unicode:
+        pdf.set_font("Arial", size=FONT_SIZE)
+    return pdf, unicode
+
+
+def _compact_subset(pdf: FPDF):
+    """
+    Drop duplicate code points from the current font's glyph subset.
+    fpdf 1.7 appends every written character to a list and later scans it once
+    per code point up to the highest one used, which is quadratic on long text.
+    """
+    font = pdf.current_font
+    font["subset"] = list(dict.fromkeys(font["subset"]))  # keeps order (index 0 is dropped on output)
+
+
+def iter_wrapped_lines(pdf: FPDF, text: str, width: float) -> Iterator[str]:
+    """
+    Lazily wrap text to lines no wider than width (in user units).
+    Blank paragraphs yield an empty line; over-long words are split by character.
+    """
+    widths: Dict[str, float] = {}
+
+    def measure(word: str) -> float:
+        w = widths.get(word)
+        if w is None:
+            w = widths[word] = pdf.get_string_width(word)
+        return w
+
+    space = measure(" ")
+    for paragraph in text.splitlines():
+        line, line_width = [], 0.0
+        for word in paragraph.split():
+            w = measure(word)
+            if line and line_width + space + w > width:
+                yield " ".join(line)
+                line, line_width = [], 0.0
+            if w > width:
+                # A single word wider than the page: break it by character
+                chunk = ""
+                for ch in word:
+                    if chunk and pdf.get_string_width(chunk + ch) > width:
+                        yield chunk
+                        chunk = ""
+                    chunk += ch
+                word, w = chunk, pdf.get_string_width(chunk)
+            line_width = line_width + space + w if line else w
+            line.append(word)
+        yield " ".join(line)
+
+
+def render_pdf(text: str) -> bytes:
+    """
+    Render text as a PDF document.
+    Returns:
+        PDF file bytes
+    """
+    if not text.strip():
+        text = EMPTY_TEXT
+    pdf, unicode = _new_document()
+    if not unicode:
+        text = text.encode("latin-1", "replace").decode("latin-1")
+    pdf.add_page()
+    width = pdf.w - pdf.l_margin - pdf.r_margin
+    page = pdf.page
+    for line in iter_wrapped_lines(pdf, text, width):
+        pdf.cell(0, LINE_HEIGHT, txt=line, ln=1)
+        if unicode and pdf.page != page:
+            page = pdf.page
+            _compact_subset(pdf)
+    if unicode:
+        _compact_subset(pdf)
+    return pdf.output(dest="S").encode("latin-1")
+
+
+def get_pdf_bytes(text: str) -> bytes:
+    """PDF bytes for text, rendered once and memoised by the text hash."""
+    key = pdf_cache_key(text)
+    with _memo_lock:
+        data = _memo.get(key)
+        if data is not None:
+            _memo.move_to_end(key)
+            return data
+    data = render_pdf(text)
+    with _memo_lock:
+        _memo[key] = data
+        while len(_memo) > MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return data
+
+
+def has_pdf(text: str) -> bool:
+    """True when the PDF for text is already rendered."""
+    with _memo_lock:
+        return pdf_cache_key(text) in _memo
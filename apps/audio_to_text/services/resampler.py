@@ -0,0 +1,152 @@
+"""Streaming polyphase resampler.
+
+Converts audio between rates with rational ratio up/down (48 kHz -> 16 kHz
+is 1/3, 44.1 kHz -> 16 kHz is 160/441) using a Kaiser-windowed sinc
+low-pass designed once per rate pair and split into `up` polyphase
+branches. Filter state (the last taps-1 input samples) is carried across
+frames, so frame boundaries are seamless, and all work buffers are reused
+between calls of the same frame size.
+"""
+from __future__ import annotations
+from functools import lru_cache
+from math import gcd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ZERO_CROSSINGS = 16  # sinc lobes on each side of the filter centre
+ROLLOFF = 0.94  # cutoff as a fraction of the output Nyquist frequency
+KAISER_BETA = 8.6  # ~80 dB stopband attenuation
+ONE_SHOT_BLOCK = 32768  # input samples per block in resample()
+
+
+@lru_cache(maxsize=16)
+def design_polyphase(up: int, down: int, zero_crossings: int = ZERO_CROSSINGS,
+                     rolloff: float = ROLLOFF, beta: float = KAISER_BETA) -> np.ndarray:
+    """
+    Design the anti-aliasing filter and split it into polyphase branches.
+    The prototype is centred on upsampled index taps * up // 2, an integer,
+    so the group delay can be compensated exactly.
+    Returns:
+        float32 array of shape (up, taps); row p holds branch p reversed so
+        that a dot product with x[i - taps + 1 : i + 1] gives the output
+    """
+    factor = max(up, down)
+    taps = 2 * zero_crossings * factor // up + 1
+    length = taps * up
+    cutoff = rolloff * 0.5 / factor  # cycles per sample at the upsampled rate
+    centre = length // 2
+    n = np.arange(length) - centre
+    window = np.kaiser(2 * centre + 1, beta)[:length]
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * n) * window * up
+    branches = h.reshape(taps, up).T[:, ::-1]
+    return np.ascontiguousarray(branches, dtype=np.float32)
+
+
+class StreamingResampler:
+    """Stateful resampler for a fixed input/output rate pair.
+
+    With align=True output sample j is aligned with input time j / out_rate
+    (the filter delay is absorbed by holding back output); the default emits
+    output as early as possible, delayed by delay_seconds.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int = 16000, align: bool = False):
+        g = gcd(in_rate, out_rate)
+        self.in_rate, self.out_rate = in_rate, out_rate
+        self.up, self.down = out_rate // g, in_rate // g
+        self._branches = design_polyphase(self.up, self.down)
+        self.taps = self._branches.shape[1]
+        self._offset = self.taps * self.up // 2 if align else 0  # in upsampled samples
+        self._capacity = 0
+        self.reset()
+
+    @property
+    def delay_seconds(self) -> float:
+        """Group delay introduced by the linear-phase filter."""
+        return (self.taps * self.up // 2) / (self.up * self.in_rate)
+
+    def reset(self):
+        self._consumed = 0  # input samples seen so far
+        self._produced = 0  # output samples emitted so far
+        self._ext = np.zeros(self.taps - 1 + self._capacity, dtype=np.float32)
+
+    def _ensure_capacity(self, n: int):
+        """Grow work buffers for frames of up to n input samples (keeps filter state)."""
+        if n <= self._capacity:
+            return
+        history = self._ext[:self.taps - 1].copy()
+        self._capacity = n
+        max_out = n * self.up // self.down + 2
+        self._ext = np.zeros(self.taps - 1 + n, dtype=np.float32)
+        self._ext[:self.taps - 1] = history
+        self._positions = np.zeros(max_out, dtype=np.int64)
+        self._phases = np.zeros(max_out, dtype=np.int64)
+        self._starts = np.zeros(max_out, dtype=np.int64)
+        self._rows = np.zeros((max_out, self.taps), dtype=np.float32)
+        self._coeffs = np.zeros((max_out, self.taps), dtype=np.float32)
+        self._out = np.zeros(max_out, dtype=np.float32)
+        self._arange = np.arange(max_out, dtype=np.int64)
+
+    def process(self, pcm: np.ndarray) -> np.ndarray:
+        """
+        Resample one frame. The returned array is a view into an internal
+        buffer that is overwritten by the next call; copy it to keep it.
+        """
+        n = pcm.shape[0]
+        if n == 0:  # empty capture frames are common; may arrive before any buffer exists
+            return np.zeros(0, dtype=np.float32)
+        self._ensure_capacity(n)
+        h = self.taps - 1
+        ext = self._ext[:h + n]
+        ext[h:] = pcm
+
+        total = self._consumed + n
+        first = self._produced
+        last = max(first, (total * self.up - 1 - self._offset) // self.down + 1)  # exclusive
+        count = last - first
+
+        windows = sliding_window_view(ext, self.taps)
+        out = self._out[:count]
+        if self.up == 1:
+            # Integer decimation: a strided view of the windows, no gather needed
+            start = first * self.down + self._offset - self._consumed
+            np.matmul(windows[start:start + count * self.down:self.down], self._branches[0], out=out)
+        else:
+            positions = self._positions[:count]
+            np.add(self._arange[:count], first, out=positions)
+            np.multiply(positions, self.down, out=positions)
+            np.add(positions, self._offset, out=positions)
+            phases, starts = self._phases[:count], self._starts[:count]
+            np.remainder(positions, self.up, out=phases)
+            np.floor_divide(positions, self.up, out=starts)
+            np.subtract(starts, self._consumed, out=starts)
+            rows, coeffs = self._rows[:count], self._coeffs[:count]
+            np.take(windows, starts, axis=0, out=rows)
+            np.take(self._branches, phases, axis=0, out=coeffs)
+            np.einsum("ij,ij->i", rows, coeffs, out=out)
+
+        ext[:h] = ext[n:n + h]  # carry the last taps-1 samples into the next frame
+        self._consumed = total
+        self._produced = last
+        return out
+
+
+def resample(audio: np.ndarray, in_rate: int, out_rate: int = 16000) -> np.ndarray:
+    """
+    One-shot resampling of a whole signal with the same filter, delay compensated.
+    """
+    if in_rate == out_rate:
+        return audio.astype(np.float32, copy=False)
+    resampler = StreamingResampler(in_rate, out_rate, align=True)
+    tail = resampler.taps // 2 + 1  # zeros that flush the filter delay
+    padded = np.concatenate((audio.astype(np.float32, copy=False), np.zeros(tail, np.float32)))
+    length = -(-audio.shape[0] * resampler.up // resampler.down)
+    out = np.empty(length + resampler.up, np.float32)
+    produced = 0
+    # Fixed-size blocks keep the gathered (outputs x taps) windows small for long signals
+    for start in range(0, padded.shape[0], ONE_SHOT_BLOCK):
+        block = resampler.process(padded[start:start + ONE_SHOT_BLOCK])
+        take = min(block.shape[0], out.shape[0] - produced)
+        out[produced:produced + take] = block[:take]
+        produced += take
+    return out[:length]
@@ -1,150 +1,274 @@
-"""Skeleton for future real-time / streaming speech transcription.
+"""Streaming speech transcription engine.
 
-This module anticipates a Streamlit + WebRTC implementation. The design
-sketch below separates concerns for buffering, VAD (voice activity
-detection), chunk assembly, and decode scheduling. Actual logic is left
-as placeholders to be filled when live audio capture is introduced.
+Frames captured from a live source (e.g. streamlit-webrtc) are fed into
+add_frame(). Each call only processes the new samples:
 
-Planned components:
-- SpeechTranscriber: orchestrates buffering frames and triggering decode.
-- AudioBuffer: lightweight ring or append buffer (could move to utils/ later).
-- VAD logic (placeholder): to decide when to segment speech.
-- decode_strategy: could allow partial (streaming) vs full decode.
+- AudioBuffer: preallocated ring of recent samples.
+- IncrementalLogMel: log-mel frames computed once per sample as they arrive.
+- VoiceActivityDetector: frame-level speech/silence decisions; silent audio
+  never reaches the mel or the model, and a segment is finalized once
+  speech is followed by a sustained pause.
+- SpeechTranscriber: decodes a sliding window over the uncommitted audio,
+  commits the prefix that two consecutive hypotheses agree on, drops the
+  committed audio from the window and prompts the next decode with the
+  committed text. The window never exceeds 30 s, so partial decode latency
+  stays constant however long someone talks.
 
-You will integrate with streamlit-webrtc or similar later by feeding PCM
-frames into add_frame().
+Resampling, VAD and mel steps are timed per frame and every window decode
+counts as a "stream" request in utils.metrics.
 """
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional
 import numpy as np
-import whisper
+from whisper.tokenizer import get_tokenizer
+from utils.metrics import request_timer, stage_timer
+from .decoding import decode_batch
+from .long_form import segments_to_text, tokens_to_segments
 from .model_loader import ModelLoader
+from .resampler import StreamingResampler
+from .streaming_mel import FRAMES_PER_SECOND, IncrementalLogMel
+from .vad import VoiceActivityDetector
 
 
-# Placeholder constants (tweak later once real streaming is added)
 TARGET_RATE = 16000  # Whisper expected sample rate
 MIN_CHUNK_SECONDS = 3.0  # Minimum audio duration before attempting decode
-SILENCE_THRESHOLD = 0.01  # RMS threshold heuristic for silence
+SILENCE_THRESHOLD = 0.01  # RMS below which a frame counts as silence (VAD stop threshold)
+PREROLL_SECONDS = 0.3  # Audio kept from before speech onset so the first word is not clipped
+BUFFER_SECONDS = 30.0  # Capacity of the sample ring buffer
+MAX_WINDOW_SECONDS = 24.0  # Force a commit before the decode window reaches Whisper's 30 s limit
+PROMPT_CHARS = 200  # Tail of committed text used as the decoder prompt
 
 
 @dataclass
 class AudioBuffer:
-    """Simple audio buffer accumulating float32 samples at TARGET_RATE."""
-    samples: List[np.ndarray] = field(default_factory=list)
-    total_len: int = 0
+    """Preallocated ring buffer of float32 samples at TARGET_RATE.
+
+    Appends overwrite the oldest samples once capacity is reached.
+    """
+    capacity: int = int(BUFFER_SECONDS * TARGET_RATE)
+    total_len: int = 0  # samples currently held
+    written: int = 0  # samples appended since the last clear()
+    _data: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._data = np.zeros(self.capacity, dtype=np.float32)
 
     def append(self, pcm: np.ndarray):
         if pcm.dtype != np.float32:
             pcm = pcm.astype(np.float32)
-        self.samples.append(pcm)
-        self.total_len += pcm.shape[0]
+        if pcm.shape[0] > self.capacity:
+            # Only the last `capacity` samples survive; the skipped ones still count as written
+            self.written += pcm.shape[0] - self.capacity
+            pcm = pcm[-self.capacity:]
+        n = pcm.shape[0]
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = pcm[:first]
+        self._data[:n - first] = pcm[first:]
+        self.written += n
+        self.total_len = min(self.capacity, self.total_len + n)
+
+    def _slice(self, start: int, length: int):
+        end = start + length
+        if end <= self.capacity:
+            return (self._data[start:end],)
+        return self._data[start:], self._data[:end - self.capacity]
 
     def duration(self) -> float:
         return self.total_len / TARGET_RATE if TARGET_RATE else 0.0
 
-    def rms(self) -> float:
-        if self.total_len == 0:
-            return 0.0
-        concat = self.to_array()
-        return float(np.sqrt(np.mean(concat ** 2)))
-
     def to_array(self) -> np.ndarray:
-        if not self.samples:
-            return np.zeros(0, dtype=np.float32)
-        return np.concatenate(self.samples, axis=0)
+        """Copy of the held samples in chronological order."""
+        start = (self.written - self.total_len) % self.capacity
+        return np.concatenate(self._slice(start, self.total_len)) if self.total_len else \
+            np.zeros(0, dtype=np.float32)
 
     def clear(self):
-        self.samples.clear()
         self.total_len = 0
+        self.written = 0
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
 
 class SpeechTranscriber:
-    """Prototype for future streaming speech-to-text.
+    """Streaming speech-to-text over a shared Whisper model.
 
-    Usage pattern (future Streamlit integration):
+    Usage pattern (Streamlit / WebRTC integration):
         stt = SpeechTranscriber(model_name="tiny")
         stt.add_frame(pcm_chunk, sample_rate=48000)
         partial = stt.maybe_partial_decode()
         final = stt.finalize_if_complete()
-
-    Currently only structural placeholders are implemented.
     """
 
     def __init__(self, model_name: str = "tiny"):
         self.model_name = model_name
         self._loader = ModelLoader(model_name)
-        self._model = None
+        self._tokenizer = None
         self._buffer = AudioBuffer()
+        self._preroll = AudioBuffer(capacity=int(PREROLL_SECONDS * TARGET_RATE))
+        self._resamplers: Dict[int, StreamingResampler] = {}  # one per capture rate
+        self._vad = VoiceActivityDetector(sample_rate=TARGET_RATE, stop_db=20 * np.log10(SILENCE_THRESHOLD))
+        self._mel: Optional[IncrementalLogMel] = None
         self._last_transcript: Optional[str] = None
+        self._segment_complete = False
+        self._reset_stream()
 
     @property
-    def model(self):
-        if self._model is None:
-            self._model = self._loader.load()
-        return self._model
+    def mel(self) -> IncrementalLogMel:
+        if self._mel is None:
+            with self._loader.lease() as model:
+                self._mel = IncrementalLogMel(n_mels=model.dims.n_mels)
+        return self._mel
+
+    def _get_tokenizer(self, model):
+        if self._tokenizer is None:
+            self._tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                            task="transcribe")
+        return self._tokenizer
+
+    def _reset_stream(self):
+        self._window_start = 0  # first mel frame of the uncommitted audio
+        self._committed: List[str] = []
+        self._hypothesis: List[str] = []  # uncommitted words from the previous decode
+        self._language: Optional[str] = None
+        if self._mel is not None:
+            self._mel.reset()
 
     def add_frame(self, pcm: np.ndarray, sample_rate: int):
         """Add raw PCM samples for a captured frame.
 
-        Resamples if needed (naive implementation placeholder). Actual WebRTC
-        frames often arrive at 48000 Hz, so we will downsample to TARGET_RATE.
+        WebRTC frames usually arrive at 48000 Hz; they are converted to
+        TARGET_RATE by a streaming polyphase resampler that keeps its filter
+        state between frames, so frame boundaries add no artifacts.
         """
         if sample_rate != TARGET_RATE and pcm.size > 0:
-            # Simple linear resample (placeholder; replace with scipy or resampy later)
-            duration = pcm.shape[0] / sample_rate
-            target_len = int(duration * TARGET_RATE)
-            x_old = np.linspace(0, duration, num=pcm.shape[0], endpoint=False)
-            x_new = np.linspace(0, duration, num=target_len, endpoint=False)
-            pcm = np.interp(x_new, x_old, pcm).astype(np.float32)
-            
-        self._buffer.append(pcm)
+            resampler = self._resamplers.get(sample_rate)
+            if resampler is None:
+                resampler = self._resamplers[sample_rate] = StreamingResampler(sample_rate, TARGET_RATE)
+            with stage_timer("whisper", "resample"):
+                pcm = resampler.process(pcm)
+
+        with stage_timer("whisper", "vad"):
+            chunk = self._vad.process(pcm)
+        if chunk.segment_start is not None:
+            # Speech onset: feed the short pre-roll, then audio from the first speech frame
+            self._feed(self._preroll.to_array())
+            self._preroll.clear()
+            self._feed(chunk.audio[chunk.segment_start * self._vad.frame_len:])
+        elif self._vad.segment_open or chunk.segment_end:
+            self._feed(chunk.audio)
+        elif chunk.audio.size:
+            self._preroll.append(chunk.audio)  # silence never reaches the model
+
+        if chunk.segment_end:
+            if chunk.discarded:
+                self._clear_segment()  # a click or bump, not speech
+            else:
+                self._segment_complete = True
+
+    def _feed(self, pcm: np.ndarray):
+        if pcm.size:
+            self._buffer.append(pcm)
+            mel = self.mel  # loads the model on first use; not part of the mel timing
+            with stage_timer("whisper", "mel"):
+                mel.push(pcm)
+
+    def _clear_segment(self):
+        self._buffer.clear()
+        self._reset_stream()
+        self._last_transcript = None
+
+    def uncommitted_seconds(self) -> float:
+        return (self.mel.frames_written - self._window_start) / FRAMES_PER_SECOND
 
     def has_sufficient_audio(self) -> bool:
-        return self._buffer.duration() >= MIN_CHUNK_SECONDS
+        return self.uncommitted_seconds() >= MIN_CHUNK_SECONDS
 
     def is_silence(self) -> bool:
-        return self._buffer.rms() < SILENCE_THRESHOLD
+        """True when no speech segment is open (VAD saw a sustained pause)."""
+        return not self._vad.segment_open
+
+    def committed_text(self) -> str:
+        return " ".join(self._committed)
+
+    def _decode_window(self):
+        """Decode the uncommitted window, prompted with the committed text."""
+        prompt = self.committed_text()[-PROMPT_CHARS:] or None
+        mel = self.mel.window(self._window_start).unsqueeze(0)
+        # Lease per decode: the model stays pinned while it runs but is not held between
+        # decodes, so an idle stream does not keep it from being evicted
+        with self._loader.lease() as model, request_timer("stream"):
+            results, languages, _ = decode_batch(model, mel, language=self._language, prompt=prompt)
+            tokenizer = self._get_tokenizer(model)
+        self._language = self._language or languages[0]
+        return tokens_to_segments(results[0].tokens, tokenizer, 0.0)
+
+    def _commit(self, segments):
+        """Commit leading segments confirmed by the previous hypothesis.
+
+        A segment is stable once all of its words match the previous decode
+        of the same audio (local agreement). The last segment may still be
+        growing and is only committed when the window is about to outgrow
+        Whisper's 30 s, in which case everything decoded so far is committed.
+        """
+        words = segments_to_text(segments).split()
+        agreed = _common_prefix(self._hypothesis, words)
+        force = self.uncommitted_seconds() >= MAX_WINDOW_SECONDS
+        used = 0
+        for seg in (segments if force else segments[:-1]):
+            seg_words = len(seg.text.split())
+            if used + seg_words > agreed and not force:
+                break
+            self._committed.append(seg.text)
+            used += seg_words
+            shift = seg.end
+            self._window_start = min(self.mel.frames_written,
+                                     self._window_start + int(round(shift * FRAMES_PER_SECOND)))
+            # Following segment times are relative to the old window start
+            for later in segments:
+                later.start -= shift
+                later.end -= shift
+        self._hypothesis = words[used:]
 
     def maybe_partial_decode(self) -> Optional[str]:
-        """Attempt a partial decode if enough audio present.
+        """Attempt a partial decode while speech is ongoing.
 
-        In a real implementation you might gate on both duration and
-        recent activity pattern to avoid premature decodes.
+        Returns the committed text followed by the current hypothesis, or
+        None when there is no open speech segment or too little audio.
         """
-        if not self.has_sufficient_audio():
+        if not self._vad.segment_open or not self.has_sufficient_audio():
             return None
-        
-        concat = self._buffer.to_array()
-        mel = whisper.log_mel_spectrogram(concat).to(self.model.device)
-        
-        # For partial decode, you could set no_speech_threshold lower or temperature variations.
-        options = whisper.DecodingOptions()
-        result = whisper.decode(self.model, mel, options)
-        self._last_transcript = result.text
+
+        self._commit(self._decode_window())
+        self._last_transcript = " ".join(self._committed + self._hypothesis)
         return self._last_transcript
 
     def finalize_if_complete(self) -> Optional[str]:
-        """Heuristic finalization: if buffer is silent after speech, finalize.
+        """Finalize once the VAD has seen speech end (trailing silence).
 
-        Real logic would track trailing silence duration and segmentation.
-        Currently returns last transcript if silence detected.
+        The speech segment is decoded once more to its end, the stream is
+        reset for the next utterance and the full transcript is returned.
         """
-        if self.is_silence() and self._last_transcript:
-            final = self._last_transcript
-            self._buffer.clear()
-            self._last_transcript = None
-            return final
-        
-        return None
+        if not self._segment_complete:
+            return None
+
+        self._segment_complete = False
+        final = self.force_decode()
+        self._clear_segment()
+        return final or None
 
     def force_decode(self) -> str:
-        """Force a decode on current buffer regardless of duration/silence."""
-        concat = self._buffer.to_array()
-
-        if concat.size == 0:
-            return ""
-        
-        mel = whisper.log_mel_spectrogram(concat).to(self.model.device)
-        options = whisper.DecodingOptions()
-        result = whisper.decode(self.model, mel, options)
-        return result.text
+        """Force a decode of the buffered speech regardless of duration/silence."""
+        if self._buffer.total_len == 0 or self.mel.frames_written <= self._window_start:
+            return self.committed_text()
+
+        segments = self._decode_window()
+        return " ".join(self._committed + [segments_to_text(segments)]).strip()
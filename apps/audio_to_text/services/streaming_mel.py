@@ -0,0 +1,87 @@
+"""Incremental log-mel spectrogram for streaming audio.
+
+Only newly arrived samples are transformed: each push() computes the STFT
+frames that became complete since the previous call and appends their
+log-mel columns to a fixed-size ring of the most recent 30 s. A decode
+window is then a normalized slice of that ring, so the cost of a partial
+decode does not grow with the length of the utterance.
+"""
+from __future__ import annotations
+import numpy as np
+import torch
+import whisper
+from whisper.audio import HOP_LENGTH, N_FFT, N_FRAMES
+
+FRAMES_PER_SECOND = whisper.audio.SAMPLE_RATE // HOP_LENGTH  # 100
+LOG_FLOOR = -10.0  # log10 of the clamp used by whisper (what zero padding becomes)
+
+
+class IncrementalLogMel:
+    """Append-only log-mel frames over a ring of capacity_frames columns."""
+
+    def __init__(self, n_mels: int = 80, capacity_frames: int = N_FRAMES):
+        self.n_mels = n_mels
+        self.capacity = capacity_frames
+        self._filters = whisper.audio.mel_filters("cpu", n_mels)
+        self._window = torch.hann_window(N_FFT)
+        self._ring = torch.full((n_mels, capacity_frames), LOG_FLOOR)
+        # Unconsumed samples; never longer than N_FFT + one pushed chunk
+        self._pending: np.ndarray
+        self.frames_written: int
+        self.reset()
+
+    def reset(self):
+        self._ring.fill_(LOG_FLOOR)
+        # Half a window of leading zeros centers frame t on sample t * HOP_LENGTH,
+        # like the center=True STFT whisper uses.
+        self._pending = np.zeros(N_FFT // 2, dtype=np.float32)
+        self.frames_written = 0
+
+    def push(self, pcm: np.ndarray) -> int:
+        """
+        Add samples (float32, 16 kHz) and compute any newly complete frames.
+        Returns:
+            number of frames added
+        """
+        buf = np.concatenate((self._pending, pcm.astype(np.float32, copy=False)))
+        n = (buf.shape[0] - N_FFT) // HOP_LENGTH + 1 if buf.shape[0] >= N_FFT else 0
+        if n > 0:
+            frames = torch.from_numpy(buf).unfold(0, N_FFT, HOP_LENGTH)[:n] * self._window
+            magnitudes = torch.fft.rfft(frames, n=N_FFT).abs() ** 2
+            log_mel = torch.clamp(self._filters @ magnitudes.T, min=1e-10).log10()
+            self._write(log_mel)
+        self._pending = buf[n * HOP_LENGTH:].copy()
+        return n
+
+    def _write(self, log_mel: torch.Tensor):
+        n = log_mel.shape[1]
+        if n > self.capacity:
+            # Only the newest capacity columns can be kept
+            self.frames_written += n - self.capacity
+            log_mel, n = log_mel[:, -self.capacity:], self.capacity
+        start = self.frames_written % self.capacity
+        first = min(n, self.capacity - start)
+        self._ring[:, start:start + first] = log_mel[:, :first]
+        if first < n:
+            self._ring[:, :n - first] = log_mel[:, first:]
+        self.frames_written += n
+
+    @property
+    def oldest_frame(self) -> int:
+        """Absolute index of the oldest frame still held in the ring."""
+        return max(0, self.frames_written - self.capacity)
+
+    def window(self, start_frame: int) -> torch.Tensor:
+        """
+        Whisper-ready (n_mels, N_FRAMES) mel for frames from start_frame to now.
+        Missing frames are padded the way whisper pads short clips, and the
+        result is normalized per window like whisper.log_mel_spectrogram.
+        """
+        start_frame = max(start_frame, self.oldest_frame)
+        count = min(self.frames_written - start_frame, N_FRAMES)
+        out = torch.full((self.n_mels, N_FRAMES), LOG_FLOOR)
+        if count > 0:
+            idx = torch.arange(start_frame, start_frame + count) % self.capacity
+            out[:, :count] = self._ring.index_select(1, idx)
+        out = torch.maximum(out, out.max() - 8.0)
+        return (out + 4.0) / 4.0
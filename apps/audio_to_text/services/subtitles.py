@@ -0,0 +1,106 @@
+"""Subtitle and JSON export of timestamped transcripts.
+
+Every format is produced by a generator that yields one small chunk per
+segment, so a multi-hour transcript is written straight into the output
+buffer (or file) without assembling one giant intermediate string.
+"""
+from __future__ import annotations
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, TextIO
+from .audio_transcriber import TranscriptionResult
+from .long_form import TranscriptSegment
+
+FALLBACK_CUE_SECONDS = 10.0  # cue length when a result has neither segments nor a duration
+
+
+def format_timestamp(seconds: float, decimal_marker: str = ",", always_hours: bool = True) -> str:
+    """
+    Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm / MM:SS.mmm (WebVTT).
+    """
+    milliseconds = max(0, int(round(seconds * 1000.0)))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    prefix = f"{hours:02d}:" if always_hours or hours else ""
+    return f"{prefix}{minutes:02d}:{secs:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def result_segments(result: TranscriptionResult) -> List[TranscriptSegment]:
+    """Segments of a result, or one cue spanning the audio when none were kept."""
+    if result.segments:
+        return result.segments
+    if not result.text.strip():
+        return []
+    return [TranscriptSegment(0.0, result.duration or FALLBACK_CUE_SECONDS, result.text.strip())]
+
+
+def _cue_text(text: str) -> str:
+    # A blank line would end the cue early in both SRT and WebVTT
+    return "\n".join(line for line in text.strip().splitlines() if line.strip())
+
+
+def iter_srt(segments: Iterable[TranscriptSegment]) -> Iterator[str]:
+    """Yield SubRip cues one at a time."""
+    for index, seg in enumerate(segments, start=1):
+        yield f"{index}\n{format_timestamp(seg.start)} --> {format_timestamp(seg.end)}\n{_cue_text(seg.text)}\n\n"
+
+
+def iter_vtt(segments: Iterable[TranscriptSegment]) -> Iterator[str]:
+    """Yield a WebVTT header followed by one cue per segment."""
+    yield "WEBVTT\n\n"
+    for seg in segments:
+        start = format_timestamp(seg.start, ".", always_hours=False)
+        end = format_timestamp(seg.end, ".", always_hours=False)
+        # "-->" is not allowed inside WebVTT cue text
+        yield f"{start} --> {end}\n{_cue_text(seg.text).replace('-->', '->')}\n\n"
+
+
+def iter_json(result: TranscriptionResult) -> Iterator[str]:
+    """Yield a JSON document of the result, one segment per chunk."""
+    header = {"language": result.language, "text": result.text, "language_probs": result.language_probs,
+              "duration": result.duration}
+    yield json.dumps(header, ensure_ascii=False)[:-1] + ', "segments": ['
+    for index, seg in enumerate(result_segments(result)):
+        yield ("," if index else "") + "\n  " + json.dumps(
+            {"start": round(seg.start, 3), "end": round(seg.end, 3), "text": seg.text}, ensure_ascii=False)
+    yield "\n]}\n"
+
+
+def iter_text(result: TranscriptionResult) -> Iterator[str]:
+    """Yield the plain transcript, one segment per line."""
+    for seg in result_segments(result):
+        yield seg.text + "\n"
+
+
+class ExportFormat(NamedTuple):
+    build: Callable[[TranscriptionResult], Iterator[str]]
+    extension: str
+    mime: str
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "SRT": ExportFormat(lambda result: iter_srt(result_segments(result)), "srt", "application/x-subrip"),
+    "WebVTT": ExportFormat(lambda result: iter_vtt(result_segments(result)), "vtt", "text/vtt"),
+    "JSON": ExportFormat(iter_json, "json", "application/json"),
+    "Text": ExportFormat(iter_text, "txt", "text/plain"),
+}
+
+
+def write_export(result: TranscriptionResult, fmt: str, fp: TextIO):
+    """Stream an export format into a text file object."""
+    for chunk in EXPORT_FORMATS[fmt].build(result):
+        fp.write(chunk)
+
+
+def export_bytes(result: TranscriptionResult, fmt: str) -> bytes:
+    """
+    Encode an export format as UTF-8 bytes, chunk by chunk.
+    Args:
+        result: transcription with segments
+        fmt: one of EXPORT_FORMATS
+    """
+    buffer = io.BytesIO()
+    for chunk in EXPORT_FORMATS[fmt].build(result):
+        buffer.write(chunk.encode("utf-8"))
+    return buffer.getvalue()
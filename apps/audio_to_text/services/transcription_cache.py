@@ -0,0 +1,173 @@
+"""Content-addressed cache of transcription results.
+
+Results are keyed by a hash of the raw audio bytes plus the model and
+decoding options that produced them. A small in-memory LRU tier answers
+repeat Streamlit reruns; an on-disk JSON tier under the FileHelper resource
+root survives restarts and is trimmed oldest-first when it outgrows its
+size budget.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+from utils.file_helper import FileHelper
+from utils.metrics import record_cache_lookup
+from .audio_transcriber import TranscriptionResult
+
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get("GENAI_TRANSCRIPTION_CACHE_ENTRIES", "128"))
+DEFAULT_DISK_BYTES = int(os.environ.get("GENAI_TRANSCRIPTION_CACHE_MB", "256")) * 1024 * 1024
+CACHE_SUBDIR = "transcription_cache"
+
+
+def transcription_cache_key(audio: bytes, model_name: str, options: Optional[dict] = None) -> str:
+    """
+    Build a cache key from audio content, model name and decoding options.
+    Args:
+        audio: Raw audio file bytes (any buffer-protocol object)
+        model_name: Identifier of the model variant
+        options: Decoding options that change the output (language, ...)
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+    digest.update(memoryview(audio))
+    digest.update(b"\0" + model_name.encode("utf-8") + b"\0")
+    digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Two-tier (memory LRU + disk) cache of TranscriptionResult objects.
+    """
+
+    def __init__(self, cache_dir: Path, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, TranscriptionResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = sum(f.stat().st_size for f in self.cache_dir.glob("*/*.json"))
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _remember(self, key: str, result: TranscriptionResult):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[TranscriptionResult]:
+        """
+        Look up a result, promoting disk hits into the memory tier.
+        Returns:
+            TranscriptionResult or None on a miss
+        """
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup("transcription", "hit")
+                return result
+        path = self._path(key)
+        try:
+            result = TranscriptionResult.from_dict(json.loads(path.read_text(encoding="utf-8")))
+            os.utime(path)  # refresh recency for disk eviction
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            record_cache_lookup("transcription", "miss")
+            return None
+        with self._lock:
+            self._remember(key, result)
+            self.hits += 1
+        record_cache_lookup("transcription", "hit")
+        return result
+
+    def put(self, key: str, result: TranscriptionResult):
+        """
+        Store a result in both tiers and trim the disk tier if needed.
+        """
+        with self._lock:
+            self._remember(key, result)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps(result.to_dict(), ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        previous = path.stat().st_size if path.exists() else 0
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += len(payload) - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk_locked()
+
+    def _evict_disk_locked(self):
+        """Delete least recently used files until the tier is under 90% of its budget."""
+        files = []
+        for f in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = f.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, f))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, f in files:
+            if total <= target:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+        self._disk_bytes = total
+
+    def get_or_compute(self, key: str, compute: Callable[[], TranscriptionResult]) -> TranscriptionResult:
+        """
+        Return the cached result for key, running compute() and storing it on a miss.
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for f in self.cache_dir.glob("*/*.json"):
+                f.unlink(missing_ok=True)
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_cache: Optional[TranscriptionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Return the process-wide TranscriptionCache stored under the FileHelper resource root."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache_dir = FileHelper("audio_to_text").get_subdir(CACHE_SUBDIR)
+                _cache = TranscriptionCache(cache_dir)
+    return _cache
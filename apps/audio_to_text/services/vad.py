@@ -0,0 +1,118 @@
+"""Frame-level voice activity detection (VAD) for streaming audio.
+
+Audio is cut into short frames and classified in vectorized NumPy:
+short-time energy (dBFS) and zero-crossing rate per frame, with two energy
+thresholds for hysteresis. A frame starts speech only if it is loud and
+not noise-like (low ZCR); once in speech, frames stay speech until energy
+drops below the lower threshold. Trailing silence is tracked across calls
+so a segment is closed only after a sustained pause.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+FRAME_MS = 30
+START_DB = -30.0  # energy needed to enter speech
+STOP_DB = -40.0  # energy below which speech ends (hysteresis)
+MAX_START_ZCR = 0.45  # broadband hiss crosses zero too often to start speech
+MIN_SILENCE_SECONDS = 0.6  # trailing silence that closes a segment
+MIN_SPEECH_SECONDS = 0.25  # shorter bursts (clicks, bumps) are discarded
+
+
+@dataclass
+class VadChunk:
+    """Classification of the complete frames from one process() call."""
+    audio: np.ndarray  # samples of the classified frames (frame aligned)
+    speech: np.ndarray  # bool per frame
+    segment_start: Optional[int] = None  # frame index where a new segment opened
+    segment_end: bool = False  # a segment closed after enough trailing silence
+    discarded: bool = False  # the closed segment was too short to be speech
+
+
+class VoiceActivityDetector:
+    """Streaming VAD; feed arbitrary-length chunks, get per-frame decisions."""
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = FRAME_MS, start_db: float = START_DB,
+                 stop_db: float = STOP_DB, max_start_zcr: float = MAX_START_ZCR,
+                 min_silence_seconds: float = MIN_SILENCE_SECONDS,
+                 min_speech_seconds: float = MIN_SPEECH_SECONDS):
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.start_db = start_db
+        self.stop_db = stop_db
+        self.max_start_zcr = max_start_zcr
+        self.min_silence_frames = max(1, int(round(min_silence_seconds * 1000 / frame_ms)))
+        self.min_speech_frames = max(1, int(round(min_speech_seconds * 1000 / frame_ms)))
+        self.frame_seconds = frame_ms / 1000.0
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.in_speech = False  # state of the last classified frame
+        self.segment_open = False
+        self.segment_speech_frames = 0
+        self.trailing_silence_frames = 0
+
+    def trailing_silence_seconds(self) -> float:
+        return self.trailing_silence_frames * self.frame_seconds
+
+    def frame_features(self, frames: np.ndarray):
+        """Energy in dBFS and zero-crossing rate for each row of frames."""
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+        return energy_db, zcr
+
+    def classify(self, energy_db: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+        """Hysteresis decision for all frames at once.
+
+        A frame is speech if it is above STOP_DB and a start-worthy frame has
+        occurred since the last frame below STOP_DB (or speech carried over
+        from the previous chunk without such a drop).
+        """
+        idx = np.arange(energy_db.shape[0])
+        loud = (energy_db > self.start_db) & (zcr < self.max_start_zcr)
+        active = energy_db > self.stop_db
+        last_loud = np.maximum.accumulate(np.where(loud, idx, -1))
+        last_inactive = np.maximum.accumulate(np.where(active, -1, idx))
+        speech = active & (last_loud > last_inactive)
+        if self.in_speech:
+            speech |= active & (last_inactive < 0)
+        return speech
+
+    def process(self, pcm: np.ndarray) -> VadChunk:
+        """
+        Classify all complete frames available after appending pcm.
+        Leftover samples (less than one frame) wait for the next call.
+        """
+        buf = np.concatenate((self._pending, pcm.astype(np.float32, copy=False)))
+        n = buf.shape[0] // self.frame_len
+        self._pending = buf[n * self.frame_len:].copy()
+        if n == 0:
+            return VadChunk(audio=buf[:0], speech=np.zeros(0, dtype=bool))
+        audio = buf[:n * self.frame_len]
+        speech = self.classify(*self.frame_features(audio.reshape(n, self.frame_len)))
+        self.in_speech = bool(speech[-1])
+
+        chunk = VadChunk(audio=audio, speech=speech)
+        if not self.segment_open:
+            if not speech.any():
+                return chunk
+            chunk.segment_start = int(np.argmax(speech))
+            self.segment_open = True
+            self.segment_speech_frames = 0
+            speech_tail = speech[chunk.segment_start:]
+        else:
+            speech_tail = speech
+        self.segment_speech_frames += int(np.count_nonzero(speech_tail))
+
+        last_speech = np.flatnonzero(speech_tail)
+        if last_speech.size:
+            self.trailing_silence_frames = speech_tail.shape[0] - 1 - int(last_speech[-1])
+        else:
+            self.trailing_silence_frames += speech_tail.shape[0]
+        if self.trailing_silence_frames >= self.min_silence_frames:
+            chunk.segment_end = True
+            chunk.discarded = self.segment_speech_frames < self.min_speech_frames
+            self.segment_open = False
+        return chunk
@@ -2,10 +2,14 @@
 start.py
 Entry point for the Audio to Text Streamlit UI app.
 Handles all UI logic for audio upload and microphone transcription.
+
+Each tab is a fragment, so interacting with one tab reruns only that tab,
+and the tab UI objects are built once per process (st.cache_resource).
 """
 import streamlit as st
 from audio_to_text.ui.audio_upload_ui import AudioUploadTranscribeUI
 from audio_to_text.ui.microphone_ui import MicrophoneTranscribeUI
+from audio_to_text.services.audio_transcriber import DEFAULT_MODEL_NAME
 
 
 # ---------- Setup Functions ----------
@@ -19,11 +23,11 @@ def setup_audio_to_text_header():
 
 def setup_whisper_model():
     """
-    Initialize Whisper model once at app startup and store in session_state.
+    Make sure the shared Whisper model is loaded in the process-wide registry.
+    All sessions reuse the same instance instead of loading their own copy.
     """
     from audio_to_text.services.model_loader import ModelLoader
-    if "whisper_model" not in st.session_state:
-        st.session_state["whisper_model"] = ModelLoader("tiny").load()
+    ModelLoader(DEFAULT_MODEL_NAME).load()
 
 # ---------- App Initialization ----------
 
@@ -32,21 +36,45 @@ def initialize_audio_to_text_app():
     setup_whisper_model()
 
 # ---------- Main Application Logic ----------
+@st.cache_resource(show_spinner=False)
+def get_upload_ui() -> AudioUploadTranscribeUI:
+    """
+    Upload UI shared by all sessions of this process (it keeps no per-session
+    state), so reruns do not rebuild it or re-read the language map.
+    """
+    return AudioUploadTranscribeUI()
+
+
+@st.cache_resource(show_spinner=False)
+def get_microphone_ui() -> MicrophoneTranscribeUI:
+    """Microphone UI shared by all sessions of this process."""
+    return MicrophoneTranscribeUI()
+
+
+@st.fragment
+def upload_tab():
+    """Upload tab; its widgets rerun only this fragment."""
+    get_upload_ui().display()
+
+
+@st.fragment
+def microphone_tab():
+    """Microphone tab; its widgets rerun only this fragment."""
+    get_microphone_ui().display()
+
+
 def run_audio_to_text_ui():
     """
     Render tabbed UI for audio upload and microphone transcription.
     Creates two tabs: one for file upload, one for microphone input.
     """
-    upload_ui = AudioUploadTranscribeUI()  # UI for file upload
-    mic_ui = MicrophoneTranscribeUI()      # UI for microphone input
-
     tab_upload, tab_mic = st.tabs(["Upload Audio", "Microphone"])
 
     with tab_upload:
-        upload_ui.display()  # Show upload UI
+        upload_tab()  # Show upload UI
 
     with tab_mic:
-        mic_ui.display()     # Show microphone UI
+        microphone_tab()  # Show microphone UI
 
 # ---------- Entry Point for Import ----------
 
@@ -2,59 +2,113 @@
 # audio_upload_ui.py
 # UI and logic for handling audio file uploads and transcription in Streamlit app
 
-import tempfile
+from functools import lru_cache
 from pathlib import Path
 import json
+import time
 import streamlit as st
 from audio_to_text.ui.transcription_ui import TranscriptionResultUI
-from audio_to_text.services.audio_transcriber import AudioFileTranscriber
+from audio_to_text.services.audio_decoder import AudioTooLongError, spool_audio
+from audio_to_text.services.audio_transcriber import DEFAULT_MODEL_NAME
+from audio_to_text.services.batching import get_dynamic_batcher
+from audio_to_text.services.model_loader import ModelLoader
+from audio_to_text.services.transcription_cache import get_transcription_cache, transcription_cache_key
+from utils.job_queue import get_job_executor
+from utils.results_store import get_results_store, transcription_record
+from utils.job_queue_ui import run_in_background
+from utils.upload_spool import MAX_AUDIO_SECONDS, SpooledUpload, UploadTooLargeError
 
 
 class AudioUploadHandler:
     """
     Handles file save, transcription, and download logic for audio uploads.
-    - Loads Whisper model from session state
-    - Saves uploaded audio files to /tmp
-    - Runs transcription using Whisper
-    - Persists and writes transcript
+    - Uses the shared Whisper model from the process-wide registry
+    - Looks up results in the content-addressed transcription cache
+    - Spools uploads per request (size/duration limits checked before decoding)
+    - Runs transcription using Whisper directly on the uploaded bytes, on the
+      background job executor (one pool per model) so reruns never block on it
+    - Decodes through the model's dynamic batcher, so concurrent uploads share passes
+    - Persists the transcript and saves it in the results store (history and search)
     - Offers download button
     """
     def __init__(self):
-        # Whisper model is loaded in apps/main.py and stored in session_state
-        pass
+        # Whisper model is shared process-wide through the model registry
+        self.model_loader = ModelLoader(DEFAULT_MODEL_NAME)
+        self.batcher = get_dynamic_batcher(self.model_loader)
+        # Enough workers per model for concurrent jobs to fill a batch (no-op once the pool exists)
+        get_job_executor().configure_pool(self.job_pool, workers=self.batcher.max_batch_size)
 
-    def save_uploaded_file(self, uploaded):
+    def run_transcription(self, audio):
         """
-        Save uploaded audio file to /tmp path.
+        Run Whisper transcription on uploaded audio.
         Args:
-            uploaded: Uploaded file object from Streamlit
+            audio: Audio bytes, file-like buffer or path
         Returns:
-            Path to saved file or None
+            (lang, text): Detected language and transcription text
         """
-        if not uploaded:
-            return None
-        import os
-        # Use file extension or default to .wav
-        suffix = Path(uploaded.name).suffix or ".wav"
-        tmp_path = Path("/tmp") / f"upload_{os.getpid()}{suffix}"
-        with open(tmp_path, "wb") as tmp:
-            tmp.write(uploaded.read())
-        return tmp_path
+        result = self.run_transcription_detailed(audio)
+        return result.language, result.text
 
-    def run_transcription(self, tmp_path):
+    def run_transcription_detailed(self, audio, progress=None):
         """
-        Run Whisper transcription on saved file.
+        Run Whisper transcription on uploaded audio (decoded in memory), batched
+        with other sessions' requests.
         Args:
-            tmp_path: Path to audio file
+            audio: Audio bytes, file-like buffer or path
+            progress: Optional callback(fraction_done, partial_text)
         Returns:
-            (lang, text): Detected language and transcription text
+            TranscriptionResult with language, text and segments
+        Raises:
+            AudioTooLongError: if the audio is longer than GENAI_UPLOAD_MAX_SECONDS
+        """
+        return self.batcher.transcribe(audio, progress=progress, max_seconds=MAX_AUDIO_SECONDS)
+
+    @property
+    def job_pool(self) -> str:
+        """Job executor pool for this model."""
+        return self.model_id
+
+    @property
+    def model_id(self) -> str:
+        """Model identifier used in cache keys and stored results."""
+        return self.model_loader.key.model_id
+
+    def cache_key(self, data) -> str:
+        return transcription_cache_key(data, self.model_id)
+
+    def transcription_job(self, spool: SpooledUpload, key: str):
+        """
+        Build a job function that transcribes a spooled upload, reports partial
+        text, caches the result and saves it in the results store. The spool is
+        closed when the job ends, or freed with the closure if the job is never
+        submitted (another session queued one for key first).
+        """
+        def run(job):
+            started = time.perf_counter()
+            try:
+                result = self.run_transcription_detailed(spool.buffer(), progress=job.report)
+            finally:
+                spool.close()
+            get_transcription_cache().put(key, result)
+            self.store_result(spool.name, key, result, time.perf_counter() - started)
+            return result
+        return run
+
+    def transcribe_upload(self, uploaded):
+        """
+        Transcribe an upload, reusing the cached result when the same audio
+        was already transcribed by this model (e.g. on Streamlit reruns).
+        Args:
+            uploaded: Uploaded file object from Streamlit
+        Returns:
+            TranscriptionResult
         """
-        import os
-        assert os.path.exists(str(tmp_path)), f"Audio file not found: {tmp_path}"
-        model = st.session_state["whisper_model"]
-        transcriber = AudioFileTranscriber(audio_path=tmp_path, model=model)
-        lang, text = transcriber.transcribe()
-        return lang, text
+        key = self.cache_key(uploaded.getbuffer())
+
+        def compute():
+            with spool_audio(uploaded, MAX_AUDIO_SECONDS) as spool:
+                return self.run_transcription_detailed(spool.buffer())
+        return get_transcription_cache().get_or_compute(key, compute)
 
     def persist_last_transcript(self, text: str):
         """
@@ -64,18 +118,17 @@ class AudioUploadHandler:
         """
         st.session_state["last_upload_transcript"] = text
 
-    def write_transcription_to_file(self, text: str):
+    def store_result(self, source: str, key: str, result, elapsed=None):
         """
-        Write transcript using FileHelper in /tmp/resources/audio_to_text/transcriptions/upload_transcription.txt.
+        Save a transcript in the results store (one row per audio content and model).
         Args:
-            text: Transcription text
-        Returns:
-            Path to saved file (None, handled by FileHelper)
+            source: Uploaded file name
+            key: Transcription cache key of the audio
+            result: TranscriptionResult
+            elapsed: Transcription time in seconds
         """
-        file_helper = st.session_state.get("file_helper")
-        
-        if file_helper:
-            file_helper.write_text_file("transcriptions", "upload_transcription.txt", text)
+        get_results_store().add(**transcription_record(result, source=source, content_hash=key,
+                                                       model=self.model_id, elapsed=elapsed))
 
 
 class AudioUploadTranscribeUI:
@@ -92,9 +145,10 @@ class AudioUploadTranscribeUI:
         self.transcription_ui = TranscriptionResultUI(lang_map=self.language_map)
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def load_language_map():
         """
-        Load language code map from config file.
+        Load language code map from config file (read once per process).
         Returns:
             dict mapping language codes to names
         """
@@ -135,28 +189,49 @@ class AudioUploadTranscribeUI:
 
     def process_uploaded_file(self, uploaded):
         """
-        Handle uploaded file, run transcription, and render results.
+        Handle uploaded file: render a cached result right away, otherwise
+        transcribe in the background and poll until it is ready.
         Args:
             uploaded: Uploaded file object
         """
-        tmp_path = self.handler.save_uploaded_file(uploaded)
+        key = self.handler.cache_key(uploaded.getbuffer())
+        result = get_transcription_cache().get(key)
+        if result is None:
+            # Spooled only when a job is submitted, not on every rerun while it runs
+            result = run_in_background("upload", self.handler.job_pool, key,
+                                       lambda: self.spooled_job(uploaded, key), "Transcribing",
+                                       render_partial=st.caption)
+            if result is None:
+                return
+        self.render_transcription(result.language, result.text, uploaded.getvalue(), result=result)
+
+    def spooled_job(self, uploaded, key):
+        """
+        Spool an upload and build its transcription job.
+        Args:
+            uploaded: Uploaded file object
+            key: Transcription cache key of the audio
+        Returns:
+            Job function, or None if the upload was rejected (the error is rendered)
+        """
         try:
-            lang, text = self.handler.run_transcription(tmp_path)
-            self.render_transcription(lang, text, tmp_path)
-        finally:
-            # Clean up temp file
-            if tmp_path and tmp_path.exists():
-                tmp_path.unlink(missing_ok=True)
+            spool = spool_audio(uploaded, MAX_AUDIO_SECONDS)
+        except (UploadTooLargeError, AudioTooLongError) as e:
+            st.error(f"Cannot transcribe {uploaded.name}: {e}")
+            return None
+        return self.handler.transcription_job(spool, key)
 
-    def render_transcription(self, lang, text, audio_path=None):
+    def render_transcription(self, lang, text, audio_path=None, result=None):
         """
         Show transcription, audio playback, and export buttons.
         Args:
             lang: Detected language code
             text: Transcription text
-            audio_path: Path to audio file
+            audio_path: Path to audio file or raw audio bytes
+            result: TranscriptionResult with segments for subtitle export
         """
-        self.transcription_ui.render(lang, text, audio_path, transcription_label="Transcription")
+        self.transcription_ui.render(lang, text, audio_path, transcription_label="Transcription",
+                                     result=result)
 
     def save_and_offer_download(self, text):
         """
@@ -165,7 +240,6 @@ class AudioUploadTranscribeUI:
             text: Transcription text
         """
         self.handler.persist_last_transcript(text)
-        file_path = self.handler.write_transcription_to_file(text)
         st.download_button(
             label="Download Transcription",
             data=text,
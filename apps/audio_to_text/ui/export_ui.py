@@ -3,11 +3,15 @@
 """
 export_ui.py
 Export and download UI utilities for transcription app.
-Provides PDF, SRT, and text download via dropdown for Streamlit UI.
+Provides PDF, SRT, WebVTT, JSON and text download via dropdown for Streamlit UI.
+Subtitle/JSON exports are only built once the user picks a format, and the PDF
+only when requested (then memoised by text hash across reruns).
 """
 
-from fpdf import FPDF
+from typing import Optional
 import streamlit as st
+from audio_to_text.services.audio_transcriber import TranscriptionResult
+from audio_to_text.services.subtitles import EXPORT_FORMATS, export_bytes
 
 __all__ = ["ExportUI", "export_dropdown"]
 
@@ -21,20 +25,32 @@ def export_pdf_button(text: str, key: str = None):
     ExportUI(text, key=key).show_pdf_download()
 
 
+def export_dropdown(result: TranscriptionResult, key: str = None):
+    """
+    Show a format selector and a download button for the chosen export.
+    Args:
+        result: Transcription result with timestamped segments
+        key: Unique Streamlit widget key prefix
+    """
+    ExportUI(result.text, key=key, result=result).show_export_dropdown()
+
+
 class ExportUI:
     """
     Class-based export and download UI utilities for transcription app.
     Handles PDF export and download button rendering.
     """
 
-    def __init__(self, text: str, key: str = None):
+    def __init__(self, text: str, key: str = None, result: Optional[TranscriptionResult] = None):
         """
         Args:
             text: Transcription text to export
             key: Unique Streamlit widget key
+            result: Full transcription result (segments are used for subtitle exports)
         """
         self.text = text
         self.key = key or "pdf_download"
+        self.result = result or TranscriptionResult(language="", text=text)
 
     def get_pdf_lines(self) -> list:
         """
@@ -50,8 +66,14 @@ class ExportUI:
     def show_pdf_download(self):
         """
         Render a download button for PDF export in Streamlit UI.
+        The PDF is built only after "Prepare PDF" is clicked (or if an identical
+        transcript was rendered before), not on every rerun.
         """
-        pdf_bytes = self.generate_pdf_bytes()
+        from audio_to_text.services.pdf_export import has_pdf  # fpdf is only imported when exporting
+        if not has_pdf(self.text) and not st.button("Prepare PDF", key=f"{self.key}_prepare"):
+            return
+        with st.spinner("Rendering PDF..."):
+            pdf_bytes = self.generate_pdf_bytes()
         st.download_button(
             "Download PDF",
             data=pdf_bytes,
@@ -60,35 +82,36 @@ class ExportUI:
             key=self.key
         )
 
-    # SRT, text, and dropdown export logic can be added here if needed
+    def show_export_dropdown(self):
+        """
+        Render a format selector; the export is generated only for the picked format.
+        """
+        choice = st.selectbox("Export as", ["Choose a format..."] + list(EXPORT_FORMATS),
+                              key=f"{self.key}_format")
+        fmt = EXPORT_FORMATS.get(choice)
+        if fmt is None:
+            return
+        st.download_button(
+            f"Download {choice}",
+            data=export_bytes(self.result, choice),
+            file_name=f"transcription.{fmt.extension}",
+            mime=fmt.mime,
+            key=f"{self.key}_{fmt.extension}"
+        )
 
     def generate_pdf_bytes(self) -> bytes:
         """
-        Always generate a non-empty PDF using built-in font and ASCII fallback.
+        Generate a non-empty PDF in a Unicode font (memoised by text hash).
         Returns:
             PDF file bytes
         """
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        lines = self.get_pdf_lines()
-        # Fallback: replace non-ASCII with '?'
-        safe_lines = []
-        for line in lines:
-            try:
-                safe_lines.append(line.encode("ascii", "replace").decode("ascii"))
-            except Exception:
-                safe_lines.append("(No transcription)")
-        for line in safe_lines:
-            pdf.multi_cell(0, 10, txt=line)
-        pdf_bytes = pdf.output(dest="S").encode("latin-1")
-        return pdf_bytes
+        from audio_to_text.services.pdf_export import get_pdf_bytes
+        return get_pdf_bytes(self.text)
 
     def transcription_to_srt(self) -> str:
         """
-        Convert plain text transcription to minimal SRT format.
+        Convert the transcription to SRT with one cue per timestamped segment.
         Returns:
             SRT formatted string
         """
-        # Minimal SRT: one block, no timestamps
-        return "1\n00:00:00,000 --> 00:00:10,000\n" + self.text + "\n"
+        return export_bytes(self.result, "SRT").decode("utf-8")
@@ -2,29 +2,39 @@
 # microphone_ui.py
 # UI and logic for handling microphone input and transcription in Streamlit app
 
-import tempfile
-from pathlib import Path
+import time
 import streamlit as st
 from audio_to_text.ui.transcription_ui import TranscriptionResultUI
-from audio_to_text.services.audio_transcriber import AudioFileTranscriber
-from audio_to_text.services.speech_transcriber import SpeechTranscriber
+from audio_to_text.services.audio_decoder import AudioTooLongError, spool_audio
+from audio_to_text.services.audio_transcriber import DEFAULT_MODEL_NAME
+from audio_to_text.services.batching import get_dynamic_batcher
+from audio_to_text.services.model_loader import ModelLoader
+from audio_to_text.services.transcription_cache import get_transcription_cache, transcription_cache_key
+from utils.job_queue import get_job_executor
+from utils.results_store import get_results_store, transcription_record
+from utils.job_queue_ui import run_in_background
+from utils.upload_spool import MAX_AUDIO_SECONDS, UploadTooLargeError
 
 
 class MicrophoneTranscribeUI:
     """
     Handles microphone input (single-shot recording and future streaming).
-    - Loads Whisper and speech transcriber models from session state
-    - Records and saves audio clips
-    - Runs transcription using Whisper
-    - Persists and writes transcript
+    - Uses the shared Whisper model from the process-wide registry
+    - Looks up results in the content-addressed transcription cache
+    - Records audio clips, spools them per request (same size/duration limits as
+      uploads) and transcribes them on the background job executor so reruns
+      never block on the model
+    - Decodes through the model's dynamic batcher, shared with uploads and other sessions
+    - Persists the transcript and saves it in the results store (history and search)
     - Offers download/export options
     """
 
     def __init__(self):
-        # Load speech transcriber if not already in session
-        if "speech_transcriber" not in st.session_state:
-            st.session_state["speech_transcriber"] = SpeechTranscriber(model_name="tiny")
-        # Whisper model is loaded in apps/main.py and stored in session_state
+        # Shared by all sessions (cached per process): per-session state lives in st.session_state
+        self.model_loader = ModelLoader(DEFAULT_MODEL_NAME)
+        self.batcher = get_dynamic_batcher(self.model_loader)
+        self.job_pool = self.model_loader.key.model_id
+        get_job_executor().configure_pool(self.job_pool, workers=self.batcher.max_batch_size)
         self.transcription_ui = TranscriptionResultUI()
 
     def audio_recorder(self):
@@ -35,63 +45,95 @@ class MicrophoneTranscribeUI:
         """
         return st.audio_input("Record speech")
 
-    def save_clip(self, clip):
+    def transcribe_clip(self, audio):
         """
-        Save recorded audio clip to temp path.
+        Run Whisper transcription on a recorded clip.
         Args:
-            clip: Recorded audio file object
+            audio: Clip bytes or file-like buffer
         Returns:
-            Path to saved file or None
+            (lang, text): Detected language and transcription text
         """
-        if not clip:
-            return None
-        suffix = self.determine_suffix(clip)
-        data = clip.read()  # read once
-        return self.write_temp_file(data, suffix)
+        if not audio:
+            return None, ""
+        result = self.transcribe_clip_detailed(audio)
+        return result.language, result.text
 
-    def determine_suffix(self, clip) -> str:
+    def transcribe_clip_detailed(self, audio, progress=None):
         """
-        Infer file suffix from mime type; default to .wav
+        Run Whisper transcription on a recorded clip, decoded in memory and batched
+        with other sessions' requests.
         Args:
-            clip: Recorded audio file object
+            audio: Clip bytes or file-like buffer
+            progress: Optional callback(fraction_done, partial_text)
         Returns:
-            File extension string
+            TranscriptionResult with language, text and segments
+        Raises:
+            AudioTooLongError: if the clip is longer than GENAI_UPLOAD_MAX_SECONDS
         """
-        suffix = ".wav"
-        ctype = getattr(clip, "type", None) or ""
-        if "mpeg" in ctype:
-            suffix = ".mp3"
-        elif "ogg" in ctype:
-            suffix = ".ogg"
-        return suffix
+        return self.batcher.transcribe(audio, progress=progress, max_seconds=MAX_AUDIO_SECONDS)
+
+    @property
+    def model_id(self) -> str:
+        """Model identifier used in cache keys and stored results."""
+        return self.model_loader.key.model_id
+
+    def cache_key(self, data) -> str:
+        return transcription_cache_key(data, self.model_id)
 
-    def write_temp_file(self, data: bytes, suffix: str) -> Path:
+    def transcribe_in_background(self, clip):
         """
-        Write bytes to a temp file and return its Path.
+        Return the cached result for a clip, or spool it and submit it to the job executor.
         Args:
-            data: Audio data bytes
-            suffix: File extension
+            clip: Recorded audio file object
         Returns:
-            Path to temp file
-        """
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(data)
-            return Path(tmp.name)
-
-    def transcribe_clip(self, path: Path):
-        """
-        Run Whisper transcription on saved clip.
+            TranscriptionResult, or None while the job is queued/running or the
+            clip was rejected (status is rendered)
+        """
+        key = self.cache_key(clip.getbuffer())
+        result = get_transcription_cache().get(key)
+        if result is not None:
+            return result
+
+        def make_job():
+            # Spooled only when a job is submitted, not on every rerun while it runs
+            try:
+                spool = spool_audio(clip, MAX_AUDIO_SECONDS)
+            except (UploadTooLargeError, AudioTooLongError) as e:
+                st.error(f"Cannot transcribe the recording: {e}")
+                return None
+
+            def run(job):
+                started = time.perf_counter()
+                try:
+                    transcribed = self.transcribe_clip_detailed(spool.buffer(), progress=job.report)
+                finally:
+                    spool.close()
+                get_transcription_cache().put(key, transcribed)
+                get_results_store().add(**transcription_record(
+                    transcribed, source=spool.name or "microphone", content_hash=key, model=self.model_id,
+                    elapsed=time.perf_counter() - started))
+                return transcribed
+            return run
+        return run_in_background("mic", self.job_pool, key, make_job, "Transcribing",
+                                 render_partial=st.caption)
+
+    def transcribe_cached(self, clip):
+        """
+        Transcribe a clip, reusing the cached result for identical audio
+        so Streamlit reruns do not hit the model again.
         Args:
-            path: Path to audio file
+            clip: Recorded audio file object
         Returns:
-            (lang, text): Detected language and transcription text
+            TranscriptionResult or None if the clip is empty
         """
-        if not path:
-            return None, ""
-        model = st.session_state["whisper_model"]
-        transcriber = AudioFileTranscriber(audio_path=path, model=model)
-        lang, text = transcriber.transcribe()
-        return lang, text
+        if not clip.size:
+            return None
+        key = self.cache_key(clip.getbuffer())
+
+        def compute():
+            with spool_audio(clip, MAX_AUDIO_SECONDS) as spool:
+                return self.transcribe_clip_detailed(spool.buffer())
+        return get_transcription_cache().get_or_compute(key, compute)
 
     def display_single_shot(self):
         """
@@ -114,36 +156,30 @@ class MicrophoneTranscribeUI:
 
     def process_clip(self, clip):
         """
-        Handle clip saving, transcription, and render results.
+        Handle clip transcription and render results.
         Args:
             clip: Recorded audio file object
         """
-        path = self.save_clip(clip)
-        if not path:
-            st.error("Failed to save recording.")
+        if not clip.size:
+            st.error("Recording is empty.")
             return
-        try:
-            lang, text = self.transcribe_clip(path)
-            self.render_transcription(lang, text, audio_path=path)
-        finally:
-            # Clean up temp file
-            if path.exists():
-                path.unlink(missing_ok=True)
+        result = self.transcribe_in_background(clip)
+        if result is None:
+            return
+        self.render_transcription(result.language, result.text, audio_path=clip.getvalue(), result=result)
 
-    def render_transcription(self, lang: str, text: str, audio_path=None):
+    def render_transcription(self, lang: str, text: str, audio_path=None, result=None):
         """
         Show transcription, audio playback, and export buttons.
         Args:
             lang: Detected language code
             text: Transcription text
-            audio_path: Path to audio file
+            audio_path: Path to audio file or raw audio bytes
+            result: TranscriptionResult with segments for subtitle export
         """
         self.persist_last_transcript(text)
-        # Use FileHelper from session state to save transcription
-        file_helper = st.session_state.get("image_file_helper")
-        if file_helper:
-            file_helper.write_text_file("transcriptions", "microphone_transcription.txt", text)
-        self.transcription_ui.render(lang, text, audio_path, transcription_label="Microphone Transcription")
+        self.transcription_ui.render(lang, text, audio_path, transcription_label="Microphone Transcription",
+                                     result=result)
 
     def persist_last_transcript(self, text: str):
         """
@@ -153,8 +189,6 @@ class MicrophoneTranscribeUI:
         """
         st.session_state["last_mic_transcript"] = text
 
-    # Removed manual file writing; handled by FileHelper
-
     def display(self):
         """
         Entry point for microphone tab UI.
@@ -6,7 +6,7 @@ Used by both audio upload and microphone transcription UIs.
 """
 
 import streamlit as st
-from audio_to_text.ui.export_ui import export_pdf_button
+from audio_to_text.ui.export_ui import export_dropdown, export_pdf_button
 
 
 class TranscriptionResultUI:
@@ -22,23 +22,27 @@ class TranscriptionResultUI:
         """
         self.lang_map = lang_map or {}
 
-    def render(self, lang, text, audio_path=None, transcription_label="Transcription"):
+    def render(self, lang, text, audio_path=None, transcription_label="Transcription", result=None):
         """
         Display detected language, transcription, audio playback, and export options.
         Args:
             lang: language code
             text: transcription text
-            audio_path: path to audio file (optional)
+            audio_path: path to audio file or raw audio bytes (optional)
             transcription_label: label for transcription box
+            result: TranscriptionResult with segments, enables SRT/WebVTT/JSON export (optional)
         """
         # Map language code to full name if available
         lang_full = self.lang_map.get(lang, lang) if self.lang_map else lang
         st.success(f"Detected language: {lang_full}")
         st.text_area(transcription_label, value=text, height=180)
 
-        # Show audio playback if file provided
+        # Show audio playback if file or bytes provided
         if audio_path:
-            st.audio(str(audio_path), format="audio/wav")
+            audio = audio_path if isinstance(audio_path, (bytes, bytearray)) else str(audio_path)
+            st.audio(audio, format="audio/wav")
         # Use a unique key for each context to avoid Streamlit key errors
         key = "mic_pdf_download" if "Microphone" in transcription_label else "audio_pdf_download"
         export_pdf_button(text, key=key)
+        if result is not None:
+            export_dropdown(result, key=key.replace("pdf_download", "export"))
@@ -0,0 +1,122 @@
+"""
+backend_bench.py
+Compare inference backends for Whisper transcription and image captioning
+
+For every backend the model is loaded fresh (bypassing the shared registry),
+warmed up once and then timed over several runs. Transcripts are scored by
+word error rate against --reference (or the default backend's transcript),
+captions by word agreement with the default backend's caption.
+
+Usage (from the apps directory):
+    python -m benchmarks.backend_bench --audio audio_to_text/sample_files/first.wav --model tiny \
+        --image image_to_text/sample_files/self_worth.png --threads 4
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import List, Optional
+from audio_to_text.services.audio_decoder import load_audio_source
+from audio_to_text.services.audio_transcriber import AudioFileTranscriber, DEFAULT_AUDIO_PATH, DEFAULT_MODEL_NAME
+from audio_to_text.services.model_loader import ModelLoader
+from utils.inference_backend import BACKENDS, configure_threads
+from utils.model_registry import get_model_registry
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def time_runs(fn, runs: int):
+    """Run fn once to warm up, then time it; returns (last result, per-run seconds)."""
+    result = fn()
+    timings: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+
+def bench_whisper(args, backends: List[str]):
+    audio = load_audio_source(args.audio)
+    duration = audio.shape[-1] / 16000
+    reference: Optional[str] = args.reference.read_text(encoding="utf-8") if args.reference else None
+    print(f"\nWhisper '{args.model}' on {args.audio} ({duration:.1f}s of audio)")
+    print(f"{'backend':<13}{'load s':>8}{'mean s':>9}{'min s':>8}{'x realtime':>12}{'WER':>7}")
+    for backend in backends:
+        loader = ModelLoader(args.model, device="cpu", backend=backend)
+        started = time.perf_counter()
+        model = loader.load_uncached()
+        load_seconds = time.perf_counter() - started
+        transcriber = AudioFileTranscriber(audio_path=args.audio, model=model)
+        result, timings = time_runs(lambda: transcriber.transcribe_audio(audio, language=args.language), args.runs)
+        if reference is None:
+            reference = result.text  # the first backend (default) is the baseline
+        mean = statistics.mean(timings)
+        print(f"{backend:<13}{load_seconds:>8.2f}{mean:>9.3f}{min(timings):>8.3f}{duration / mean:>12.1f}"
+              f"{word_error_rate(reference, result.text):>7.3f}")
+        del model, transcriber
+
+
+def bench_captioning(args, backends: List[str]):
+    from image_to_text.services.image_caption_service import ImageCaptionService
+    from image_to_text.services.model_loader import CAPTION_BACKENDS, CaptionModelLoader
+
+    print(f"\nCaptioning '{args.caption_model}' on {args.image}")
+    print(f"{'backend':<13}{'load s':>8}{'mean s':>9}{'min s':>8}{'word diff':>11}  caption")
+    baseline = None
+    for backend in [b for b in backends if b in CAPTION_BACKENDS]:
+        loader = CaptionModelLoader(args.caption_model, device="cpu", backend=backend)
+        started = time.perf_counter()
+        loader.load()
+        load_seconds = time.perf_counter() - started
+        service = ImageCaptionService(loader)  # no cache: every run reaches the model
+        img = service.load_image(str(args.image))
+        caption, timings = time_runs(lambda: service.generate_caption(img), args.runs)
+        baseline = baseline if baseline is not None else caption
+        print(f"{backend:<13}{load_seconds:>8.2f}{statistics.mean(timings):>9.3f}{min(timings):>8.3f}"
+              f"{word_error_rate(baseline, caption):>11.3f}  {caption}")
+        del service
+        get_model_registry().evict(loader.key)  # one backend in memory at a time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference backend latency/accuracy benchmark (CPU)")
+    parser.add_argument("--audio", type=Path, default=DEFAULT_AUDIO_PATH, help="Audio file to transcribe")
+    parser.add_argument("--reference", type=Path, default=None,
+                        help="Reference transcript; defaults to the default backend's output")
+    parser.add_argument("--model", type=str, default=DEFAULT_MODEL_NAME, help="Whisper model variant")
+    parser.add_argument("--language", type=str, default=None, help="Force a language code")
+    parser.add_argument("--image", type=Path, default=None, help="Image to caption (skipped when omitted)")
+    parser.add_argument("--caption-model", type=str, default=None, help="HuggingFace image-to-text model")
+    parser.add_argument("--backends", type=str, default=",".join(BACKENDS), help="Comma-separated backends")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per backend (after one warm-up)")
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads for all runs")
+    args = parser.parse_args()
+
+    configure_threads(args.threads)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "default" in backends:
+        backends.remove("default")
+        backends.insert(0, "default")  # baseline first
+    bench_whisper(args, backends)
+    if args.image:
+        if args.caption_model is None:
+            from image_to_text.services.model_loader import DEFAULT_CAPTION_MODEL
+            args.caption_model = DEFAULT_CAPTION_MODEL
+        bench_captioning(args, backends)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+common.py
+Shared helpers for the benchmarks: timing runs, latency percentiles, peak RSS,
+JSON results and run-to-run comparison.
+"""
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+
+@dataclass
+class StageResult:
+    """Latency and throughput of one benchmark stage."""
+    runs: int
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    min_ms: float
+    throughput: float  # work units per second at the mean latency
+    unit: str
+    peak_rss_mb: float  # process peak after the stage (cumulative)
+    samples_ms: List[float] = field(default_factory=list)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def time_stage(fn: Callable[[], object], repeats: int, work: float = 1.0, unit: str = "runs",
+               warmup: int = 1) -> StageResult:
+    """
+    Run fn warmup times untimed, then repeats times timed.
+    Args:
+        fn: Zero-argument callable doing one unit of the stage
+        repeats: Timed runs
+        work: Amount of work per run (e.g. seconds of audio) for the throughput figure
+        unit: Name of the work unit (throughput is reported as unit/s)
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    values = np.array(samples)
+    mean = float(values.mean())
+    return StageResult(runs=len(samples), p50_ms=float(np.percentile(values, 50)),
+                       p95_ms=float(np.percentile(values, 95)), mean_ms=mean, min_ms=float(values.min()),
+                       throughput=work / (mean / 1000.0) if mean else 0.0, unit=unit,
+                       peak_rss_mb=peak_rss_mb(), samples_ms=[round(v, 3) for v in samples])
+
+
+def environment() -> Dict[str, str]:
+    """Versions and host details recorded with every result file."""
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()}
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = str(torch.get_num_threads())
+    except ImportError:
+        pass
+    try:
+        info["git_commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                            text=True, cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        pass
+    return info
+
+
+def save_results(path: Path, stages: Dict[str, StageResult], config: dict):
+    payload = {"schema": SCHEMA_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "environment": environment(), "config": config,
+               "stages": {name: asdict(result) for name, result in stages.items()}}
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def load_results(path: Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare_results(baseline: dict, candidate: dict, threshold_pct: float,
+                    metric: str = "p50_ms") -> Tuple[List[Tuple[str, Optional[float], Optional[float], float]], List[str]]:
+    """
+    Compare a latency metric stage by stage.
+    Returns:
+        (rows, regressions): rows of (stage, baseline, candidate, change %) and
+        the stages whose metric got slower by more than threshold_pct
+    """
+    rows, regressions = [], []
+    base_stages, new_stages = baseline["stages"], candidate["stages"]
+    for name in list(dict.fromkeys([*base_stages, *new_stages])):
+        before = base_stages.get(name, {}).get(metric)
+        after = new_stages.get(name, {}).get(metric)
+        change = (after - before) / before * 100.0 if before and after is not None else float("nan")
+        rows.append((name, before, after, change))
+        if change == change and change > threshold_pct:  # NaN-safe
+            regressions.append(name)
+    return rows, regressions
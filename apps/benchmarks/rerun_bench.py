@@ -0,0 +1,131 @@
+"""
+rerun_bench.py
+Streamlit rerun-cost benchmark
+
+Runs the app headless with Streamlit's AppTest and times script reruns, i.e.
+what one widget interaction costs the server:
+    rerun_full          the whole page (main.py): what every click paid before
+                        the panes became fragments
+    rerun_image_pane    the Image to Text pane alone (what a click in it pays now)
+    rerun_audio_pane    the Audio to Text pane alone, both tabs included
+    rerun_upload_tab    the Upload Audio tab alone
+    rerun_mic_tab       the Microphone tab alone
+Every scenario is loaded once (models loaded eagerly and warm) and then rerun
+--repeats times. With --image-url the image pane shows a captioned image, so
+its reruns include loading the image and the caption cache lookup. Scenarios
+whose entry point does not exist in the checked-out tree are skipped.
+
+Results use the suite's JSON format, so runs before and after a change can be
+compared with benchmarks.suite.
+
+Usage (from the apps directory):
+    python -m benchmarks.rerun_bench --repeats 20 --output rerun.json
+    python -m benchmarks.rerun_bench --image-url https://example.com/cat.jpg --output rerun.json
+    python -m benchmarks.suite compare rerun_before.json rerun.json
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+from benchmarks.common import StageResult, save_results, time_stage
+
+MAIN_SCRIPT = Path(__file__).resolve().parent.parent / "main.py"
+IMAGE_URL_LABEL = "Or paste an image URL"
+
+
+# AppTest runs the body of these functions as a script: keep them self-contained.
+def image_pane_script():
+    from image_to_text.start import main
+    main()
+
+
+def audio_pane_script():
+    from audio_to_text.start import main
+    main()
+
+
+def upload_tab_script():
+    from audio_to_text.start import upload_tab
+    upload_tab()
+
+
+def mic_tab_script():
+    from audio_to_text.start import microphone_tab
+    microphone_tab()
+
+
+SCENARIOS: Dict[str, Union[Path, Callable[[], None]]] = {
+    "rerun_full": MAIN_SCRIPT,
+    "rerun_image_pane": image_pane_script,
+    "rerun_audio_pane": audio_pane_script,
+    "rerun_upload_tab": upload_tab_script,
+    "rerun_mic_tab": mic_tab_script,
+}
+
+
+def rerun(app):
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+
+def show_image(app, url: str, timeout: float):
+    """Enter the image URL and rerun until the caption is shown (the job runs in the background)."""
+    inputs = [widget for widget in app.text_input if widget.label == IMAGE_URL_LABEL]
+    if not inputs:
+        return
+    inputs[0].input(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        rerun(app)
+        if any(str(message.value).startswith("Caption:") for message in app.success):
+            return
+        time.sleep(0.5)
+    raise RuntimeError(f"no caption for {url} after {timeout:.0f}s")
+
+
+def load_scenario(script, timeout: float, image_url: Optional[str]):
+    from streamlit.testing.v1 import AppTest
+    if isinstance(script, Path):
+        app = AppTest.from_file(str(script), default_timeout=timeout)
+    else:
+        app = AppTest.from_function(script, default_timeout=timeout)
+    rerun(app)  # first run loads the models and builds the cached UI objects
+    if image_url:
+        show_image(app, image_url, timeout)
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Streamlit rerun-cost benchmark")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed reruns per scenario")
+    parser.add_argument("--image-url", type=str, default=None, help="Image shown in the image pane while rerunning")
+    parser.add_argument("--scenarios", type=str, default=None, help="Comma-separated subset of scenarios")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds allowed for the first run")
+    parser.add_argument("--output", type=Path, default=Path("rerun_results.json"), help="JSON results file")
+    args = parser.parse_args(argv)
+
+    # Load models on the first run instead of rendering "warming up" placeholders
+    os.environ.setdefault("GENAI_STARTUP_MODE", "eager")
+    selected = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    results: Dict[str, StageResult] = {}
+    print(f"{'scenario':<20}{'p50 ms':>11}{'p95 ms':>11}{'mean ms':>11}")
+    for name in selected:
+        try:
+            app = load_scenario(SCENARIOS[name], args.timeout, args.image_url)
+            result = time_stage(lambda: rerun(app), args.repeats, unit="reruns", warmup=1)
+        except Exception as e:
+            print(f"{name:<20}skipped: {e}")
+            continue
+        results[name] = result
+        print(f"{name:<20}{result.p50_ms:>11.2f}{result.p95_ms:>11.2f}{result.mean_ms:>11.2f}", flush=True)
+    save_results(args.output, results, {key: str(value) if isinstance(value, Path) else value
+                                        for key, value in vars(args).items()})
+    print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+resample_bench.py
+Compare the old np.interp frame resampling with the streaming polyphase resampler
+
+Usage (from the apps directory):
+    python -m benchmarks.resample_bench --rate 48000 --frame-ms 20
+"""
+import argparse
+import time
+import numpy as np
+from audio_to_text.services.resampler import StreamingResampler
+
+TARGET_RATE = 16000
+
+
+def interp_frame(pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+    """The per-frame linear interpolation SpeechTranscriber used before the polyphase resampler."""
+    duration = pcm.shape[0] / sample_rate
+    target_len = int(duration * TARGET_RATE)
+    x_old = np.linspace(0, duration, num=pcm.shape[0], endpoint=False)
+    x_new = np.linspace(0, duration, num=target_len, endpoint=False)
+    return np.interp(x_new, x_old, pcm).astype(np.float32)
+
+
+def run_frames(fn, signal: np.ndarray, frame_len: int):
+    """Feed signal frame by frame; return (output, mean microseconds per frame)."""
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, signal.shape[0] - frame_len + 1, frame_len):
+        outputs.append(np.array(fn(signal[i:i + frame_len])))
+    elapsed = time.perf_counter() - start
+    return np.concatenate(outputs), elapsed / max(1, len(outputs)) * 1e6
+
+
+def tone(freq: float, rate: int, seconds: float) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def rms_db(x: np.ndarray) -> float:
+    return 10.0 * np.log10(np.mean(x.astype(np.float64) ** 2) + 1e-20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resampler latency and aliasing benchmark")
+    parser.add_argument("--rate", type=int, default=48000, help="Input sample rate")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Frame size of the simulated capture")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of the test signal")
+    parser.add_argument("--alias-freq", type=float, default=12000.0,
+                        help="Test tone above the 8 kHz output Nyquist; ideally removed entirely")
+    args = parser.parse_args()
+
+    frame_len = args.rate * args.frame_ms // 1000
+    speech_band = tone(440.0, args.rate, args.seconds)
+    above_nyquist = tone(args.alias_freq, args.rate, args.seconds)
+
+    print(f"{args.rate} Hz -> {TARGET_RATE} Hz, {args.frame_ms} ms frames ({frame_len} samples)")
+    print(f"{'method':<12}{'us/frame':>10}{'x realtime':>12}{'alias dB':>10}")
+    for name in ("interp", "polyphase"):
+        def make():
+            if name == "interp":
+                return lambda pcm: interp_frame(pcm, args.rate)
+            return StreamingResampler(args.rate, TARGET_RATE).process
+
+        _, per_frame_us = run_frames(make(), speech_band, frame_len)
+        aliased, _ = run_frames(make(), above_nyquist, frame_len)
+        # Energy that folded back into the output band, relative to the input tone
+        alias_db = rms_db(aliased[TARGET_RATE:]) - rms_db(above_nyquist)
+        realtime = args.frame_ms * 1000 / per_frame_us
+        print(f"{name:<12}{per_frame_us:>10.1f}{realtime:>12.0f}{alias_db:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
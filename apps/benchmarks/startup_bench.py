@@ -0,0 +1,150 @@
+"""
+startup_bench.py
+Cold-start and time-to-first-result benchmark
+
+Every scenario runs in a fresh interpreter (so imports, weight loading and
+lazy kernel initialization are really cold) and reports its stage timings:
+    import     heavy imports of the app (torch, whisper / transformers)
+    load       model weights into the shared registry
+    warmup     dummy inference (1 s of silence / a blank 224x224 caption)
+    first      first real request
+    second     the same request again (steady state)
+"cold" skips warm-up, so its first request pays for kernel initialization;
+"warm" runs warm-up first, as the UI and API now do in the background.
+The page-shell row is what the first Streamlit render has to import in lazy mode.
+
+Usage (from the apps directory):
+    python -m benchmarks.startup_bench --audio audio_to_text/sample_files/first.wav --model tiny \
+        --image image_to_text/sample_files/self_worth.png --repeats 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+STAGES = ("import", "load", "warmup", "first", "second")
+
+
+def timed(timings: Dict[str, float], stage: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    timings[stage] = time.perf_counter() - started
+    return result
+
+
+def child_shell() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    timed(timings, "import", lambda: __import__("main"))  # main.py imports only the page shell
+    return timings
+
+
+def child_whisper(args, warm: bool) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+
+    def imports():
+        from audio_to_text.services import batching, model_loader
+        return batching, model_loader
+
+    batching, model_loader = timed(timings, "import", imports)
+    loader = model_loader.ModelLoader(args.model)
+    timed(timings, "load", loader.load)
+    if warm:
+        timed(timings, "warmup", lambda: model_loader.warm_up(args.model))
+    data = Path(args.audio).read_bytes()
+    batcher = batching.get_dynamic_batcher(loader)
+    timed(timings, "first", lambda: batcher.transcribe(data))
+    timed(timings, "second", lambda: batcher.transcribe(data))
+    return timings
+
+
+def child_caption(args, warm: bool) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+
+    def imports():
+        import transformers  # noqa: F401 - the loader defers it; count it here
+        from image_to_text.services import image_caption_service, model_loader
+        return image_caption_service, model_loader
+
+    service_module, model_loader = timed(timings, "import", imports)
+    loader = model_loader.CaptionModelLoader()
+    timed(timings, "load", loader.load)
+    if warm:
+        timed(timings, "warmup", model_loader.warm_up)
+    service = service_module.ImageCaptionService(loader)  # no cache: every run reaches the model
+    data = Path(args.image).read_bytes()
+    timed(timings, "first", lambda: service.generate_caption(service.load_image_from_bytes(data)))
+    timed(timings, "second", lambda: service.generate_caption(service.load_image_from_bytes(data)))
+    return timings
+
+
+def run_child(args, scenario: str) -> Dict[str, float]:
+    """Run one scenario in a fresh interpreter and return its stage timings."""
+    command = [sys.executable, "-m", "benchmarks.startup_bench", "--child", scenario,
+               "--audio", str(args.audio), "--model", args.model]
+    if args.image:
+        command += ["--image", str(args.image)]
+    if args.threads:
+        command += ["--threads", str(args.threads)]
+    started = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=Path(__file__).parent.parent)
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else scenario)
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings["process"] = wall  # includes interpreter start-up
+    return timings
+
+
+def report(name: str, runs: List[Dict[str, float]]):
+    def median(stage):
+        values = [run[stage] for run in runs if stage in run]
+        return f"{statistics.median(values):>8.2f}" if values else f"{'-':>8}"
+
+    to_first = [sum(run.get(s, 0.0) for s in ("import", "load", "warmup", "first")) for run in runs]
+    print(f"{name:<16}" + "".join(median(s) for s in STAGES)
+          + f"{statistics.median(to_first):>10.2f}{median('process')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start / time-to-first-result benchmark")
+    parser.add_argument("--audio", type=Path, default=Path("audio_to_text/sample_files/first.wav"))
+    parser.add_argument("--model", type=str, default="tiny", help="Whisper model variant")
+    parser.add_argument("--image", type=Path, default=None, help="Image to caption (skipped when omitted)")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per scenario (median shown)")
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads in every child")
+    parser.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.threads:
+            from utils.inference_backend import configure_threads
+            configure_threads(args.threads)
+        kind, _, mode = args.child.partition(":")
+        if kind == "shell":
+            timings = child_shell()
+        elif kind == "whisper":
+            timings = child_whisper(args, warm=mode == "warm")
+        else:
+            timings = child_caption(args, warm=mode == "warm")
+        print(json.dumps(timings))
+        return
+
+    scenarios = ["shell", "whisper:cold", "whisper:warm"]
+    if args.image:
+        scenarios += ["caption:cold", "caption:warm"]
+    print(f"{'scenario (s)':<16}" + "".join(f"{s:>8}" for s in STAGES) + f"{'to first':>10}{'process':>8}")
+    for scenario in scenarios:
+        try:
+            runs = [run_child(args, scenario) for _ in range(max(1, args.repeats))]
+        except RuntimeError as e:
+            print(f"{scenario:<16}skipped: {e}")
+            continue
+        report(scenario, runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+suite.py
+Reproducible benchmark suite for the audio and image inference paths
+
+Times each stage separately on the sample files plus synthetic long audio
+(first.wav tiled to --long-seconds with seeded noise):
+    load_whisper, decode_wav, resample, mel, mel_long, encode, language_detection,
+    decode, transcribe, transcribe_long, stream, load_caption, caption_preprocess,
+    caption, pdf_export
+Each stage gets one untimed warm-up run and --repeats timed runs; results
+(p50/p95/mean latency, throughput, peak RSS) are written as JSON. Seeds and
+thread counts are fixed so runs on the same machine are comparable.
+
+Usage (from the apps directory):
+    python -m benchmarks.suite run --model tiny --threads 4 --output baseline.json
+    python -m benchmarks.suite run --stages transcribe,decode --output candidate.json
+    python -m benchmarks.suite compare baseline.json candidate.json --threshold 10
+compare exits with status 1 when any stage's p50 got slower by more than the threshold (%).
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from benchmarks.common import StageResult, compare_results, load_results, peak_rss_mb, save_results, time_stage
+
+SAMPLE_AUDIO = Path("audio_to_text/sample_files/first.wav")
+SAMPLE_IMAGE = Path("image_to_text/sample_files/self_worth.png")
+CAPTURE_RATE = 44100  # rate the resample stage converts from
+STREAM_RATE = 48000  # WebRTC capture rate fed to the streaming transcriber
+STREAM_FRAME_MS = 20
+STREAM_DECODE_MS = 500  # partial decode cadence, as a live client would poll
+PDF_WORDS = 40000
+SEED = 0
+
+
+def synthetic_long_audio(clip: np.ndarray, seconds: float) -> np.ndarray:
+    """first.wav repeated to the requested length with low seeded noise (16 kHz)."""
+    total = int(seconds * 16000)
+    audio = np.resize(clip, total).astype(np.float32)
+    audio += np.random.default_rng(SEED).normal(0.0, 0.003, total).astype(np.float32)
+    return audio
+
+
+def synthetic_transcript(words: int) -> str:
+    """Deterministic transcript-like text with some non-Latin words, ~12 words per line."""
+    vocabulary = ("the model transcribes audio into text and every segment keeps its timestamp "
+                  "café naïve über Привет ελληνικά 日本語 résumé").split()
+    picks = np.random.default_rng(SEED).integers(0, len(vocabulary), words)
+    tokens = [vocabulary[i] for i in picks]
+    return "\n".join(" ".join(tokens[i:i + 12]) for i in range(0, words, 12))
+
+
+class Suite:
+    """Collects stage results; stages are skipped when not selected."""
+
+    def __init__(self, args):
+        self.args = args
+        self.selected = set(args.stages.split(",")) if args.stages else None
+        self.results: Dict[str, StageResult] = {}
+
+    def wants(self, *stages: str) -> bool:
+        return self.selected is None or any(stage in self.selected for stage in stages)
+
+    def stage(self, name: str, fn: Callable[[], object], work: float = 1.0, unit: str = "runs",
+              repeats: Optional[int] = None, warmup: int = 1):
+        if not self.wants(name):
+            return
+        result = time_stage(fn, repeats or self.args.repeats, work=work, unit=unit, warmup=warmup)
+        self.results[name] = result
+        print(f"{name:<20}{result.p50_ms:>11.2f}{result.p95_ms:>11.2f}{result.throughput:>12.2f} "
+              f"{result.unit + '/s':<12}{result.peak_rss_mb:>9.0f}", flush=True)
+
+    # ---------- Audio ----------
+
+    def run_audio(self):
+        import whisper
+        from audio_to_text.services.audio_decoder import load_audio_source
+        from audio_to_text.services.audio_transcriber import AudioFileTranscriber
+        from audio_to_text.services.decoding import (
+            decode_features, decoding_options, detect_language_from_features, encode)
+        from audio_to_text.services.long_form import windowed_log_mel
+        from audio_to_text.services.model_loader import ModelLoader
+        from audio_to_text.services.resampler import resample
+        from audio_to_text.services.speech_transcriber import SpeechTranscriber
+        from utils.model_registry import get_model_registry
+
+        args = self.args
+        loader = ModelLoader(args.model, device="cpu", backend=args.backend)
+        loaded = {}
+
+        def load():
+            loaded["model"] = loader.load_uncached()
+        self.stage("load_whisper", load, unit="loads", repeats=args.load_repeats, warmup=0)
+        # Register the instance so SpeechTranscriber (which goes through the registry) shares it
+        model = get_model_registry().get(
+            loader.key, lambda: loaded["model"] if "model" in loaded else loader.load_uncached())
+
+        clip = load_audio_source(args.audio)
+        clip_seconds = clip.shape[-1] / 16000
+        long_audio = synthetic_long_audio(clip, args.long_seconds)
+        self.stage("decode_wav", lambda: load_audio_source(args.audio), clip_seconds, "audio_s")
+
+        if self.wants("resample"):
+            captured = resample(long_audio, 16000, CAPTURE_RATE)
+            self.stage("resample", lambda: resample(captured, CAPTURE_RATE, 16000), args.long_seconds, "audio_s")
+
+        n_mels = model.dims.n_mels
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels=n_mels)
+        self.stage("mel", lambda: whisper.log_mel_spectrogram(whisper.pad_or_trim(clip), n_mels=n_mels),
+                   clip_seconds, "audio_s")
+        self.stage("mel_long", lambda: windowed_log_mel(long_audio, n_mels=n_mels), args.long_seconds, "audio_s")
+
+        features = encode(model, mel)
+        language = args.language or detect_language_from_features(model, features)[0][0]
+        self.stage("encode", lambda: encode(model, mel), 1, "windows")
+        self.stage("language_detection", lambda: detect_language_from_features(model, features), 1, "windows")
+        options = decoding_options(model, language=language)
+        self.stage("decode", lambda: decode_features(model, features, options), 1, "windows")
+
+        transcriber = AudioFileTranscriber(audio_path=args.audio, model=model)
+        self.stage("transcribe", lambda: transcriber.transcribe_audio(clip, language=args.language),
+                   clip_seconds, "audio_s")
+        self.stage("transcribe_long", lambda: transcriber.transcribe_audio(long_audio, language=args.language),
+                   args.long_seconds, "audio_s", repeats=args.long_repeats)
+
+        if self.wants("stream"):
+            captured = resample(clip, 16000, STREAM_RATE)
+            frame = STREAM_RATE * STREAM_FRAME_MS // 1000
+            decode_every = STREAM_DECODE_MS // STREAM_FRAME_MS
+
+            def stream():
+                stt = SpeechTranscriber(model_name=loader.model_name)
+                for index, start in enumerate(range(0, captured.shape[0], frame)):
+                    stt.add_frame(captured[start:start + frame], STREAM_RATE)
+                    if index % decode_every == decode_every - 1:
+                        stt.maybe_partial_decode()
+                        stt.finalize_if_complete()
+                stt.force_decode()
+            self.stage("stream", stream, clip_seconds, "audio_s")
+
+    # ---------- Image ----------
+
+    def run_image(self):
+        try:
+            import transformers  # noqa: F401
+        except ImportError:
+            print("caption stages skipped: transformers is not installed")
+            return
+        from image_to_text.services.image_caption_service import ImageCaptionService
+        from image_to_text.services.model_loader import CaptionModelLoader
+        from utils.model_registry import get_model_registry
+
+        args = self.args
+        loader = CaptionModelLoader(args.caption_model, device="cpu") if args.caption_model \
+            else CaptionModelLoader(device="cpu")
+        loaded = {}
+
+        def load():
+            loaded["captioner"] = loader.load_uncached()
+        self.stage("load_caption", load, unit="loads", repeats=args.load_repeats, warmup=0)
+        # Register the instance so the service (which leases through the registry) shares it
+        get_model_registry().get(
+            loader.key, lambda: loaded["captioner"] if "captioner" in loaded else loader.load_uncached())
+        loaded.clear()
+        service = ImageCaptionService(loader)  # no cache: every run reaches the model
+        data = Path(args.image).read_bytes()
+        self.stage("caption_preprocess", lambda: service.load_image(data), 1, "images")
+        img = service.load_image(data)
+        self.stage("caption", lambda: service.generate_caption(img), 1, "images")
+
+    # ---------- Export ----------
+
+    def run_export(self):
+        if not self.wants("pdf_export"):
+            return
+        from audio_to_text.services.pdf_export import render_pdf
+        text = synthetic_transcript(PDF_WORDS)
+        self.stage("pdf_export", lambda: render_pdf(text), len(text) / 1000.0, "kchars")
+
+
+def run(args) -> int:
+    import torch
+    from utils.inference_backend import configure_threads
+    np.random.seed(SEED)
+    torch.manual_seed(SEED)
+    configure_threads(args.threads)
+
+    suite = Suite(args)
+    print(f"{'stage':<20}{'p50 ms':>11}{'p95 ms':>11}{'throughput':>12} {'':<12}{'peak MB':>9}")
+    if not args.skip_audio:
+        suite.run_audio()
+    if not args.skip_image:
+        suite.run_image()
+    suite.run_export()
+    config = {key: str(value) if isinstance(value, Path) else value
+              for key, value in vars(args).items() if key != "func"}
+    save_results(args.output, suite.results, config)
+    print(f"peak RSS {peak_rss_mb():.0f} MB; results written to {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    rows, regressions = compare_results(load_results(args.baseline), load_results(args.candidate),
+                                        args.threshold, metric=args.metric)
+    print(f"{'stage':<20}{'baseline':>11}{'candidate':>11}{'change':>9}   ({args.metric})")
+    for name, before, after, change in rows:
+        fmt = lambda v: f"{v:>11.2f}" if v is not None else f"{'-':>11}"
+        flag = "  REGRESSION" if name in regressions else ""
+        change_text = f"{change:>+8.1f}%" if change == change else f"{'-':>9}"
+        print(f"{name:<20}{fmt(before)}{fmt(after)}{change_text}{flag}")
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the {args.threshold:g}% threshold: {', '.join(regressions)}")
+        return 1
+    print(f"no stage slower than the {args.threshold:g}% threshold")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Audio/image inference benchmark suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmark stages and save JSON results")
+    run_parser.add_argument("--audio", type=Path, default=SAMPLE_AUDIO, help="Audio clip")
+    run_parser.add_argument("--image", type=Path, default=SAMPLE_IMAGE, help="Image to caption")
+    run_parser.add_argument("--model", type=str, default="tiny", help="Whisper model variant")
+    run_parser.add_argument("--backend", type=str, default="default", help="Inference backend for Whisper")
+    run_parser.add_argument("--caption-model", type=str, default=None, help="HuggingFace image-to-text model")
+    run_parser.add_argument("--language", type=str, default=None, help="Force a language (skips detection)")
+    run_parser.add_argument("--long-seconds", type=float, default=120.0, help="Length of the synthetic long audio")
+    run_parser.add_argument("--repeats", type=int, default=5, help="Timed runs per stage")
+    run_parser.add_argument("--long-repeats", type=int, default=2, help="Timed runs of transcribe_long")
+    run_parser.add_argument("--load-repeats", type=int, default=1, help="Timed model loads")
+    run_parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads")
+    run_parser.add_argument("--stages", type=str, default=None, help="Comma-separated subset of stages")
+    run_parser.add_argument("--skip-audio", action="store_true", help="Skip the Whisper stages")
+    run_parser.add_argument("--skip-image", action="store_true", help="Skip the captioning stages")
+    run_parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"), help="JSON results file")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("candidate", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    compare_parser.add_argument("--metric", type=str, default="p50_ms", choices=("p50_ms", "p95_ms", "mean_ms"))
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Command-line interface for batch image captioning.
+
+Usage (from the apps directory):
+    python -m image_to_text.cli.cli --input-dir catalog/ --glob "**/*.jpg" --output captions.jsonl
+    python -m image_to_text.cli.cli --manifest images.txt --output captions.jsonl --batch-size 16
+
+The caption model is loaded once, captions are appended to the JSONL file
+as each batch finishes, and images already captioned in the output file are
+skipped so an interrupted run can be resumed. Add --profile to print
+per-stage timings (load, preprocess, generate) and cache counters at the end,
+and --store to also bulk-insert the captions into the results store
+(/tmp/resources/results/results.sqlite3), searchable from the UI.
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Iterator, List, Set
+from image_to_text.services.caption_cache import get_caption_cache
+from image_to_text.services.image_caption_service import DEFAULT_CAPTION_BATCH_SIZE, ImageCaptionService
+from image_to_text.services.model_loader import CAPTION_BACKENDS, DEFAULT_CAPTION_MODEL, CaptionModelLoader
+from utils.metrics import FORMATS, get_metrics, set_metrics_enabled
+from utils.results_store import BULK_CHUNK, CAPTION, get_results_store
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Batch image captioning")
+    parser.add_argument("--input-dir", type=Path, default=None, help="Caption every image under this directory")
+    parser.add_argument("--glob", type=str, default="*", help="Glob pattern inside --input-dir (e.g. '**/*.jpg')")
+    parser.add_argument("--manifest", type=Path, default=None, help="Text file listing one image path or URL per line")
+    parser.add_argument("--output", type=Path, default=Path("captions.jsonl"), help="JSONL file results are appended to")
+    parser.add_argument("--model", type=str, default=DEFAULT_CAPTION_MODEL, help="HuggingFace image-to-text model")
+    parser.add_argument("--device", type=str, default=None, help="Torch device (cpu/cuda)")
+    parser.add_argument("--backend", type=str, default=None, choices=CAPTION_BACKENDS,
+                        help="Inference backend: default or int8 (CPU dynamic quantization)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_CAPTION_BATCH_SIZE, help="Images per forward pass")
+    parser.add_argument("--workers", type=int, default=None, help="Threads used to load and decode images")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the shared caption cache")
+    parser.add_argument("--store", action="store_true", help="Also save captions in the searchable results store")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings and counters at the end")
+    parser.add_argument("--profile-format", type=str, default="table", choices=FORMATS, help="Output format of --profile")
+    args = parser.parse_args()
+    if not (args.input_dir or args.manifest):
+        parser.error("one of --input-dir or --manifest is required")
+    return args
+
+
+def iter_input_images(args: argparse.Namespace) -> Iterator[str]:
+    """Yield image paths from --input-dir/--glob and/or paths or URLs from --manifest."""
+    if args.input_dir:
+        for path in sorted(args.input_dir.glob(args.glob)):
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                yield str(path)
+    if args.manifest:
+        with open(args.manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+
+
+def load_completed(output: Path) -> Set[str]:
+    """Images already captioned successfully in a previous run of the same output file."""
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # truncated last line from an interrupted run
+            if "error" not in record:
+                done.add(record["image"])
+    return done
+
+
+def main():
+    args = parse_args()
+    if args.profile:
+        set_metrics_enabled(True)
+    completed = load_completed(args.output)
+    images: List[str] = [image for image in iter_input_images(args) if image not in completed]
+    print(f"{len(images)} images to caption ({len(completed)} already in {args.output})")
+    if not images:
+        return
+
+    loader = CaptionModelLoader(args.model, device=args.device, backend=args.backend)
+    cache = None if args.no_cache else get_caption_cache()
+    service = ImageCaptionService(loader, cache=cache, model_id=loader.key.model_id)
+    store = get_results_store() if args.store else None
+    pending: List[dict] = []
+    started = time.perf_counter()
+    n_ok = n_failed = 0
+    with open(args.output, "a", encoding="utf-8") as out:
+        for image, caption, image_hash in service.iter_captions_with_hashes(images, batch_size=args.batch_size,
+                                                                            workers=args.workers):
+            if isinstance(caption, Exception):
+                n_failed += 1
+                record = {"image": image, "error": str(caption)}
+            else:
+                n_ok += 1
+                record = {"image": image, "caption": caption}
+                if store is not None:
+                    # Keyed by the hash taken while loading (files and URLs alike), like the UI
+                    pending.append(dict(kind=CAPTION, text=caption, source=image, content_hash=image_hash,
+                                        model=service.model_id))
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if len(pending) >= BULK_CHUNK:
+                store.add_many(pending)
+                pending = []
+    if pending:
+        store.add_many(pending)
+
+    elapsed = time.perf_counter() - started
+    print(f"Captioned {n_ok} images ({n_failed} failed) in {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {n_ok / elapsed:.2f} images/s")
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Caption cache: {stats['hits']} hits, {stats['perceptual_hits']} near-duplicate hits, "
+              f"{stats['misses']} misses")
+    if args.profile:
+        print("--- Profile ---")
+        print(get_metrics().render(args.profile_format))
+
+
+if __name__ == "__main__":
+    main()
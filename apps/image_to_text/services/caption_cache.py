@@ -0,0 +1,247 @@
+"""Caption cache keyed by image content.
+
+Captions are looked up first by a SHA-256 of the encoded image bytes (exact
+hit), then optionally by a 64-bit difference hash (dHash) so resized or
+re-encoded copies of the same picture also hit. A small in-memory LRU
+answers Streamlit reruns; a SQLite store under the FileHelper resource root
+survives restarts and is trimmed least-recently-used first.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from PIL import Image
+from utils.file_helper import FileHelper
+from utils.metrics import record_cache_lookup
+
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get("GENAI_CAPTION_CACHE_ENTRIES", "256"))
+DEFAULT_DISK_ENTRIES = int(os.environ.get("GENAI_CAPTION_CACHE_DISK_ENTRIES", "100000"))
+# Max differing dHash bits for a near-duplicate hit; negative disables perceptual lookup
+DEFAULT_MAX_DISTANCE = int(os.environ.get("GENAI_CAPTION_CACHE_PHASH_DISTANCE", "4"))
+CACHE_SUBDIR = "caption_cache"
+SOURCE_HASH_KEY = "source_sha256"  # img.info entry set when the image is loaded from bytes
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def content_hash(data) -> str:
+    """SHA-256 hex digest of encoded image bytes (any buffer-protocol object)."""
+    return hashlib.sha256(memoryview(data)).hexdigest()
+
+
+def image_content_key(img: Image.Image) -> str:
+    """
+    Exact cache key for an image: the hash of its source bytes when known,
+    otherwise a hash of the decoded pixels.
+    """
+    source_hash = img.info.get(SOURCE_HASH_KEY)
+    if source_hash:
+        return source_hash
+    digest = hashlib.sha256(f"{img.mode}:{img.size}".encode("ascii"))
+    digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def perceptual_hash(img: Image.Image, size: int = 8) -> int:
+    """
+    64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale
+    thumbnail. Robust to resizing and recompression.
+    Returns:
+        hash as a signed 64-bit integer (the SQLite INTEGER range)
+    """
+    small = np.asarray(img.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">i8")[0])
+
+
+def hamming_distances(hashes: np.ndarray, target: int) -> np.ndarray:
+    """Bit distance between target and every entry of an int64 hash array."""
+    diff = np.bitwise_xor(hashes, np.int64(target))
+    return _POPCOUNT[diff.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class CaptionCache:
+    """
+    Two-tier (memory LRU + SQLite) cache of captions per model.
+    """
+
+    def __init__(self, db_path: Path, max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 max_disk_entries: int = DEFAULT_DISK_ENTRIES, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.db_path = Path(db_path)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_distance = max_distance
+        self._memory: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        # Per-model (content hashes, dHash array with spare capacity) for near-duplicate search
+        self._phash_index: Dict[str, Tuple[list, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS captions ("
+            " content_hash TEXT NOT NULL, model TEXT NOT NULL, phash INTEGER, caption TEXT NOT NULL,"
+            " last_used REAL NOT NULL, PRIMARY KEY (content_hash, model))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS captions_last_used ON captions (last_used)")
+        self._conn.commit()
+        # Row count kept in step with inserts and evictions, so put() never scans the table
+        (self._disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM captions").fetchone()
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+
+    @property
+    def perceptual(self) -> bool:
+        return self.max_distance >= 0
+
+    def _remember(self, key: Tuple[str, str], caption: str):
+        self._memory[key] = caption
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _index_locked(self, model: str) -> Tuple[list, np.ndarray]:
+        index = self._phash_index.get(model)
+        if index is None:
+            rows = self._conn.execute(
+                "SELECT content_hash, phash FROM captions WHERE model = ? AND phash IS NOT NULL", (model,)).fetchall()
+            hashes = np.zeros(max(64, 2 * len(rows)), dtype=np.int64)
+            hashes[:len(rows)] = [r[1] for r in rows]
+            index = ([r[0] for r in rows], hashes)
+            self._phash_index[model] = index
+        return index
+
+    def _nearest_locked(self, model: str, phash: int) -> Optional[str]:
+        keys, hashes = self._index_locked(model)
+        if not keys:
+            return None
+        distances = hamming_distances(hashes[:len(keys)], phash)
+        best = int(np.argmin(distances))
+        return keys[best] if distances[best] <= self.max_distance else None
+
+    def get(self, key: str, model: str, phash: Optional[int] = None) -> Optional[str]:
+        """
+        Look up a caption by exact content hash, then by perceptual hash.
+        Args:
+            key: content hash of the image
+            model: identifier of the captioning model
+            phash: dHash of the image, enables near-duplicate lookup
+        Returns:
+            caption or None on a miss
+        """
+        with self._lock:
+            caption = self._memory.get((key, model))
+            if caption is not None:
+                self._memory.move_to_end((key, model))
+                self.hits += 1
+                record_cache_lookup("caption", "hit")
+                return caption
+            lookup_key = key
+            row = self._conn.execute("SELECT caption FROM captions WHERE content_hash = ? AND model = ?",
+                                     (key, model)).fetchone()
+            # Flat images hash to all-zero/all-one bits and would all match each other
+            if row is None and phash not in (None, 0, -1) and self.perceptual:
+                lookup_key = self._nearest_locked(model, phash)
+                if lookup_key is not None:
+                    row = self._conn.execute("SELECT caption FROM captions WHERE content_hash = ? AND model = ?",
+                                             (lookup_key, model)).fetchone()
+            if row is None:
+                self.misses += 1
+                record_cache_lookup("caption", "miss")
+                return None
+            self._conn.execute("UPDATE captions SET last_used = ? WHERE content_hash = ? AND model = ?",
+                               (time.time(), lookup_key, model))
+            self._conn.commit()
+            if lookup_key == key:
+                self.hits += 1
+                record_cache_lookup("caption", "hit")
+            else:
+                self.perceptual_hits += 1
+                record_cache_lookup("caption", "near_hit")
+            self._remember((key, model), row[0])
+            return row[0]
+
+    def put(self, key: str, model: str, caption: str, phash: Optional[int] = None):
+        """
+        Store a caption in both tiers and trim the SQLite store if needed.
+        """
+        with self._lock:
+            self._remember((key, model), caption)
+            now = time.time()
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO captions (content_hash, model, phash, caption, last_used)"
+                " VALUES (?, ?, ?, ?, ?)", (key, model, phash, caption, now)).rowcount
+            if not inserted:
+                self._conn.execute("UPDATE captions SET phash = ?, caption = ?, last_used = ?"
+                                   " WHERE content_hash = ? AND model = ?", (phash, caption, now, key, model))
+            self._conn.commit()
+            self._disk_entries += inserted
+            index = self._phash_index.get(model)
+            if inserted and index is not None and phash is not None:
+                keys, hashes = index
+                if len(keys) == hashes.shape[0]:
+                    # Grow geometrically so bulk inserts stay amortised O(1)
+                    hashes = np.concatenate((hashes, np.zeros_like(hashes)))
+                    self._phash_index[model] = (keys, hashes)
+                hashes[len(keys)] = phash
+                keys.append(key)
+            if self._disk_entries > self.max_disk_entries:
+                self._evict_disk_locked()
+
+    def _evict_disk_locked(self):
+        """Delete least recently used rows until the store is under 90% of its budget."""
+        excess = self._disk_entries - int(self.max_disk_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM captions WHERE rowid IN (SELECT rowid FROM captions ORDER BY last_used LIMIT ?)", (excess,))
+        self._conn.commit()
+        # Recount here (rarely) to pick up rows written by other processes sharing the file
+        (self._disk_entries,) = self._conn.execute("SELECT COUNT(*) FROM captions").fetchone()
+        self._phash_index.clear()  # rebuilt lazily from the remaining rows
+
+    def get_or_compute(self, key: str, model: str, compute: Callable[[], str], phash: Optional[int] = None) -> str:
+        """
+        Return the cached caption, running compute() and storing it on a miss.
+        """
+        caption = self.get(key, model, phash)
+        if caption is None:
+            caption = compute()
+            self.put(key, model, caption, phash)
+        return caption
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._phash_index.clear()
+            self._conn.execute("DELETE FROM captions")
+            self._conn.commit()
+            self._disk_entries = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "perceptual_hits": self.perceptual_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_entries,
+            }
+
+
+_cache: Optional[CaptionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_caption_cache() -> CaptionCache:
+    """Return the process-wide CaptionCache stored under the FileHelper resource root."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache_dir = FileHelper("image_to_text").get_subdir(CACHE_SUBDIR)
+                _cache = CaptionCache(cache_dir / "captions.sqlite3")
+    return _cache
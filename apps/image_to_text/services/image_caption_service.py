@@ -1,26 +1,229 @@
 """
 image_caption_service.py
 Service class for image loading and caption generation.
+Batches of images are decoded on a thread pool while the pipeline captions
+the previous batch, and each batch goes through the model in one forward pass.
+Images are decoded at reduced scale and downscaled to the model input size
+up front (see image_preprocessor), so the pipeline never sees full-size photos.
+When a CaptionCache is given, images seen before (or near-duplicates of
+them) are answered from the cache and never reach the model.
+Loading, preprocessing and generation are timed as "caption" stages in
+utils.metrics.
 """
+from __future__ import annotations
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Deque, Iterable, Iterator, List, Optional, Tuple, Union
 from PIL import Image
-import requests
-from io import BytesIO
+import torch
+from utils.metrics import count_requests, record_batch, request_timer, stage_timer
+from .caption_cache import SOURCE_HASH_KEY, CaptionCache, content_hash, image_content_key, perceptual_hash
+from .image_fetcher import ImageFetcher, get_image_fetcher
+from .image_preprocessor import downscale, model_input_size, open_image
+from .model_loader import CaptionModelLoader
+
+ImageSource = Union[Image.Image, str, Path, bytes, BinaryIO]
+DEFAULT_CAPTION_BATCH_SIZE = 8
+PHASH_KEY = "dhash"  # img.info entry caching the perceptual hash
 
 
 class ImageCaptionService:
-    def __init__(self, model):
-        self.model = model
+    def __init__(self, loader: CaptionModelLoader, cache: Optional[CaptionCache] = None,
+                 model_id: Optional[str] = None, fetcher: Optional[ImageFetcher] = None):
+        """
+        Args:
+            loader: CaptionModelLoader; the shared pipeline is leased per inference
+                batch, so the registry can evict it between requests
+            cache: optional CaptionCache
+            model_id: cache/store identifier (defaults to the loader's full model variant)
+            fetcher: ImageFetcher for URL sources
+        """
+        self.loader = loader
+        self.cache = cache
+        self.fetcher = fetcher or get_image_fetcher()
+        with loader.lease() as pipeline:
+            self.input_size = model_input_size(pipeline)
+        self.model_id = model_id or loader.key.model_id
+
+    def load_image_from_bytes(self, data, min_side: Optional[int] = None) -> Image.Image:
+        """
+        Decode encoded image bytes as upright RGB, remembering their hash for the caption cache.
+        Args:
+            data: encoded image bytes
+            min_side: shorter side needed by the caller (defaults to the model input size)
+        """
+        img = open_image(data, min_side or self.input_size)
+        img.info[SOURCE_HASH_KEY] = content_hash(data)
+        return img
 
-    def load_image_from_file(self, image_file):
+    def load_image_from_file(self, image_file, min_side: Optional[int] = None):
         """Load image from uploaded file."""
-        return Image.open(image_file)
+        if isinstance(image_file, (str, Path)):
+            return self.load_image_from_bytes(Path(image_file).read_bytes(), min_side)
+        if hasattr(image_file, "getvalue"):
+            return self.load_image_from_bytes(image_file.getvalue(), min_side)
+        return self.load_image_from_bytes(image_file.read(), min_side)
 
-    def load_image_from_url(self, url: str):
-        """Load image from a URL."""
-        response = requests.get(url)
-        return Image.open(BytesIO(response.content))
+    def load_image_from_url(self, url: str, min_side: Optional[int] = None):
+        """Load image from a URL (pooled, size-capped and with timeouts; raises ImageFetchError)."""
+        return self.load_image_from_bytes(self.fetcher.fetch(url), min_side)
 
-    def generate_caption(self, img):
-        """Generate caption for the given image using the model."""
-        result = self.model(img)
+    def load_image(self, source: ImageSource) -> Image.Image:
+        """
+        Load, decode and downscale an image for the model (safe to call from worker threads).
+        Args:
+            source: PIL image, path, http(s) URL, raw bytes or file-like object
+        Returns:
+            RGB PIL image with its shorter side at the model input size
+        """
+        with stage_timer("caption", "load"):
+            if isinstance(source, Image.Image):
+                img = source
+            elif isinstance(source, str) and source.startswith(("http://", "https://")):
+                img = self.load_image_from_url(source)
+            elif isinstance(source, (bytes, bytearray)):
+                img = self.load_image_from_bytes(source)
+            else:
+                img = self.load_image_from_file(source)
+        img = self.prepare_image(img)
+        if self.cache is not None and self.cache.perceptual:
+            with stage_timer("caption", "phash"):
+                img.info[PHASH_KEY] = perceptual_hash(img)  # computed here, on the worker thread
+        return img
+
+    def prepare_image(self, img: Image.Image) -> Image.Image:
+        """RGB image shrunk to the model input size; already prepared images pass through."""
+        with stage_timer("caption", "preprocess"):
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            return downscale(img, self.input_size)
+
+    def _cache_keys(self, img: Image.Image) -> Tuple[str, Optional[int]]:
+        phash = None
+        if self.cache.perceptual:
+            phash = img.info.get(PHASH_KEY)
+            if phash is None:
+                phash = perceptual_hash(img)
+        return image_content_key(img), phash
+
+    @torch.inference_mode()
+    def _run_model(self, img) -> str:
+        with self.loader.lease() as pipeline, stage_timer("caption", "generate"):
+            result = pipeline(img)
         return result[0]["generated_text"] if result and "generated_text" in result[0] else ""
+
+    def generate_caption(self, img):
+        """Generate caption for the given image using the model (or the caption cache)."""
+        with request_timer("caption"):
+            img = self.prepare_image(img)
+            if self.cache is None:
+                return self._run_model(img)
+            key, phash = self._cache_keys(img)
+            return self.cache.get_or_compute(key, self.model_id, lambda: self._run_model(img), phash)
+
+    def cached_caption(self, img) -> Optional[str]:
+        """Caption from the cache only (None on a miss or without a cache); never runs the model."""
+        if self.cache is None:
+            return None
+        key, phash = self._cache_keys(self.prepare_image(img))
+        return self.cache.get(key, self.model_id, phash)
+
+    @torch.inference_mode()
+    def _caption_batch(self, images: List[Image.Image], batch_size: int) -> List[str]:
+        record_batch("caption", len(images))
+        with self.loader.lease() as pipeline, stage_timer("caption", "generate"):
+            results = pipeline(images, batch_size=batch_size)
+        return [r[0]["generated_text"] if r and "generated_text" in r[0] else "" for r in results]
+
+    def iter_captions(self, sources: Iterable[ImageSource], batch_size: int = DEFAULT_CAPTION_BATCH_SIZE,
+                      workers: Optional[int] = None) -> Iterator[Tuple[ImageSource, Union[str, Exception]]]:
+        """
+        Caption many images, streaming results in input order.
+        Args:
+            sources: images, paths, URLs or encoded bytes
+            batch_size: images per pipeline forward pass
+            workers: threads used to load and decode images
+        Yields:
+            (source, caption) or (source, exception) for images that failed
+        """
+        for source, caption, _ in self.iter_captions_with_hashes(sources, batch_size, workers):
+            yield source, caption
+
+    def iter_captions_with_hashes(self, sources: Iterable[ImageSource],
+                                  batch_size: int = DEFAULT_CAPTION_BATCH_SIZE, workers: Optional[int] = None
+                                  ) -> Iterator[Tuple[ImageSource, Union[str, Exception], Optional[str]]]:
+        """
+        Like iter_captions, also yielding the SHA-256 of each image's encoded bytes
+        as computed while loading it, so callers can key stored results without
+        reading the image again.
+        Yields:
+            (source, caption or exception, content hash or None for PIL sources and failed loads)
+        """
+        batch_size = max(1, batch_size)
+        workers = workers or os.cpu_count() or 1
+        source_iter = iter(sources)
+        futures: Deque[Tuple[ImageSource, Future]] = deque()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-prep") as pool:
+            def refill():
+                # Decode up to two batches ahead so the pool overlaps with the model
+                while len(futures) < max(batch_size * 2, workers):
+                    source = next(source_iter, None)
+                    if source is None:
+                        return
+                    futures.append((source, pool.submit(self.load_image, source)))
+
+            refill()
+            while futures:
+                batch: List[Tuple[ImageSource, Image.Image]] = []
+                while futures and len(batch) < batch_size:
+                    source, future = futures.popleft()
+                    try:
+                        batch.append((source, future.result()))
+                    except Exception as exc:
+                        # Flush what is already decoded to keep results in input order
+                        yield from self._yield_batch(batch, batch_size)
+                        batch = []
+                        yield source, exc, None
+                    refill()
+                yield from self._yield_batch(batch, batch_size)
+
+    def _yield_batch(self, batch: List[Tuple[ImageSource, Image.Image]], batch_size: int):
+        if not batch:
+            return
+        count_requests("caption", len(batch))
+        captions: List[Optional[str]] = [None] * len(batch)
+        keys = []
+        if self.cache is not None:
+            keys = [self._cache_keys(img) for _, img in batch]
+            captions = [self.cache.get(key, self.model_id, phash) for key, phash in keys]
+        todo = [i for i, caption in enumerate(captions) if caption is None]
+        if todo:
+            try:
+                computed = self._caption_batch([batch[i][1] for i in todo], batch_size)
+            except Exception as exc:
+                for i, (source, img) in enumerate(batch):
+                    yield source, captions[i] if captions[i] is not None else exc, img.info.get(SOURCE_HASH_KEY)
+                return
+            for i, caption in zip(todo, computed):
+                captions[i] = caption
+                if self.cache is not None:
+                    self.cache.put(keys[i][0], self.model_id, caption, keys[i][1])
+        for (source, img), caption in zip(batch, captions):
+            yield source, caption, img.info.get(SOURCE_HASH_KEY)
+
+    def generate_captions(self, images: Iterable[ImageSource], batch_size: int = DEFAULT_CAPTION_BATCH_SIZE,
+                          workers: Optional[int] = None) -> List[str]:
+        """
+        Caption a collection of images with batched inference.
+        Raises:
+            the first loading or inference error encountered
+        """
+        captions = []
+        for _, caption in self.iter_captions(images, batch_size=batch_size, workers=workers):
+            if isinstance(caption, Exception):
+                raise caption
+            captions.append(caption)
+        return captions
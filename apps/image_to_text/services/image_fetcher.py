@@ -0,0 +1,192 @@
+"""Pooled, bounded and cached HTTP fetching of images.
+
+All downloads share one requests.Session, so connections to the same host
+are kept alive and reused. Every request has connect/read timeouts plus an
+overall deadline, and the body is streamed with a hard size cap, so a slow
+or huge response cannot tie up a worker. Bodies are kept in a small LRU
+together with their ETag/Last-Modified validators; a repeat fetch becomes a
+conditional GET and a 304 answer is served from memory.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as URLLib3Error, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+DEFAULT_MAX_BYTES = int(os.environ.get("GENAI_IMAGE_FETCH_MAX_MB", "20")) * 1024 * 1024
+DEFAULT_CACHE_BYTES = int(os.environ.get("GENAI_IMAGE_FETCH_CACHE_MB", "64")) * 1024 * 1024
+CONNECT_TIMEOUT = 5.0  # seconds to establish the connection
+READ_TIMEOUT = 15.0  # seconds of silence allowed between received bytes
+TOTAL_TIMEOUT = 60.0  # overall deadline for one download (stops slow-drip responses)
+POOL_SIZE = 16  # kept-alive connections per host
+CHUNK_SIZE = 16 * 1024  # at most one socket read per chunk, so the deadline is checked often
+
+
+class ImageFetchError(IOError):
+    """Download failed, timed out, or exceeded the size limit."""
+
+
+@dataclass
+class _CachedResponse:
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class ImageFetcher:
+    """
+    Thread-safe image downloader over a pooled requests.Session.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, cache_bytes: int = DEFAULT_CACHE_BYTES,
+                 connect_timeout: float = CONNECT_TIMEOUT, read_timeout: float = READ_TIMEOUT,
+                 total_timeout: float = TOTAL_TIMEOUT, pool_size: int = POOL_SIZE):
+        self.max_bytes = max_bytes
+        self.cache_bytes = cache_bytes
+        self.timeout = (connect_timeout, read_timeout)
+        self.total_timeout = total_timeout
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        # Retry connection errors and transient 5xx/429 answers with backoff; GET is idempotent
+        retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 502, 503, 504),
+                      allowed_methods=frozenset({"GET"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache: "OrderedDict[str, _CachedResponse]" = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.conditional_hits = 0
+
+    def _cached(self, url: str) -> Optional[_CachedResponse]:
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is not None:
+                self._cache.move_to_end(url)
+            return entry
+
+    def _store(self, url: str, entry: _CachedResponse):
+        if not (entry.etag or entry.last_modified) or len(entry.content) > self.cache_bytes:
+            return  # nothing to revalidate with, or too large to keep
+        with self._lock:
+            previous = self._cache.pop(url, None)
+            if previous is not None:
+                self._cached_bytes -= len(previous.content)
+            self._cache[url] = entry
+            self._cached_bytes += len(entry.content)
+            while self._cached_bytes > self.cache_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted.content)
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Download url into memory.
+        Args:
+            url: http(s) URL of the image
+        Returns:
+            response body
+        Raises:
+            ImageFetchError on network errors, HTTP errors, timeouts or oversized bodies
+        """
+        cached = self._cached(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        deadline = time.monotonic() + self.total_timeout
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    with self._lock:
+                        self.conditional_hits += 1
+                    return cached.content
+                response.raise_for_status()
+                length = response.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    raise ImageFetchError(f"{url}: {int(length)} bytes exceeds the {self.max_bytes} byte limit")
+                content = self._read_body(url, response, deadline)
+                self._store(url, _CachedResponse(content, response.headers.get("ETag"),
+                                                 response.headers.get("Last-Modified")))
+                return content
+        except requests.RequestException as exc:
+            raise ImageFetchError(f"{url}: {exc}") from exc
+
+    def _read_body(self, url: str, response: requests.Response, deadline: float) -> bytes:
+        """
+        Read the body one socket read at a time, each bounded by what is left of the deadline.
+        A server dripping a byte every few seconds never trips READ_TIMEOUT on its own, so the
+        socket timeout is lowered to the remaining budget before every read.
+        Raises:
+            ImageFetchError when the size limit, read timeout or overall deadline is exceeded
+        """
+        raw = response.raw
+        sock = getattr(raw.connection, "sock", None)
+        chunks, received = [], 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ImageFetchError(f"{url}: download took longer than {self.total_timeout:.0f}s")
+            if sock is not None:
+                sock.settimeout(min(self.timeout[1], remaining))
+            try:
+                chunk = raw.read1(CHUNK_SIZE, decode_content=True)
+            except ReadTimeoutError as exc:
+                if time.monotonic() >= deadline:
+                    raise ImageFetchError(f"{url}: download took longer than {self.total_timeout:.0f}s") from exc
+                raise ImageFetchError(f"{url}: {exc}") from exc
+            except URLLib3Error as exc:
+                raise ImageFetchError(f"{url}: {exc}") from exc
+            if not chunk:
+                return b"".join(chunks)
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise ImageFetchError(f"{url}: response exceeds the {self.max_bytes} byte limit")
+            chunks.append(chunk)
+
+    def fetch_many(self, urls: Iterable[str], workers: Optional[int] = None
+                   ) -> Iterator[Tuple[str, Union[bytes, Exception]]]:
+        """
+        Download many URLs concurrently over the shared connection pool.
+        Yields:
+            (url, body) or (url, ImageFetchError) in input order
+        """
+        workers = workers or self.pool_size
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-fetch") as pool:
+            futures = [(url, pool.submit(self.fetch, url)) for url in urls]
+            for url, future in futures:
+                try:
+                    yield url, future.result()
+                except ImageFetchError as exc:
+                    yield url, exc
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cached_entries": len(self._cache),
+                "cached_bytes": self._cached_bytes,
+                "conditional_hits": self.conditional_hits,
+            }
+
+
+_fetcher: Optional[ImageFetcher] = None
+_fetcher_lock = threading.Lock()
+
+
+def get_image_fetcher() -> ImageFetcher:
+    """Return the process-wide ImageFetcher (one connection pool for all sessions)."""
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = ImageFetcher()
+    return _fetcher
@@ -1,16 +1,71 @@
 """
 caption_model_loader.py
 Loads the HuggingFace image captioning pipeline for image-to-text.
+The pipeline is shared process-wide through the ModelRegistry.
+transformers is imported on first load, not at module import (it is the
+slowest import of the app).
 """
-from transformers import pipeline
+from typing import Optional
+from utils.inference_backend import DEFAULT_BACKEND, configure_threads, quantize_linear_int8, validate_backend
+from utils.model_registry import ModelKey, get_model_registry
+
+DEFAULT_CAPTION_MODEL = "nlpconnect/vit-gpt2-image-captioning"
+# Generation-based pipelines cannot be traced as one fixed graph, so only eager backends apply
+CAPTION_BACKENDS = ("default", "int8")
 
 
 class CaptionModelLoader:
-    def __init__(self, model_name: str = "nlpconnect/vit-gpt2-image-captioning"):
+    def __init__(self, model_name: str = DEFAULT_CAPTION_MODEL, device: Optional[str] = None,
+                 dtype: str = "float32", backend: Optional[str] = None):
         self.model_name = model_name
+        self.device = device or "cpu"
+        self.dtype = dtype
+        if backend is None:
+            # A process-wide GENAI_INFERENCE_BACKEND=torchscript only applies to Whisper
+            backend = DEFAULT_BACKEND if DEFAULT_BACKEND in CAPTION_BACKENDS else "default"
+        self.backend = validate_backend(backend, self.device, CAPTION_BACKENDS)
+        if self.backend == "int8" and self.dtype != "float32":
+            raise ValueError("The int8 backend quantizes float32 weights; use dtype='float32'")
+
+    @property
+    def key(self) -> ModelKey:
+        return ModelKey(self.model_name, self.device, self.dtype, self.backend)
+
+    def load_uncached(self):
+        """
+        Build a fresh image-to-text pipeline, bypassing the registry.
+        """
+        import torch
+        from transformers import pipeline
+        configure_threads()
+        captioner = pipeline("image-to-text", model=self.model_name, device=self.device,
+                             torch_dtype=getattr(torch, self.dtype))
+        if self.backend == "int8":
+            # ViT encoder and LM head Linear layers; GPT-2 blocks use Conv1D and stay float
+            captioner.model = quantize_linear_int8(captioner.model.eval())
+        return captioner
 
     def load(self):
         """
-        Load and return the image-to-text pipeline.
+        Load (or return the shared) image-to-text pipeline.
         """
-        return pipeline("image-to-text", model=self.model_name)
+        return get_model_registry().get(self.key, self.load_uncached)
+
+    def lease(self):
+        """
+        Context manager pinning the shared pipeline while it is in use.
+        """
+        return get_model_registry().lease(self.key, self.load_uncached)
+
+
+def warm_up(model_name: str = DEFAULT_CAPTION_MODEL):
+    """
+    Load the shared pipeline and caption one blank model-sized image, so lazy
+    kernel initialization happens before the first real request.
+    """
+    import torch
+    from PIL import Image
+    from image_to_text.services.image_preprocessor import MODEL_INPUT_SIZE
+    captioner = CaptionModelLoader(model_name).load()
+    with torch.inference_mode():
+        captioner(Image.new("RGB", (MODEL_INPUT_SIZE, MODEL_INPUT_SIZE)), max_new_tokens=4)
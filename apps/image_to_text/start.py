@@ -2,6 +2,9 @@
 image_to_text/start.py
 Entry point for the Image to Text Streamlit UI app.
 Handles all UI logic for image upload and caption generation.
+
+The UI object is built once per process (st.cache_resource); main.py runs
+this app as a fragment, so its widgets rerun only this pane.
 """
 import streamlit as st
 from utils.file_helper import FileHelper
@@ -27,10 +30,10 @@ def setup_file_helper():
 
 def setup_image_caption_model():
     """
-    Load the HuggingFace image captioning model and store in session_state.
+    Make sure the shared HuggingFace captioning pipeline is loaded in the
+    process-wide registry (one copy for all sessions).
     """
-    if "image_caption_model" not in st.session_state:
-        st.session_state["image_caption_model"] = CaptionModelLoader().load()
+    CaptionModelLoader().load()
 
 # ---------- App Initialization ----------
 
@@ -41,12 +44,20 @@ def initialize_image_to_text_app():
 
 # ---------- Main Application Logic ----------
 
+@st.cache_resource(show_spinner=False)
+def get_image_ui() -> ImageUploadTranscribeUI:
+    """
+    Image UI shared by all sessions of this process (it keeps no per-session
+    state), like the API's caption service.
+    """
+    return ImageUploadTranscribeUI()
+
+
 def run_image_to_text_ui():
     """
     Render UI for image upload and caption generation.
     """
-    image_ui = ImageUploadTranscribeUI()
-    image_ui.display()
+    get_image_ui().display()
 
 # ---------- Entry Point for Import ----------
 
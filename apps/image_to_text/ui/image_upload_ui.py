@@ -1,44 +1,128 @@
 """
 ImageUploadTranscribeUI
 UI class for uploading images and generating captions using HuggingFace pipeline.
+Several files can be uploaded at once; they are captioned in batches with a progress bar.
+Captions come from the shared caption cache when the same (or a near-identical) image
+was captioned before, so Streamlit reruns do not call the model again. Cache misses
+are captioned on the background job executor while the page polls for the result.
+New captions are saved in the results store (history and full-text search).
 """
+import json
+import time
 import streamlit as st
-from image_to_text.services.image_caption_service import ImageCaptionService
+from image_to_text.services.caption_cache import content_hash, get_caption_cache, image_content_key
+from image_to_text.services.image_fetcher import ImageFetchError
+from image_to_text.services.image_caption_service import DEFAULT_CAPTION_BATCH_SIZE, ImageCaptionService
+from image_to_text.services.image_preprocessor import THUMBNAIL_SIZE, display_thumbnail
+from image_to_text.services.model_loader import CaptionModelLoader
+from utils.results_store import CAPTION, get_results_store
+from utils.job_queue_ui import run_in_background
 
 
 class ImageUploadTranscribeUI:
     def __init__(self):
-        self.file_helper = st.session_state.get("image_file_helper")
-        self.model = st.session_state.get("image_caption_model")
-        self.caption_service = ImageCaptionService(self.model) if self.model else None
+        self.model_loader = CaptionModelLoader()
+        self.model_id = self.model_loader.key.model_id
+        self.job_pool = self.model_id
+        # The service leases the shared pipeline per batch instead of keeping a reference
+        self.caption_service = ImageCaptionService(self.model_loader, cache=get_caption_cache(),
+                                                   model_id=self.model_id)
 
     def display(self):
-        st.subheader("Upload an image or provide a URL")
-        img = self._get_image_input()
+        st.subheader("Upload images or provide a URL")
+        image_files = st.file_uploader("Upload Images", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
+        if image_files and len(image_files) > 1:
+            self._caption_many(image_files)
+            return
+        img, source = self._get_image_input(image_files[0] if image_files else None)
         self._show_image(img)
-        self._caption_and_save(img)
+        self._caption_and_save(img, source)
 
-    def _get_image_input(self):
-        image_file = st.file_uploader("Upload Image", type=["png", "jpg", "jpeg"])
+    def _get_image_input(self, image_file):
+        """Returns (image or None, file name or URL)."""
         image_url = st.text_input("Or paste an image URL")
         img = None
+        source = image_file.name if image_file else image_url
         if image_file:
-            img = self.caption_service.load_image_from_file(image_file)
+            # Decoded just large enough for the preview; captioning shrinks it further
+            img = self.caption_service.load_image_from_file(image_file, min_side=THUMBNAIL_SIZE)
         elif image_url:
             try:
-                img = self.caption_service.load_image_from_url(image_url)
+                img = self.caption_service.load_image_from_url(image_url, min_side=THUMBNAIL_SIZE)
+            except ImageFetchError as e:
+                st.error(f"Could not load image from URL: {e}")
             except Exception:
                 st.error("Could not load image from URL.")
-        return img
+        return img, source
 
     def _show_image(self, img):
         if img:
-            st.image(img, caption="Selected Image", width='stretch')
+            st.image(display_thumbnail(img), caption="Selected Image", width='stretch')
 
-    def _caption_and_save(self, img):
+    def _caption_and_save(self, img, source: str = ""):
         if not (img and self.caption_service):
             return
-        caption = self.caption_service.generate_caption(img)
+        image_key = image_content_key(img)
+        caption = self.caption_service.cached_caption(img)
+        if caption is None:
+            caption = run_in_background("caption", self.job_pool, f"{self.job_pool}:{image_key}",
+                                        lambda: self._caption_job(img, image_key, source), "Captioning")
+            if caption is None:
+                return
         st.success(f"Caption: {caption}")
-        if self.file_helper:
-            self.file_helper.write_text_file("captions", "caption.txt", caption)
+        self._show_cache_stats()
+
+    def _caption_job(self, img, image_key: str, source: str):
+        """Job function captioning one image and saving the caption in the results store."""
+        def run(job):
+            started = time.perf_counter()
+            caption = self.caption_service.generate_caption(img)
+            get_results_store().add(CAPTION, caption, source=source, content_hash=image_key,
+                                    model=self.model_id, elapsed=time.perf_counter() - started)
+            return caption
+        return run
+
+    def _show_cache_stats(self):
+        stats = self.caption_service.cache.stats()
+        st.caption(f"Caption cache: {stats['hits']} hits, {stats['perceptual_hits']} near-duplicate hits, "
+                   f"{stats['misses']} misses, {stats['disk_entries']} stored")
+
+    def _caption_files_job(self, files, hashes):
+        """
+        Job function captioning (name, bytes) pairs in batches, reporting rows as
+        they finish; the captions are bulk-inserted into the results store at the end.
+        """
+        def run(job):
+            rows, records = [], []
+            captions = self.caption_service.iter_captions([data for _, data in files],
+                                                          batch_size=DEFAULT_CAPTION_BATCH_SIZE)
+            for (name, _), image_hash, (_, caption) in zip(files, hashes, captions):
+                if isinstance(caption, Exception):
+                    rows.append({"file": name, "caption": "", "error": str(caption)})
+                else:
+                    rows.append({"file": name, "caption": caption, "error": ""})
+                    records.append(dict(kind=CAPTION, text=caption, source=name, content_hash=image_hash,
+                                        model=self.model_id))
+                job.report(len(rows) / len(files), list(rows))
+            get_results_store().add_many(records)
+            return rows
+        return run
+
+    def _caption_many(self, image_files):
+        """Caption all uploaded files in the background, showing rows as batches finish."""
+        if not self.caption_service:
+            return
+        files = [(f.name, f.getvalue()) for f in image_files]
+        hashes = [content_hash(data) for _, data in files]
+        key = self.job_pool + ":" + content_hash("".join(hashes).encode("ascii"))
+        rows = run_in_background("caption_many", self.job_pool, key, lambda: self._caption_files_job(files, hashes),
+                                 f"Captioning {len(files)} images",
+                                 render_partial=lambda partial: st.dataframe(partial, width='stretch'))
+        if rows is None:
+            return
+        self._show_cache_stats()
+
+        st.dataframe(rows, width='stretch')
+        jsonl = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        st.download_button("Download captions (JSONL)", jsonl, file_name="captions.jsonl",
+                           mime="application/x-ndjson")
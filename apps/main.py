@@ -1,8 +1,15 @@
 import streamlit as st
 from utils.file_helper import FileHelper
+from utils.metrics_ui import show_metrics_panel
+from utils.results_store_ui import show_results_panel
 from utils.ui_helper import show_author_and_version
-from audio_to_text.start import main as audio_to_text_main
-from image_to_text.start import main as image_to_text_main
+from utils.warmup_ui import show_model_readiness, wait_for_warmup
+from utils.warmup import get_model_warmup
+
+# The apps (torch, whisper, transformers) are imported by their warm-up tasks on a
+# background thread, so the first page render only needs streamlit.
+WHISPER_TASK = "Whisper"
+CAPTION_TASK = "Captioning"
 
 
 def setup_main_page():
@@ -22,6 +29,32 @@ def setup_file_helper():
     if "file_helper" not in st.session_state:
         st.session_state["file_helper"] = FileHelper("audio_to_text", resource_root="/tmp/resources")
 
+def warm_up_audio_to_text():
+    """
+    Import the audio app and warm the shared Whisper model (dummy 1 s decode).
+    """
+    import audio_to_text.start  # noqa: F401 - heavy imports happen here, off the script thread
+    from audio_to_text.services.audio_transcriber import DEFAULT_MODEL_NAME
+    from audio_to_text.services.model_loader import warm_up
+    warm_up(DEFAULT_MODEL_NAME)
+
+def warm_up_image_to_text():
+    """
+    Import the image app and warm the shared captioning pipeline (dummy 224x224 caption).
+    """
+    import image_to_text.start  # noqa: F401
+    from image_to_text.services.model_loader import warm_up
+    warm_up()
+
+def setup_model_warmup():
+    """
+    Start loading and warming both models in the background (once per process).
+    """
+    warmup = get_model_warmup()
+    warmup.register(WHISPER_TASK, warm_up_audio_to_text)
+    warmup.register(CAPTION_TASK, warm_up_image_to_text)
+    warmup.start()
+
 def init():
     """
     Initialize main app components.
@@ -29,6 +62,27 @@ def init():
     setup_main_page()
     show_author_and_version()
     setup_file_helper()
+    setup_model_warmup()
+    show_model_readiness()
+
+@st.fragment
+def image_pane():
+    """
+    Image to Text pane. As a fragment, its widgets rerun only this pane, so
+    the audio pane is not re-rendered (and vice versa).
+    """
+    if wait_for_warmup(CAPTION_TASK, "Image to Text"):
+        from image_to_text.start import main as image_to_text_main
+        image_to_text_main()
+
+@st.fragment
+def audio_pane():
+    """
+    Audio to Text pane (its tabs are nested fragments).
+    """
+    if wait_for_warmup(WHISPER_TASK, "Audio to Text"):
+        from audio_to_text.start import main as audio_to_text_main
+        audio_to_text_main()
 
 def main():
     init()
@@ -42,7 +96,7 @@ def main():
                 <hr style='border:1px solid #DDD; width: 180px; margin: 8px auto 20px auto;'>
             </div>
         """, unsafe_allow_html=True)
-        image_to_text_main()
+        image_pane()
     with col_sep:
         st.markdown("<div style='border-left:2px solid #DDD;height:100vh;'></div>", unsafe_allow_html=True)
     with col_audio:
@@ -52,7 +106,10 @@ def main():
                 <hr style='border:1px solid #DDD; width: 180px; margin: 8px auto 20px auto;'>
             </div>
         """, unsafe_allow_html=True)
-        audio_to_text_main()
+        audio_pane()
+
+    show_results_panel()
+    show_metrics_panel()
 
 
 if __name__ == "__main__":
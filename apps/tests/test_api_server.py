@@ -0,0 +1,137 @@
+"""HTTP API routes with the Whisper loader, batcher and caption service stubbed out."""
+import threading
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")  # required by starlette.testclient
+from starlette.testclient import TestClient
+from api import server
+from audio_to_text.services.audio_transcriber import TranscriptionResult
+from audio_to_text.services.transcription_cache import TranscriptionCache
+from utils.model_registry import ModelKey
+
+AUDIO = b"RIFF-not-really-audio"
+
+
+class StubLoader:
+    model_name = "stub"
+    dtype = "float32"
+    key = ModelKey("stub", "cpu", "float32", "default")
+
+
+class StubBatcher:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def transcribe(self, data, language=None, progress=None, max_seconds=None):
+        self.calls.append(language)
+        self.entered.set()
+        self.release.wait(10)
+        return TranscriptionResult(language or "en", "hello world", duration=1.0)
+
+
+class StubCaptionService:
+    def load_image_from_bytes(self, data):
+        return bytes(data)
+
+    def load_image_from_url(self, url):
+        return url
+
+    def generate_caption(self, img):
+        return "a stub caption"
+
+
+@pytest.fixture
+def batcher(monkeypatch, tmp_path):
+    stub = StubBatcher()
+    monkeypatch.setattr(server, "get_dynamic_batcher", lambda loader: stub)
+    cache = TranscriptionCache(tmp_path / "cache")
+    monkeypatch.setattr(server, "get_transcription_cache", lambda: cache)
+    return stub
+
+
+def make_client(**kwargs) -> TestClient:
+    app = server.create_app(warmup=False, **kwargs)
+    app.state.api.whisper_loader = StubLoader()
+    app.state.api._caption_service = StubCaptionService()
+    return TestClient(app)
+
+
+def test_transcribe_returns_result_and_uses_cache(batcher):
+    with make_client() as client:
+        response = client.post("/transcribe?language=en", content=AUDIO)
+        assert response.status_code == 200
+        assert response.json()["text"] == "hello world"
+        assert client.post("/transcribe?language=en", content=AUDIO).status_code == 200
+    assert batcher.calls == ["en"]  # the repeat was a cache hit
+
+
+def test_transcribe_rejects_unknown_language_before_batching(batcher):
+    with make_client() as client:
+        response = client.post("/transcribe?language=xx", content=AUDIO)
+    assert response.status_code == 422
+    assert "xx" in response.json()["error"]
+    assert batcher.calls == []
+
+
+def test_transcribe_rejects_empty_body(batcher):
+    with make_client() as client:
+        assert client.post("/transcribe", content=b"").status_code == 400
+
+
+def test_oversized_body_gets_413(batcher, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BODY_MB", 1)
+    with make_client() as client:
+        response = client.post("/transcribe", content=b"\0" * (1024 * 1024 + 1))
+    assert response.status_code == 413
+    assert batcher.calls == []
+
+
+def test_caption(batcher):
+    with make_client() as client:
+        response = client.post("/caption", content=b"image bytes")
+        assert response.status_code == 200
+        assert response.json() == {"caption": "a stub caption"}
+        assert client.post("/caption").status_code == 400
+
+
+def test_caption_disabled_returns_404(batcher):
+    with make_client(caption_enabled=False) as client:
+        assert client.post("/caption", content=b"image bytes").status_code == 404
+
+
+def test_ready_turns_200_once_models_have_served(batcher):
+    with make_client() as client:
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["models"] == {"whisper": False, "caption": False}
+        client.post("/transcribe", content=AUDIO)
+        client.post("/caption", content=b"image bytes")
+        assert client.get("/ready").status_code == 200
+
+
+def test_slot_timeout_returns_503(batcher):
+    batcher.release.clear()  # the first request holds the only slot
+    with make_client(max_concurrency=1, queue_timeout=0.2) as client:
+        first = {}
+        worker = threading.Thread(target=lambda: first.setdefault(
+            "response", client.post("/transcribe", content=AUDIO)))
+        worker.start()
+        assert batcher.entered.wait(10)
+        response = client.post("/transcribe", content=b"other audio")
+        batcher.release.set()
+        worker.join(10)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert first["response"].status_code == 200
+
+
+def test_cache_key_includes_device_and_backend(batcher):
+    with make_client() as client:
+        assert client.post("/transcribe", content=AUDIO).status_code == 200
+        client.app.state.api.whisper_loader.key = ModelKey("stub", "cuda", "float32", "default")
+        assert client.post("/transcribe", content=AUDIO).status_code == 200
+    assert batcher.calls == [None, None]  # another device is another cache entry
@@ -0,0 +1,115 @@
+"""In-process WAV decoding and the header-only duration check."""
+import io
+import struct
+import wave
+import numpy as np
+import pytest
+from audio_to_text.services.audio_decoder import (
+    AudioTooLongError,
+    UnsupportedWavError,
+    as_buffer,
+    check_duration,
+    decode_wav,
+    load_audio_source,
+    spool_audio,
+    wav_duration,
+)
+
+
+def pcm_wav(samples: np.ndarray, rate: int = 16000, channels: int = 1) -> bytes:
+    """Encode integer samples (interleaved for stereo) with the stdlib writer."""
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(samples.dtype.itemsize)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+    return out.getvalue()
+
+
+def raw_wav(data: bytes, audio_format: int, bits: int, rate: int = 16000, channels: int = 1,
+            data_size=None) -> bytes:
+    """Hand-built RIFF/WAVE with an arbitrary format tag and data chunk size."""
+    block_align = channels * bits // 8
+    fmt = struct.pack("<HHIIHH", audio_format, channels, rate, rate * block_align, block_align, bits)
+    size = len(data) if data_size is None else data_size
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", size) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_int16_mono_is_scaled_to_unit_range():
+    samples = np.array([0, 16384, -16384, 32767, -32768], dtype=np.int16)
+    audio = decode_wav(as_buffer(pcm_wav(samples)))
+    assert audio.dtype == np.float32
+    np.testing.assert_allclose(audio, samples / 32768.0)
+
+
+def test_stereo_is_downmixed():
+    frames = np.array([[1000, 3000], [-2000, 2000]], dtype=np.int16)
+    audio = decode_wav(as_buffer(pcm_wav(frames.ravel(), channels=2)))
+    np.testing.assert_allclose(audio, frames.mean(axis=1) / 32768.0)
+
+
+def test_unsigned_8_bit():
+    audio = decode_wav(as_buffer(pcm_wav(np.array([128, 255, 0], dtype=np.uint8))))
+    np.testing.assert_allclose(audio, [0.0, 127 / 128, -1.0])
+
+
+def test_ieee_float32():
+    samples = np.array([0.5, -0.25, 1.0], dtype="<f4")
+    np.testing.assert_array_equal(decode_wav(as_buffer(raw_wav(samples.tobytes(), 3, 32))), samples)
+
+
+def test_other_rates_are_resampled_to_16k():
+    samples = (np.sin(np.arange(48000) * 2 * np.pi * 440 / 48000) * 10000).astype(np.int16)
+    assert decode_wav(as_buffer(pcm_wav(samples, rate=48000))).shape == (16000,)
+
+
+def test_unknown_layout_is_left_to_ffmpeg():
+    with pytest.raises(UnsupportedWavError):
+        decode_wav(as_buffer(raw_wav(b"\0" * 12, 1, 24)))
+
+
+@pytest.mark.parametrize("channels, rate, block_align", [(1, 16000, 0), (0, 16000, 0), (1, 0, 2), (2, 16000, 2)])
+def test_malformed_header_is_left_to_ffmpeg(channels, rate, block_align):
+    fmt = struct.pack("<HHIIHH", 1, channels, rate, rate * block_align, block_align, 16)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", 8) + bytes(8)
+    with pytest.raises(UnsupportedWavError, match="inconsistent header"):
+        decode_wav(as_buffer(b"RIFF" + struct.pack("<I", len(body)) + body))
+
+
+def test_streaming_writer_size_uses_the_rest_of_the_buffer():
+    samples = np.arange(100, dtype=np.int16)
+    wav = raw_wav(samples.tobytes(), 1, 16, data_size=0)
+    np.testing.assert_allclose(decode_wav(as_buffer(wav)), samples / 32768.0)
+    assert wav_duration(as_buffer(wav)) == pytest.approx(100 / 16000)
+
+
+def test_load_audio_source_accepts_bytes_and_buffers():
+    wav = pcm_wav(np.arange(160, dtype=np.int16))
+    np.testing.assert_array_equal(load_audio_source(wav), load_audio_source(io.BytesIO(wav)))
+
+
+def test_check_duration_reads_the_header():
+    ten_seconds = pcm_wav(np.zeros(16000 * 10, dtype=np.int16))
+    assert wav_duration(as_buffer(ten_seconds)) == pytest.approx(10.0)
+    check_duration(ten_seconds, 10.0)
+    check_duration(ten_seconds, None)
+    with pytest.raises(AudioTooLongError, match="10 s"):
+        check_duration(ten_seconds, 5.0)
+
+
+def test_declared_size_is_clamped_to_the_buffer():
+    truncated = raw_wav(b"\0" * 3200, 1, 16, data_size=16000 * 2 * 10)  # header claims 10 s
+    assert wav_duration(as_buffer(truncated)) == pytest.approx(0.1)
+
+
+def test_check_duration_lets_other_formats_through():
+    check_duration(b"ID3\x04" + b"\0" * 64, 1.0)  # checked by ffmpeg while decoding instead
+
+
+def test_spool_audio_rejects_long_wav_before_decoding():
+    with pytest.raises(AudioTooLongError):
+        spool_audio(pcm_wav(np.zeros(16000 * 10, dtype=np.int16)), max_seconds=5.0)
+    with spool_audio(pcm_wav(np.zeros(1600, dtype=np.int16)), max_seconds=5.0) as spool:
+        assert decode_wav(spool.buffer()).shape == (1600,)
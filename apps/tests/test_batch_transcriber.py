@@ -0,0 +1,83 @@
+"""BatchTranscriber prefetch budget and cache-key reuse (audio decoding and the model stubbed out)."""
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+from audio_to_text.services import batch_transcriber
+from audio_to_text.services.batch_transcriber import BatchTranscriber
+from audio_to_text.services.transcription_cache import transcription_cache_key
+
+WINDOW = torch.zeros(80, 3000)
+MODEL = SimpleNamespace(is_multilingual=True, num_languages=99, dims=SimpleNamespace(n_mels=80))
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Record what load_audio_source was given; every file decodes to one 30 s window."""
+    sources = []
+
+    def load_audio_source(source):
+        sources.append(source)
+        return np.zeros(16000, dtype=np.float32)
+
+    monkeypatch.setattr(batch_transcriber, "load_audio_source", load_audio_source)
+    monkeypatch.setattr(batch_transcriber, "windowed_log_mel",
+                        lambda audio, n_mels, overlap_seconds: (WINDOW.unsqueeze(0).clone(), [0.0]))
+    return sources
+
+
+def audio_files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"{i}.wav"
+        path.write_bytes(b"RIFF" + bytes([i]) * 64)
+        paths.append(path)
+    return paths
+
+
+def run(transcriber, paths, monkeypatch):
+    """Run to completion, returning the most mel bytes ever held at a decode."""
+    peak = []
+
+    def decode_batch(model, mel, language=None):
+        time.sleep(0.02)  # let the workers run ahead of the model
+        peak.append(transcriber._buffered_bytes)
+        n = mel.shape[0]
+        return [SimpleNamespace(tokens=[])] * n, ["en"] * n, [{}] * n
+
+    monkeypatch.setattr(batch_transcriber, "decode_batch", decode_batch)
+    results = list(transcriber.run(paths))
+    assert sorted(path for path, _ in results) == sorted(paths)
+    assert transcriber._buffered_bytes == 0
+    return max(peak)
+
+
+def test_prefetch_is_bounded_by_bytes_not_files(tmp_path, monkeypatch, decoded):
+    paths = audio_files(tmp_path, 12)
+    unbounded = BatchTranscriber(MODEL, batch_size=1, workers=4, prefetch_bytes=1 << 40)
+    bounded = BatchTranscriber(MODEL, batch_size=1, workers=4, prefetch_bytes=2 * WINDOW.nbytes)
+    assert run(bounded, paths, monkeypatch) < run(unbounded, paths, monkeypatch)
+    # Budget plus what was already in flight when it was reached
+    assert run(bounded, paths, monkeypatch) <= (2 + 4) * WINDOW.nbytes
+
+
+def test_single_file_larger_than_budget_still_runs(tmp_path, monkeypatch, decoded):
+    transcriber = BatchTranscriber(MODEL, batch_size=1, workers=2, prefetch_bytes=1)
+    run(transcriber, audio_files(tmp_path, 3), monkeypatch)
+
+
+def test_model_id_hashes_the_bytes_read_for_decoding(tmp_path, monkeypatch, decoded):
+    paths = audio_files(tmp_path, 3)
+    transcriber = BatchTranscriber(MODEL, batch_size=2, workers=2, model_id="tiny/cpu/float32/default")
+    run(transcriber, paths, monkeypatch)
+    assert all(isinstance(source, bytes) for source in decoded)  # decoded from the bytes, not re-read
+    assert transcriber.content_hashes == {
+        path: transcription_cache_key(path.read_bytes(), "tiny/cpu/float32/default") for path in paths}
+
+
+def test_without_model_id_files_are_decoded_from_their_path(tmp_path, monkeypatch, decoded):
+    paths = audio_files(tmp_path, 2)
+    transcriber = BatchTranscriber(MODEL, batch_size=2, workers=1)
+    run(transcriber, paths, monkeypatch)
+    assert sorted(decoded) == paths and transcriber.content_hashes == {}
@@ -0,0 +1,82 @@
+"""DynamicBatcher language handling and error isolation (model replaced by a stub)."""
+from contextlib import contextmanager
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import torch
+from audio_to_text.services import batching
+from audio_to_text.services.batching import DynamicBatcher
+from audio_to_text.services.decoding import UnsupportedLanguageError
+from utils.model_registry import ModelKey
+
+MEL = torch.zeros(80, 3000)
+MODEL = SimpleNamespace(is_multilingual=True, num_languages=99, dims=SimpleNamespace(n_mels=80))
+
+
+class StubLoader:
+    key = ModelKey("stub", "cpu", "float32", "default")
+
+    def __init__(self, fail_lease: bool = False):
+        self.fail_lease = fail_lease
+
+    @contextmanager
+    def lease(self):
+        if self.fail_lease:
+            raise RuntimeError("model failed to load")
+        yield MODEL
+
+
+def fake_decode_batch(model, mel, language=None):
+    if language == "de":
+        raise RuntimeError("decoder crashed")
+    n = mel.shape[0]
+    return [SimpleNamespace(tokens=[], text=language or "")] * n, [language or "en"] * n, [{}] * n
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    monkeypatch.setattr(batching, "decode_batch", fake_decode_batch)
+    # Long wait so both submissions land in the same batch
+    return DynamicBatcher(StubLoader(), max_batch_size=2, max_wait_ms=2000)
+
+
+def test_unknown_language_is_rejected_at_submit(batcher):
+    with pytest.raises(UnsupportedLanguageError):
+        batcher.submit(MEL, "xx")
+    assert not batcher._pending
+
+
+def test_failing_group_does_not_fail_other_groups(batcher):
+    failing = batcher.submit(MEL, "de")
+    ok = batcher.submit(MEL, "en")
+    assert ok.result(timeout=10).language == "en"
+    with pytest.raises(RuntimeError, match="decoder crashed"):
+        failing.result(timeout=10)
+    assert batcher.stats()["failures"] == 1
+
+
+def test_lease_failure_fails_the_whole_batch(monkeypatch):
+    monkeypatch.setattr(batching, "decode_batch", fake_decode_batch)
+    batcher = DynamicBatcher(StubLoader(fail_lease=True), max_batch_size=2, max_wait_ms=2000)
+    futures = [batcher.submit(MEL, "en"), batcher.submit(MEL, None)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="failed to load"):
+            future.result(timeout=10)
+
+
+def test_language_is_detected_once_per_clip(monkeypatch):
+    calls = []
+
+    def decode_batch(model, mel, language=None):
+        calls.append((mel.shape[0], language))
+        n = mel.shape[0]
+        return [SimpleNamespace(tokens=[])] * n, [language or "fr"] * n, [{"fr": 0.9}] * n
+
+    monkeypatch.setattr(batching, "decode_batch", decode_batch)
+    monkeypatch.setattr(batching, "windowed_log_mel",
+                        lambda audio, n_mels, overlap_seconds: (MEL.expand(3, -1, -1), [0.0, 28.0, 56.0]))
+    batcher = DynamicBatcher(StubLoader(), max_batch_size=4, max_wait_ms=50)
+    result = batcher.transcribe_audio(np.zeros(16000, dtype=np.float32))
+    assert (result.language, result.language_probs) == ("fr", {"fr": 0.9})
+    # One detecting pass on the first window; the other two are forced to its language
+    assert calls == [(1, None), (2, "fr")]
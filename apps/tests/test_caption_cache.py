@@ -0,0 +1,101 @@
+"""CaptionCache lookups (exact and near-duplicate), row accounting and LRU trimming."""
+import io
+import itertools
+import numpy as np
+import pytest
+from PIL import Image
+from image_to_text.services import caption_cache
+from image_to_text.services.caption_cache import CaptionCache, image_content_key, perceptual_hash
+
+MODEL = "blip/cpu/float32/default"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "captions.sqlite3"
+
+
+def rows(cache: CaptionCache) -> int:
+    return cache._conn.execute("SELECT COUNT(*) FROM captions").fetchone()[0]
+
+
+def picture(size=(256, 192)) -> Image.Image:
+    """A smooth gradient with a bright block: enough structure for a stable dHash."""
+    y, x = np.mgrid[0:192, 0:256]
+    pixels = (x + y) / 448 * 200
+    pixels[40:120, 60:150] = 255
+    return Image.fromarray(pixels.astype(np.uint8)).convert("RGB").resize(size)
+
+
+def test_exact_hits_come_from_memory_then_sqlite(db_path):
+    cache = CaptionCache(db_path, max_memory_entries=1)
+    cache.put("a", MODEL, "caption a")
+    cache.put("b", MODEL, "caption b")  # pushes "a" out of memory
+    assert ("a", MODEL) not in cache._memory
+    assert cache.get("a", MODEL) == "caption a"
+    assert ("a", MODEL) in cache._memory
+    assert cache.get("a", "other-model") is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_resized_copy_is_a_near_duplicate_hit(db_path):
+    original, resized = picture(), picture((200, 150))
+    buffer = io.BytesIO()
+    resized.save(buffer, "JPEG", quality=70)
+    recompressed = Image.open(buffer)
+    cache = CaptionCache(db_path)
+    cache.put(image_content_key(original), MODEL, "a bright block", perceptual_hash(original))
+    assert image_content_key(recompressed) != image_content_key(original)
+    assert cache.get(image_content_key(recompressed), MODEL, perceptual_hash(recompressed)) == "a bright block"
+    assert cache.stats()["perceptual_hits"] == 1
+
+
+def test_near_duplicate_lookup_respects_distance_and_flat_images(db_path):
+    cache = CaptionCache(db_path, max_distance=-1)
+    phash = perceptual_hash(picture())
+    cache.put("a", MODEL, "caption", phash)
+    assert not cache.perceptual and cache.get("b", MODEL, phash) is None
+    cache = CaptionCache(db_path, max_distance=0)
+    assert cache.get("c", MODEL, phash ^ 1) is None  # one bit off
+    assert cache.get("c", MODEL, phash) == "caption"
+    cache.put("flat", MODEL, "blank", 0)
+    assert cache.get("other-flat", MODEL, 0) is None  # all-zero hashes never match each other
+
+
+def test_replacing_a_caption_does_not_grow_the_count(db_path):
+    cache = CaptionCache(db_path)
+    cache.put("a", MODEL, "first")
+    cache.put("a", MODEL, "second")
+    cache.put("a", "other-model", "third")
+    assert cache.stats()["disk_entries"] == rows(cache) == 2
+    cache._memory.clear()
+    assert cache.get("a", MODEL) == "second"
+
+
+def test_count_is_restored_when_the_store_is_reopened(db_path):
+    cache = CaptionCache(db_path)
+    for i in range(5):
+        cache.put(f"k{i}", MODEL, "caption")
+    assert CaptionCache(db_path).stats()["disk_entries"] == 5
+
+
+def test_eviction_trims_least_recently_used_rows(db_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(caption_cache.time, "time", lambda: float(next(clock)))
+    cache = CaptionCache(db_path, max_disk_entries=10)
+    for i in range(10):
+        cache.put(f"k{i}", MODEL, f"caption {i}")
+    cache._memory.clear()
+    assert cache.get("k0", MODEL) == "caption 0"  # touch the oldest row
+    cache.put("k10", MODEL, "caption 10")  # 11 rows: trimmed back to 9
+    assert cache.stats()["disk_entries"] == rows(cache) == 9
+    cache._memory.clear()
+    assert cache.get("k0", MODEL) == "caption 0"
+    assert cache.get("k1", MODEL) is None and cache.get("k2", MODEL) is None
+
+
+def test_clear_resets_the_count(db_path):
+    cache = CaptionCache(db_path)
+    cache.put("a", MODEL, "caption")
+    cache.clear()
+    assert cache.stats()["disk_entries"] == rows(cache) == 0
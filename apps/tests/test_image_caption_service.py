@@ -0,0 +1,82 @@
+"""ImageCaptionService pipeline leases and load-time content hashes (pipeline stubbed out)."""
+import io
+from contextlib import contextmanager
+from types import SimpleNamespace
+from PIL import Image
+from image_to_text.services.caption_cache import content_hash
+from image_to_text.services.image_caption_service import ImageCaptionService
+from utils.model_registry import ModelKey
+
+
+class Pipeline:
+    """HF image-to-text pipeline stand-in that refuses to run outside a lease."""
+
+    image_processor = SimpleNamespace(size={"height": 32, "width": 32})
+
+    def __init__(self, loader: "Loader"):
+        self.loader = loader
+
+    def __call__(self, images, batch_size=None):
+        assert self.loader.active, "pipeline used outside a lease"
+        if not isinstance(images, list):  # one image: a flat list of generations
+            return [{"generated_text": f"caption {images.size[0]}"}]
+        self.loader.batches.append(len(images))
+        return [[{"generated_text": f"caption {img.size[0]}"}] for img in images]
+
+
+class Loader:
+    """CaptionModelLoader stand-in counting leases."""
+
+    key = ModelKey("vit-gpt2", "cpu", "float32", "default")
+
+    def __init__(self):
+        self.active = 0
+        self.leases = 0
+        self.batches = []
+        self.pipeline = Pipeline(self)
+
+    @contextmanager
+    def lease(self):
+        self.active += 1
+        self.leases += 1
+        try:
+            yield self.pipeline
+        finally:
+            self.active -= 1
+
+
+def test_single_caption_runs_under_a_lease():
+    loader = Loader()
+    service = ImageCaptionService(loader)
+    assert service.input_size == 32 and service.model_id == "vit-gpt2/cpu/float32/default"
+    caption = service.generate_caption(Image.new("RGB", (64, 48)))
+    assert caption.startswith("caption") and loader.active == 0
+    assert not hasattr(service, "model")  # nothing pins the pipeline between requests
+
+
+def test_one_lease_per_inference_batch():
+    loader = Loader()
+    service = ImageCaptionService(loader)
+    leases_before = loader.leases
+    images = [Image.new("RGB", (40 + i, 40)) for i in range(5)]
+    captions = service.generate_captions(images, batch_size=2, workers=2)
+    assert len(captions) == 5 and loader.batches == [2, 2, 1]
+    assert loader.leases - leases_before == 3 and loader.active == 0
+
+
+def png(width: int) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, 40), "red").save(out, "PNG")
+    return out.getvalue()
+
+
+def test_hashes_come_from_the_bytes_read_while_loading(tmp_path):
+    path = tmp_path / "a.png"
+    path.write_bytes(png(50))
+    data = png(60)
+    sources = [str(path), data, b"not an image", Image.new("RGB", (70, 40))]
+    results = list(ImageCaptionService(Loader()).iter_captions_with_hashes(sources, batch_size=2, workers=2))
+    assert [source for source, _, _ in results] == sources
+    assert [image_hash for _, _, image_hash in results] == [content_hash(path.read_bytes()), content_hash(data),
+                                                             None, None]
+    assert isinstance(results[2][1], Exception)
@@ -0,0 +1,138 @@
+"""ImageFetcher against a real HTTP server on localhost."""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from image_to_text.services.image_fetcher import ImageFetcher, ImageFetchError
+
+BODY = b"\x89PNG" + bytes(range(256)) * 4
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real image host
+    requests_seen = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: bytes, **headers):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.send_header("ETag", ETAG)
+                self.end_headers()
+            else:
+                self.send_body(BODY, ETag=ETAG)
+        elif self.path == "/plain":
+            self.send_body(BODY)
+        elif self.path == "/big-declared":
+            self.send_body(b"x" * 4096)
+        elif self.path == "/big-undeclared":
+            # No Content-Length: the cap has to be enforced while streaming
+            self.send_response(200)
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(b"x" * 4096)
+            self.close_connection = True
+        elif self.path == "/drip":
+            # One byte every 50 ms: never silent long enough for the read timeout
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            try:
+                for _ in range(1000):
+                    self.wfile.write(b"x")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+        elif self.path == "/stall":
+            self.send_response(200)
+            self.send_header("Content-Length", "10")
+            self.end_headers()
+            self.wfile.write(b"x")
+            self.wfile.flush()
+            time.sleep(2)
+        else:
+            self.send_error(404)
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients hanging up on /drip and /stall is the point of those tests
+
+
+@pytest.fixture
+def base_url():
+    Handler.requests_seen = []
+    httpd = Server(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_etag_revalidation_serves_304_from_memory(base_url):
+    fetcher = ImageFetcher()
+    assert fetcher.fetch(f"{base_url}/etag") == BODY
+    assert fetcher.fetch(f"{base_url}/etag") == BODY
+    assert Handler.requests_seen == [("/etag", None), ("/etag", ETAG)]
+    assert fetcher.stats()["conditional_hits"] == 1
+    assert fetcher.stats()["cached_entries"] == 1
+
+
+def test_responses_without_validators_are_not_cached(base_url):
+    fetcher = ImageFetcher()
+    assert fetcher.fetch(f"{base_url}/plain") == BODY
+    assert fetcher.stats()["cached_entries"] == 0
+
+
+@pytest.mark.parametrize("path", ["/big-declared", "/big-undeclared"])
+def test_size_cap(base_url, path):
+    fetcher = ImageFetcher(max_bytes=1024)
+    with pytest.raises(ImageFetchError, match="limit"):
+        fetcher.fetch(base_url + path)
+
+
+def test_total_timeout_stops_a_slow_drip(base_url):
+    fetcher = ImageFetcher(read_timeout=5.0, total_timeout=0.5)
+    started = time.monotonic()
+    with pytest.raises(ImageFetchError, match="longer than"):
+        fetcher.fetch(f"{base_url}/drip")
+    assert time.monotonic() - started < 1.5
+
+
+def test_read_timeout_on_a_stalled_body(base_url):
+    fetcher = ImageFetcher(read_timeout=0.3, total_timeout=10.0)
+    started = time.monotonic()
+    with pytest.raises(ImageFetchError):
+        fetcher.fetch(f"{base_url}/stall")
+    assert time.monotonic() - started < 1.5
+
+
+def test_http_errors_are_wrapped(base_url):
+    with pytest.raises(ImageFetchError):
+        ImageFetcher().fetch(f"{base_url}/missing")
+
+
+def test_fetch_many_keeps_input_order_and_reports_failures(base_url):
+    fetcher = ImageFetcher(max_bytes=2048)
+    urls = [f"{base_url}/plain", f"{base_url}/missing", f"{base_url}/big-declared", f"{base_url}/etag"]
+    results = list(fetcher.fetch_many(urls, workers=4))
+    assert [url for url, _ in results] == urls
+    assert results[0][1] == BODY and results[3][1] == BODY
+    assert isinstance(results[1][1], ImageFetchError)
+    assert isinstance(results[2][1], ImageFetchError)
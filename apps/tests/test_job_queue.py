@@ -0,0 +1,25 @@
+"""JobExecutor lookup of active jobs by key."""
+import threading
+import time
+from utils.job_queue import DONE, JobExecutor
+
+
+def wait_done(job, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.status == DONE
+
+
+def test_find_returns_the_active_job_for_a_key():
+    executor = JobExecutor(workers=1)
+    release = threading.Event()
+    job = executor.submit("pool", lambda job: release.wait(10) and "transcript", key="clip-a")
+    assert executor.find("clip-a") is job
+    assert executor.find("clip-b") is None
+    # Submitting the same key again (another session) attaches to the same job
+    assert executor.submit("pool", lambda job: "never runs", key="clip-a") is job
+    release.set()
+    wait_done(job)
+    assert job.result == "transcript"
+    assert executor.find("clip-a") is None  # finished jobs are polled by id, not found by key
@@ -0,0 +1,104 @@
+"""ResultsStore upserts, keyset paging and FTS5 search."""
+import pytest
+from audio_to_text.services.audio_transcriber import TranscriptionResult
+from audio_to_text.services.long_form import TranscriptSegment
+from utils.results_store import CAPTION, TRANSCRIPT, ResultsStore, fts_query, transcription_record
+
+MODEL = "tiny/cpu/float32/default"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(tmp_path / "results.sqlite3")
+
+
+def ids(page):
+    return [result.id for result in page.results]
+
+
+def test_same_input_and_model_updates_in_place(store):
+    first = store.add(TRANSCRIPT, "hello wrld", content_hash="h1", model=MODEL, segments=[(0, 1, "hello wrld")])
+    second = store.add(TRANSCRIPT, "hello world", content_hash="h1", model=MODEL,
+                       segments=[(0, 0.5, "hello"), (0.5, 1, "world")])
+    assert first == second and store.count() == 1
+    stored = store.get(first)
+    assert stored.text == "hello world"
+    assert stored.segments == [(0.0, 0.5, "hello"), (0.5, 1.0, "world")]
+    assert store.find(TRANSCRIPT, MODEL, "h1").id == first
+    assert store.search("wrld").results == []  # the FTS index follows the update
+
+
+def test_other_models_kinds_and_missing_hashes_are_kept_apart(store):
+    store.add(TRANSCRIPT, "a", content_hash="h1", model=MODEL)
+    store.add(TRANSCRIPT, "b", content_hash="h1", model="base/cpu/float32/default")
+    store.add(CAPTION, "c", content_hash="h1", model=MODEL)
+    store.add(TRANSCRIPT, "d", model=MODEL)
+    store.add(TRANSCRIPT, "e", model=MODEL)  # no hash: never merged
+    assert store.count() == 5
+    assert store.stats() == {"transcripts": 4, "captions": 1, "full_text": True}
+
+
+def test_transcription_record_round_trips_segments(store):
+    result = TranscriptionResult("en", "hi there", {}, [TranscriptSegment(0.0, 2.0, "hi there")], 2.0)
+    result_id = store.add(**transcription_record(result, source="a.wav", content_hash="h", model=MODEL))
+    stored = store.get(result_id)
+    assert (stored.language, stored.duration, stored.segments) == ("en", 2.0, [(0.0, 2.0, "hi there")])
+
+
+def test_keyset_paging_walks_newest_first_without_gaps(store):
+    added = [store.add(TRANSCRIPT, f"result {i}", model=MODEL) for i in range(25)]
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = store.page(before=cursor, limit=10)
+        seen += ids(page)
+        pages += 1
+        if pages == 1:
+            store.add(TRANSCRIPT, "arrived while paging", model=MODEL)  # does not shift later pages
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert pages == 3 and seen == added[::-1]
+
+
+def test_exact_multiple_of_the_page_size_has_no_empty_last_page(store):
+    for i in range(10):
+        store.add(CAPTION, f"caption {i}")
+    store.add(TRANSCRIPT, "not a caption")
+    page = store.page(kind=CAPTION, limit=5)
+    assert len(page.results) == 5 and page.next_cursor == page.results[-1].id
+    page = store.page(kind=CAPTION, before=page.next_cursor, limit=5)
+    assert len(page.results) == 5 and page.next_cursor is None
+
+
+def test_search_matches_words_prefixes_and_filters(store):
+    store.add(TRANSCRIPT, "The quick brown fox", source="fox.wav", model=MODEL)
+    store.add(CAPTION, "a quick sketch of a fox", source="fox.png")
+    store.add(TRANSCRIPT, "nothing to see here", source="other.wav", model=MODEL)
+    assert len(store.search("fox").results) == 2
+    assert len(store.search("qui*").results) == 2
+    assert len(store.search("QUICK Fox", kind=TRANSCRIPT).results) == 1
+    assert len(store.search("other").results) == 1  # source names are indexed too
+    hit = store.search("brown").results[0]
+    assert "[brown]" in hit.snippet
+
+
+def test_search_pages_with_the_same_cursor(store):
+    added = [store.add(TRANSCRIPT, f"meeting notes {i}") for i in range(7)]
+    first = store.search("meeting", limit=4)
+    second = store.search("meeting", before=first.next_cursor, limit=4)
+    assert ids(first) + ids(second) == added[::-1] and second.next_cursor is None
+
+
+def test_fts_query_treats_operators_as_words(store):
+    assert fts_query('fox OR "dog" NEAR(') == '"fox" "OR" "dog" "NEAR"'
+    assert fts_query("pre*") == '"pre"*'
+    assert fts_query(" -- ") is None
+    store.add(TRANSCRIPT, "cats and dogs")
+    assert store.search('cats AND "dogs').results[0].text == "cats and dogs"
+    assert len(store.search("  ").results) == 1  # no words: plain listing
+
+
+def test_clear_empties_results_and_index(store):
+    store.add(TRANSCRIPT, "hello", segments=[(0, 1, "hello")])
+    store.clear()
+    assert store.count() == 0 and store.search("hello").results == []
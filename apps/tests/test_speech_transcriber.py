@@ -0,0 +1,22 @@
+"""AudioBuffer ring semantics: wraparound and chunks longer than the capacity."""
+import numpy as np
+from audio_to_text.services.speech_transcriber import AudioBuffer
+
+
+def test_wraparound_keeps_the_newest_samples_in_order():
+    buffer = AudioBuffer(capacity=8)
+    for start in range(0, 20, 3):
+        buffer.append(np.arange(start, start + 3, dtype=np.float32))
+    assert buffer.total_len == 8 and buffer.written == 21
+    np.testing.assert_array_equal(buffer.to_array(), np.arange(13, 21))
+
+
+def test_chunk_longer_than_capacity_keeps_its_tail():
+    buffer = AudioBuffer(capacity=8)
+    buffer.append(np.arange(5, dtype=np.float32))
+    buffer.append(np.arange(100, 120, dtype=np.float64))  # converted, truncated to 8
+    np.testing.assert_array_equal(buffer.to_array(), np.arange(112, 120))
+    buffer.append(np.array([7.0], dtype=np.float32))
+    np.testing.assert_array_equal(buffer.to_array(), np.r_[np.arange(113, 120), 7])
+    buffer.clear()
+    assert buffer.duration() == 0.0 and buffer.to_array().shape == (0,)
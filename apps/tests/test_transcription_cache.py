@@ -0,0 +1,84 @@
+"""TranscriptionCache keys and its memory LRU and on-disk JSON tiers."""
+import os
+import pytest
+from audio_to_text.services.audio_transcriber import TranscriptionResult
+from audio_to_text.services.long_form import TranscriptSegment
+from audio_to_text.services.transcription_cache import TranscriptionCache, transcription_cache_key
+
+MODEL = "tiny/cpu/float32/default"
+
+
+def result(text: str) -> TranscriptionResult:
+    return TranscriptionResult("en", text, {"en": 0.9}, [TranscriptSegment(0.0, 1.5, text)], 1.5)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranscriptionCache(tmp_path, max_memory_entries=2)
+
+
+def test_key_covers_audio_model_and_options():
+    audio = b"RIFF" + bytes(100)
+    key = transcription_cache_key(audio, MODEL, {"language": "en"})
+    assert key == transcription_cache_key(memoryview(audio), MODEL, {"language": "en"})
+    assert key != transcription_cache_key(audio, "base/cpu/float32/default", {"language": "en"})
+    assert key != transcription_cache_key(audio, MODEL, {"language": "de"})
+    assert key != transcription_cache_key(audio + b"\0", MODEL, {"language": "en"})
+    assert transcription_cache_key(audio, MODEL) == transcription_cache_key(audio, MODEL, {})
+
+
+def test_round_trip_through_disk(cache, tmp_path):
+    cache.put("ab01", result("hello"))
+    assert (tmp_path / "ab" / "ab01.json").exists()
+    reopened = TranscriptionCache(tmp_path)
+    assert reopened.get("ab01") == result("hello")
+    assert reopened.stats()["disk_bytes"] == cache.stats()["disk_bytes"] > 0
+
+
+def test_memory_lru_falls_back_to_disk_and_promotes(cache):
+    for key in ("aa", "bb", "cc"):
+        cache.put(key, result(key))
+    assert list(cache._memory) == ["bb", "cc"]  # "aa" only on disk now
+    assert cache.get("aa") == result("aa")
+    assert list(cache._memory) == ["cc", "aa"]
+    assert cache.get("zz") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["memory_entries"]) == (1, 1, 2)
+
+
+def test_get_or_compute_computes_once(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result("computed")
+
+    assert cache.get_or_compute("k1", compute) == cache.get_or_compute("k1", compute)
+    assert len(calls) == 1
+
+
+def test_disk_eviction_drops_least_recently_used(tmp_path):
+    cache = TranscriptionCache(tmp_path, max_memory_entries=1)
+    for i, key in enumerate(("k1", "k2", "k3")):
+        cache.put(key, result(key))
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    size = cache._path("k1").stat().st_size
+    cache.get("k1")  # disk hit: refreshes its mtime past k2 and k3
+    cache.max_disk_bytes = int(3.2 * size)
+    cache.put("k4", result("k4"))  # 4 files over a 3.2-file budget: trimmed below 2.88, so two go
+    assert sorted(p.stem for p in tmp_path.glob("*/*.json")) == ["k1", "k4"]
+    assert cache.stats()["disk_bytes"] == 2 * size
+
+
+def test_replacing_an_entry_counts_its_size_once(cache):
+    cache.put("k1", result("short"))
+    cache.put("k1", result("a somewhat longer transcript"))
+    assert cache.stats()["disk_bytes"] == cache._path("k1").stat().st_size
+
+
+def test_clear_empties_both_tiers(cache, tmp_path):
+    cache.put("k1", result("hello"))
+    cache.clear()
+    assert cache.get("k1") is None
+    assert list(tmp_path.glob("*/*.json")) == []
+    assert cache.stats()["memory_entries"] == cache.stats()["disk_bytes"] == 0
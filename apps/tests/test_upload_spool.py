@@ -0,0 +1,91 @@
+"""SpooledUpload size limits, memory-to-disk rollover and cleanup."""
+import io
+import pytest
+from utils import upload_spool
+from utils.upload_spool import SpooledUpload, UploadTooLargeError, spool_upload
+
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_spool, "_spool_dir", lambda: tmp_path)
+    return tmp_path
+
+
+class Upload(io.BytesIO):
+    """Streamlit UploadedFile stand-in: a file object that may declare its size."""
+
+    def __init__(self, data: bytes, size=None, name="clip.wav"):
+        super().__init__(data)
+        self.name = name
+        if size is not None:
+            self.size = size
+        self.reads = 0
+
+    def read(self, n=-1):
+        self.reads += 1
+        return super().read(n)
+
+
+def test_small_upload_stays_in_memory(spool_dir):
+    with SpooledUpload(max_bytes=100, memory_bytes=64).copy_from(b"x" * 64) as spool:
+        assert spool.in_memory
+        view = spool.buffer()
+        assert view.readonly and bytes(view) == b"x" * 64
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_large_upload_rolls_over_to_a_mapped_file(spool_dir):
+    data = bytes(range(256)) * 40
+    spool = SpooledUpload(max_bytes=len(data), memory_bytes=1000)
+    spool.copy_from(io.BytesIO(data), chunk_bytes=300)
+    assert not spool.in_memory and spool.size == len(data)
+    assert bytes(spool.buffer()) == data
+    assert list(spool_dir.iterdir()) == []  # anonymous temp file, nothing left to clean up
+    spool.close()
+    assert spool.closed
+
+
+def test_declared_size_is_rejected_before_reading():
+    upload = Upload(b"x" * 10, size=1000)
+    with pytest.raises(UploadTooLargeError, match="MB"):
+        SpooledUpload(max_bytes=100).copy_from(upload)
+    assert upload.reads == 0
+    with pytest.raises(UploadTooLargeError):
+        SpooledUpload(max_bytes=100).copy_from(bytearray(101))
+
+
+def test_undeclared_size_is_enforced_while_streaming():
+    spool = SpooledUpload(max_bytes=100, memory_bytes=10)
+    with pytest.raises(UploadTooLargeError):
+        spool.copy_from(Upload(b"x" * 101), chunk_bytes=16)
+    assert spool.size <= 100
+
+
+def test_limit_is_inclusive_and_zero_disables_it():
+    assert spool_upload(b"x" * 100, max_bytes=100).size == 100
+    assert spool_upload(b"x" * 5000, max_bytes=0).size == 5000
+
+
+def test_spool_upload_closes_on_error(monkeypatch):
+    created = []
+    original = upload_spool.SpooledUpload.__init__
+
+    def init(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        created.append(self)
+
+    monkeypatch.setattr(upload_spool.SpooledUpload, "__init__", init)
+    with pytest.raises(UploadTooLargeError):
+        spool_upload(Upload(b"x" * 200), max_bytes=100)
+    assert created[0].closed and created[0].name == "clip.wav"
+
+
+def test_spool_is_write_once():
+    spool = spool_upload(b"abc")
+    spool.buffer()
+    with pytest.raises(ValueError, match="closed for writing"):
+        spool.write(b"d")
+    spool.close()
+    spool.close()
+    with pytest.raises(ValueError):
+        spool.buffer()
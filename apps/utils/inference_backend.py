@@ -0,0 +1,100 @@
+"""
+inference_backend.py
+CPU inference backends shared by the Whisper and captioning model loaders.
+
+- default: the model as loaded (fp32 on CPU)
+- int8: dynamic int8 quantization of Linear layers (weights stored as int8,
+  activations quantized on the fly); CPU only
+- torchscript: the fixed-shape part of the model traced once and cached on
+  disk, so later processes load the compiled graph instead of re-tracing
+
+torch.set_num_threads is applied once per process from GENAI_TORCH_THREADS.
+"""
+from __future__ import annotations
+import os
+import threading
+import warnings
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+import torch
+from torch import nn
+
+BACKENDS = ("default", "int8", "torchscript")
+DEFAULT_BACKEND = os.environ.get("GENAI_INFERENCE_BACKEND", "default")
+# Intra-op threads for torch on CPU (0 keeps torch's own default)
+TORCH_THREADS = int(os.environ.get("GENAI_TORCH_THREADS", "0"))
+
+_threads_lock = threading.Lock()
+_threads_configured = False
+
+
+def validate_backend(backend: str, device: str, supported: Iterable[str] = BACKENDS) -> str:
+    """
+    Check a backend name against what a loader supports.
+    Raises:
+        ValueError for unknown backends, or int8 on a non-CPU device
+    """
+    backend = backend or "default"
+    supported = tuple(supported)
+    if backend not in supported:
+        raise ValueError(f"Unknown inference backend '{backend}' (expected one of {', '.join(supported)})")
+    if backend == "int8" and device != "cpu":
+        raise ValueError("The int8 backend uses CPU dynamic quantization and requires device='cpu'")
+    return backend
+
+
+def configure_threads(num_threads: Optional[int] = None):
+    """Apply torch.set_num_threads once per process (explicit argument or GENAI_TORCH_THREADS)."""
+    global _threads_configured
+    num_threads = num_threads or TORCH_THREADS
+    if not num_threads:
+        return
+    with _threads_lock:
+        if not _threads_configured or torch.get_num_threads() != num_threads:
+            torch.set_num_threads(num_threads)
+            _threads_configured = True
+
+
+def quantize_linear_int8(module: nn.Module, linear_types: Tuple[type, ...] = ()) -> nn.Module:
+    """
+    Dynamically quantize every Linear layer of module to int8 weights.
+    Args:
+        module: float model on CPU
+        linear_types: nn.Linear subclasses that only override forward() (e.g. whisper's
+            dtype-casting Linear); they are turned back into plain nn.Linear so the
+            quantizer recognises them
+    Returns:
+        the quantized module (modified in place)
+    """
+    if linear_types:
+        for child in module.modules():
+            if type(child) in linear_types:
+                child.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def load_or_trace(artifact: Path, build: Callable[[], Tuple[nn.Module, Tuple[torch.Tensor, ...]]],
+                  device: str = "cpu") -> torch.jit.ScriptModule:
+    """
+    Load a cached TorchScript artifact, tracing and saving it on first use.
+    Args:
+        artifact: path of the .pt file (include model name, device and torch version in it)
+        build: returns (module, example inputs) to trace when the artifact is missing
+        device: map_location for loading
+    """
+    artifact = Path(artifact)
+    if artifact.exists():
+        try:
+            return torch.jit.load(str(artifact), map_location=device)
+        except (RuntimeError, OSError):
+            artifact.unlink(missing_ok=True)  # stale or truncated artifact: rebuild below
+    module, example_inputs = build()
+    with torch.no_grad(), warnings.catch_warnings():
+        # Shape asserts become constants in the trace; inputs have a fixed shape anyway
+        warnings.simplefilter("ignore", torch.jit.TracerWarning)
+        traced = torch.jit.trace(module.eval(), example_inputs, check_trace=False)
+    artifact.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = artifact.with_suffix(f".{os.getpid()}.tmp")
+    torch.jit.save(traced, str(tmp_path))
+    os.replace(tmp_path, artifact)
+    return traced
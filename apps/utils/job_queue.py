@@ -0,0 +1,259 @@
+"""
+job_queue.py
+Process-wide background executor for inference jobs.
+
+Streamlit runs the page script on every interaction, so inference must not
+run inside it: the UI submits a job, stores the job id in session state and
+polls for status, progress and partial results until the job finishes.
+
+Jobs are routed to named pools (one per model). Each pool has its own bounded
+queue and worker threads, so a slow captioning job never holds up
+transcription. Admission control: a job is queued while its pool has room
+and rejected with QueueFullError once the queue is full. Jobs submitted with
+a key (e.g. a cache key of the input) are de-duplicated, so a rerun or a
+second session asking for the same work attaches to the existing job.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from utils.metrics import register_queue
+
+DEFAULT_QUEUE_SIZE = int(os.environ.get("GENAI_JOB_QUEUE_SIZE", "8"))
+DEFAULT_WORKERS = int(os.environ.get("GENAI_JOB_WORKERS", "1"))
+FINISHED_JOBS_KEPT = 256  # finished jobs remain pollable until this many newer ones finish
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class QueueFullError(RuntimeError):
+    """Raised by JobExecutor.submit when the target pool cannot take more work."""
+
+
+@dataclass
+class Job:
+    """
+    A unit of background work and its observable state.
+    The job function receives the Job and may call report() to publish
+    progress (0..1) and a partial result while it runs.
+    """
+    id: str
+    pool: str
+    fn: Callable[["Job"], Any] = field(repr=False)
+    key: Optional[str] = None
+    status: str = QUEUED
+    progress: float = 0.0
+    partial: Any = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent running (so far), or 0 while queued."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def report(self, progress: Optional[float] = None, partial: Any = None):
+        """Publish progress and/or a partial result from inside the job function."""
+        if progress is not None:
+            self.progress = min(1.0, max(0.0, progress))
+        if partial is not None:
+            self.partial = partial
+
+
+class _Pool:
+    def __init__(self, name: str, queue_size: int, workers: int):
+        self.name = name
+        self.queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max(1, queue_size))
+        self.workers = max(1, workers)
+        self.threads: List[threading.Thread] = []
+        self.busy = 0
+
+
+class JobExecutor:
+    """
+    Bounded, per-pool background job executor.
+    - submit(): enqueue work for a pool, de-duplicated by key; raises QueueFullError when full
+    - get(): look up a job by id to poll status/progress/partial/result
+    - cancel(): drop a job that has not started yet
+    Worker threads are started lazily per pool and run as daemons.
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, workers: int = DEFAULT_WORKERS,
+                 finished_kept: int = FINISHED_JOBS_KEPT):
+        self.queue_size = queue_size
+        self.workers = workers
+        self.finished_kept = finished_kept
+        self._pools: Dict[str, _Pool] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._active_keys: Dict[str, str] = {}  # job key -> id of a queued/running job
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def configure_pool(self, pool: str, queue_size: Optional[int] = None, workers: Optional[int] = None):
+        """Override queue size / worker count for a pool before its first job."""
+        with self._lock:
+            if pool not in self._pools:
+                self._pools[pool] = _Pool(pool, queue_size or self.queue_size, workers or self.workers)
+
+    def _pool_locked(self, name: str) -> _Pool:
+        pool = self._pools.get(name)
+        if pool is None:
+            pool = self._pools[name] = _Pool(name, self.queue_size, self.workers)
+        while len(pool.threads) < pool.workers:
+            thread = threading.Thread(target=self._work, args=(pool,), daemon=True,
+                                      name=f"job-{name}-{len(pool.threads)}")
+            pool.threads.append(thread)
+            thread.start()
+        return pool
+
+    def submit(self, pool: str, fn: Callable[[Job], Any], key: Optional[str] = None) -> Job:
+        """
+        Queue fn(job) on the named pool.
+        Args:
+            pool: Pool name, normally one per model (e.g. "whisper/tiny/cpu")
+            fn: Callable taking the Job; its return value becomes job.result
+            key: Optional de-duplication key; a queued or running job with the same
+                key (in any pool) is returned instead of queuing a new one
+        Returns:
+            The new or existing Job
+        Raises:
+            QueueFullError: if the pool's queue is full
+        """
+        with self._lock:
+            if key is not None and key in self._active_keys:
+                return self._jobs[self._active_keys[key]]
+            target = self._pool_locked(pool)
+            job = Job(id=f"{pool}:{next(self._ids)}", pool=pool, fn=fn, key=key)
+            try:
+                target.queue.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                raise QueueFullError(f"'{pool}' is busy ({target.queue.qsize()} jobs waiting); "
+                                     f"try again shortly") from None
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job.id
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with this id, or None if unknown or already forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key: str) -> Optional[Job]:
+        """Return the queued or running job submitted with this key, or None."""
+        with self._lock:
+            job_id = self._active_keys.get(key)
+            return self._jobs.get(job_id) if job_id is not None else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that is still queued. Returns True if it will not run."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            self._finish_locked(job, CANCELLED)
+            return True
+
+    def position(self, job: Job) -> int:
+        """Number of jobs ahead of a queued job in its pool (0 once running)."""
+        if job.status != QUEUED:
+            return 0
+        with self._lock:
+            pool = self._pools.get(job.pool)
+            if pool is None:
+                return 0
+            with pool.queue.mutex:
+                waiting = list(pool.queue.queue)
+        ahead = 0
+        for other in waiting:
+            if other is job:
+                break
+            if other is not None and other.status == QUEUED:
+                ahead += 1
+        return ahead
+
+    def _finish_locked(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.monotonic()
+        if job.key is not None and self._active_keys.get(job.key) == job.id:
+            del self._active_keys[job.key]
+        self._finished[job.id] = None
+        while len(self._finished) > self.finished_kept:
+            old_id, _ = self._finished.popitem(last=False)
+            self._jobs.pop(old_id, None)
+
+    def _work(self, pool: _Pool):
+        while True:
+            job = pool.queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.status != QUEUED:  # cancelled while waiting
+                    continue
+                job.status = RUNNING
+                job.started_at = time.monotonic()
+                pool.busy += 1
+            try:
+                result = job.fn(job)
+            except BaseException as e:  # reported to the poller, never kills the worker
+                with self._lock:
+                    job.error = e
+                    pool.busy -= 1
+                    self._finish_locked(job, FAILED)
+            else:
+                with self._lock:
+                    job.result = result
+                    job.progress = 1.0
+                    pool.busy -= 1
+                    self._finish_locked(job, DONE)
+
+    def stats(self) -> dict:
+        """Per-pool queue depth and busy workers, plus the rejection count."""
+        with self._lock:
+            return {
+                "rejected": self.rejected,
+                "pools": {
+                    name: {"queued": pool.queue.qsize(), "busy": pool.busy, "workers": pool.workers,
+                           "capacity": pool.queue.maxsize}
+                    for name, pool in self._pools.items()
+                },
+            }
+
+
+_executor: Optional[JobExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> JobExecutor:
+    """Return the process-wide JobExecutor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = JobExecutor()
+                executor = _executor
+                register_queue("job_executor", lambda: {
+                    (f"jobs/{name}",): pool["queued"] for name, pool in executor.stats()["pools"].items()})
+    return _executor
@@ -0,0 +1,78 @@
+"""
+job_queue_ui.py
+Streamlit side of the background job executor (utils.job_queue).
+
+run_in_background() submits a job once per input and re-attaches to it on
+every rerun; while it runs, a polling fragment shows queue position,
+progress and partial output without rerunning the page. The job function is
+only built when a job has to be submitted, so per-input setup (e.g. spooling
+an upload) is skipped on reruns.
+"""
+from typing import Any, Callable, Optional
+import streamlit as st
+from utils.job_queue import CANCELLED, DONE, FAILED, Job, QueueFullError, get_job_executor
+
+JOB_POLL_SECONDS = 1.0
+
+
+def run_in_background(name: str, pool: str, key: str, make_job: Callable[[], Optional[Callable[[Job], Any]]],
+                      label: str, render_partial: Optional[Callable[[Any], None]] = None) -> Optional[Any]:
+    """
+    Run a job on the background job executor instead of the script thread.
+    The job id is kept in session state under name, so reruns re-attach to the
+    running job instead of starting it again; a new key replaces it. A job
+    another session is already running for the same key is attached to as well.
+    Args:
+        name: Session-unique slot for this widget's job (e.g. "upload")
+        pool: Executor pool, normally one per model
+        key: Identity of the input (e.g. its cache key); also used for de-duplication
+        make_job: Builds the job function (which may call job.report(progress, partial));
+            called only when no job exists for key. Returns None to submit nothing,
+            after rendering why.
+        label: Text shown while waiting (e.g. "Transcribing")
+        render_partial: Renders job.partial while the job runs
+    Returns:
+        The job result once finished, otherwise None (status is rendered instead)
+    """
+    executor = get_job_executor()
+    state_key = f"job_{name}"
+    job = executor.get(st.session_state.get(state_key, ""))
+    if job is None or job.key != key:
+        job = executor.find(key)
+    if job is None:
+        fn = make_job()
+        if fn is None:
+            return None
+        try:
+            job = executor.submit(pool, fn, key=key)
+        except QueueFullError as e:
+            st.warning(f"{label} is not available right now: {e}")
+            return None
+    st.session_state[state_key] = job.id
+    if job.status == DONE:
+        return job.result
+    if job.status in (FAILED, CANCELLED):
+        st.error(f"{label} failed: {job.error or job.status}")
+        if st.button("Retry", key=f"{state_key}_retry"):
+            del st.session_state[state_key]
+            st.rerun()
+        return None
+    show_job_status(job.id, label, render_partial)
+    return None
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_status(job_id: str, label: str, render_partial: Optional[Callable[[Any], None]] = None):
+    """
+    Poll a job without rerunning the whole page; triggers a full rerun when it ends.
+    """
+    executor = get_job_executor()
+    job = executor.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    if job.started_at is None:
+        st.info(f"{label}: queued ({executor.position(job)} ahead)...")
+        return
+    st.progress(job.progress, text=f"{label}... {job.elapsed:.0f}s")
+    if job.partial is not None and render_partial is not None:
+        render_partial(job.partial)
@@ -0,0 +1,440 @@
+"""
+metrics.py
+Process-wide counters, gauges and latency histograms for the inference paths.
+
+Services wrap each stage in stage_timer(pipeline, stage) and count requests,
+cache lookups and model loads through the helpers below; queues register
+gauge collectors that are only read when a snapshot is taken. The snapshot
+is rendered as Prometheus text (the API's /metrics), JSON, or a plain-text
+table (CLI --profile and the UI panel).
+
+With GENAI_METRICS=0 every hook returns after a single flag check (timers
+hand back a shared no-op context manager), so instrumentation can stay on
+the hot path.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+METRICS_ENABLED = os.environ.get("GENAI_METRICS", "1").lower() not in ("0", "false", "no", "off")
+# Upper bounds in seconds; covers sub-millisecond VAD/resample steps up to long transcriptions
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0, math.inf)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, math.inf)
+FORMATS = ("table", "json", "prometheus")
+
+Labels = Tuple[str, ...]
+_NULL_TIMER = nullcontext()
+
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def reset(self):
+        """Drop recorded values (gauge collectors stay registered)."""
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value per label set.
+    Values are either set() directly or read from collectors, callables
+    returning {labels: value} that run only when a snapshot is taken.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._collectors: Dict[str, Callable[[], Dict[Labels, float]]] = {}
+
+    def set(self, value: float, labels: Labels = ()):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect_from(self, name: str, collector: Callable[[], Dict[Labels, float]]):
+        """Register (or replace) a collector under name."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            values = dict(self._values)
+            collectors = list(self._collectors.values())
+        for collector in collectors:
+            try:
+                values.update(collector())
+            except Exception:  # a broken collector must not break the snapshot
+                continue
+        return values
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class HistogramSeries(NamedTuple):
+    """Recorded values of one histogram label set."""
+    counts: List[int]  # per bucket (not cumulative)
+    sum: float
+    count: int
+    min: float
+    max: float
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (count, sum, cumulative buckets) per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != math.inf:
+            self.buckets += (math.inf,)
+        self._series: Dict[Labels, list] = {}  # labels -> [bucket counts, sum, count, min, max]
+
+    def observe(self, value: float, labels: Labels = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0, value, value]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+            if value < series[3]:
+                series[3] = value
+            elif value > series[4]:
+                series[4] = value
+
+    def series(self) -> Dict[Labels, HistogramSeries]:
+        """Copy of every label set's counts."""
+        with self._lock:
+            return {labels: HistogramSeries(list(counts), total, count, low, high)
+                    for labels, (counts, total, count, low, high) in self._series.items()}
+
+    def quantile(self, q: float, series: HistogramSeries) -> float:
+        """
+        Estimate a quantile by linear interpolation inside its bucket (as
+        Prometheus' histogram_quantile does), with the bucket narrowed to the
+        observed min/max.
+        """
+        if not series.count:
+            return 0.0
+        rank = q * series.count
+        seen = 0
+        estimate = series.max
+        for index, count in enumerate(series.counts):
+            if count and seen + count >= rank:
+                lower = max(self.buckets[index - 1] if index else 0.0, series.min)
+                upper = min(self.buckets[index], series.max)
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                break
+            seen += count
+        return estimate
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Named metrics plus the renderers for them.
+    - counter()/gauge()/histogram(): get or create a metric
+    - snapshot(): JSON-ready dict; histograms include p50/p95 estimates
+    - to_prometheus(): Prometheus text exposition format
+    - format_table(): human-readable summary for the CLI and UI
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _get(self, cls, name: str, help: str, labelnames: Iterable[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        """Clear recorded values (gauge collectors stay registered)."""
+        for metric in self.metrics():
+            metric.reset()
+        self.started = time.time()
+
+    def snapshot(self) -> dict:
+        """
+        Current values of every metric.
+        Returns:
+            {"enabled", "uptime_seconds", "metrics": {name: {"type", "help", "samples": [...]}}};
+            histogram samples carry count, sum, mean, p50, p95 and cumulative buckets
+        """
+        result = {}
+        for metric in self.metrics():
+            samples = []
+            if isinstance(metric, Histogram):
+                for labels, series in sorted(metric.series().items()):
+                    cumulative, running = {}, 0
+                    for bound, bucket_count in zip(metric.buckets, series.counts):
+                        running += bucket_count
+                        cumulative["+Inf" if bound == math.inf else bound] = running
+                    samples.append({"labels": dict(zip(metric.labelnames, labels)), "count": series.count,
+                                    "sum": series.sum, "mean": series.sum / series.count if series.count else 0.0,
+                                    "min": series.min, "max": series.max, "p50": metric.quantile(0.5, series),
+                                    "p95": metric.quantile(0.95, series), "buckets": cumulative})
+            else:
+                for labels, value in sorted(metric.values().items()):
+                    samples.append({"labels": dict(zip(metric.labelnames, labels)), "value": value})
+            result[metric.name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+        return {"enabled": self.enabled, "uptime_seconds": time.time() - self.started, "metrics": result}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for labels, series in sorted(metric.series().items()):
+                    running = 0
+                    for bound, bucket_count in zip(metric.buckets, series.counts):
+                        running += bucket_count
+                        le = _format_labels(metric.labelnames, labels, f'le="{_format_value(bound)}"')
+                        lines.append(f"{metric.name}_bucket{le} {running}")
+                    label_text = _format_labels(metric.labelnames, labels)
+                    lines.append(f"{metric.name}_sum{label_text} {_format_value(series.sum)}")
+                    lines.append(f"{metric.name}_count{label_text} {series.count}")
+            else:
+                for labels, value in sorted(metric.values().items()):
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def render(self, fmt: str = "table") -> str:
+        """Snapshot as "table", "json" or "prometheus" text."""
+        if fmt == "json":
+            return self.to_json()
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        return self.format_table()
+
+    def format_table(self) -> str:
+        """Histograms as count / mean / p50 / p95 / max rows (ms), then counters and gauges."""
+        metrics = self.metrics()
+        rows = {metric.name: sorted(metric.series().items() if isinstance(metric, Histogram)
+                                    else metric.values().items()) for metric in metrics}
+        width = max([len("/".join(labels)) for values in rows.values() for labels, _ in values] + [12]) + 2
+        lines = []
+        for metric in metrics:
+            if not isinstance(metric, Histogram) or not rows[metric.name]:
+                continue
+            scale, unit = (1000.0, "ms") if metric.name.endswith("_seconds") else (1.0, "value")
+            lines.append(f"{metric.name} ({unit})")
+            lines.append(f"  {'labels':<{width}}{'count':>8}{'mean':>11}{'p50':>11}{'p95':>11}{'max':>11}")
+            for labels, series in rows[metric.name]:
+                lines.append(f"  {'/'.join(labels) or '-':<{width}}{series.count:>8}"
+                             f"{series.sum / series.count * scale:>11.2f}{metric.quantile(0.5, series) * scale:>11.2f}"
+                             f"{metric.quantile(0.95, series) * scale:>11.2f}{series.max * scale:>11.2f}")
+        for metric in metrics:
+            if isinstance(metric, Histogram) or not rows[metric.name]:
+                continue
+            lines.append(f"{metric.name} ({metric.kind})")
+            for labels, value in rows[metric.name]:
+                lines.append(f"  {'/'.join(labels) or '-':<{width}}{value:>12g}")
+        return "\n".join(lines) if lines else "no metrics recorded"
+
+
+# Created at import time (cheap) so the hooks below never take a lock to find it
+_metrics = MetricsRegistry()
+
+STAGE_SECONDS = _metrics.histogram("genai_stage_seconds", "Time spent in one stage of an inference pipeline",
+                                   ("pipeline", "stage"))
+REQUEST_SECONDS = _metrics.histogram("genai_request_seconds", "End-to-end time of an inference request",
+                                     ("pipeline",))
+REQUESTS = _metrics.counter("genai_requests_total", "Inference requests started", ("pipeline",))
+REQUEST_ERRORS = _metrics.counter("genai_request_errors_total", "Inference requests that raised", ("pipeline",))
+CACHE_LOOKUPS = _metrics.counter("genai_cache_lookups_total", "Result cache lookups by outcome",
+                                 ("cache", "result"))
+MODEL_LOAD_SECONDS = _metrics.histogram("genai_model_load_seconds", "Time to load model weights", ("model",))
+BATCH_SIZE = _metrics.histogram("genai_batch_size", "Items per batched model pass", ("pipeline",),
+                                buckets=SIZE_BUCKETS)
+QUEUE_DEPTH = _metrics.gauge("genai_queue_depth", "Items waiting in a queue", ("queue",))
+MODEL_MEMORY = _metrics.gauge("genai_model_memory_bytes", "Estimated memory held by loaded models")
+
+
+class _RequestTimer:
+    __slots__ = ("labels", "started")
+
+    def __init__(self, pipeline: str):
+        self.labels = (pipeline,)
+
+    def __enter__(self):
+        REQUESTS.inc(self.labels)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REQUEST_SECONDS.observe(time.perf_counter() - self.started, self.labels)
+        if exc_type is not None:
+            REQUEST_ERRORS.inc(self.labels)
+        return False
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide MetricsRegistry."""
+    return _metrics
+
+
+def set_metrics_enabled(enabled: bool):
+    """Turn the hooks on or off at runtime (e.g. CLI --profile)."""
+    _metrics.enabled = enabled
+
+
+def stage_timer(pipeline: str, stage: str):
+    """
+    Context manager timing one pipeline stage into genai_stage_seconds.
+    Args:
+        pipeline: "whisper" or "caption"
+        stage: Stage name (e.g. "load_audio", "mel", "encode", "decode")
+    """
+    if not _metrics.enabled:
+        return _NULL_TIMER
+    return _Timer(STAGE_SECONDS, (pipeline, stage))
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float):
+    """Record a stage duration measured elsewhere (e.g. time spent waiting in a queue)."""
+    if _metrics.enabled:
+        STAGE_SECONDS.observe(seconds, (pipeline, stage))
+
+
+def request_timer(pipeline: str):
+    """Context manager counting one request (and its failure) and timing it end to end."""
+    if not _metrics.enabled:
+        return _NULL_TIMER
+    return _RequestTimer(pipeline)
+
+
+def count_requests(pipeline: str, amount: int = 1):
+    """Count requests answered without a request_timer (e.g. batched captions)."""
+    if _metrics.enabled and amount:
+        REQUESTS.inc((pipeline,), amount)
+
+
+def record_cache_lookup(cache: str, result: str):
+    """Count a cache lookup; result is "hit", "near_hit" or "miss"."""
+    if _metrics.enabled:
+        CACHE_LOOKUPS.inc((cache, result))
+
+
+def record_batch(pipeline: str, size: int):
+    if _metrics.enabled:
+        BATCH_SIZE.observe(size, (pipeline,))
+
+
+def model_load_timer(model: str):
+    """Context manager timing a model load into genai_model_load_seconds."""
+    if not _metrics.enabled:
+        return _NULL_TIMER
+    return _Timer(MODEL_LOAD_SECONDS, (model,))
+
+
+def register_queue(name: str, depth: Callable[[], Dict[Labels, float]]):
+    """
+    Report queue depth through genai_queue_depth.
+    Args:
+        name: Collector name (re-registering replaces it)
+        depth: Callable returning {(queue_name,): items waiting}, read at snapshot time
+    """
+    QUEUE_DEPTH.collect_from(name, depth)
@@ -0,0 +1,79 @@
+"""
+metrics_ui.py
+Streamlit "Performance metrics" panel over the process-wide metrics (utils.metrics).
+"""
+import streamlit as st
+from utils.metrics import get_metrics
+
+
+def _samples(snapshot: dict, name: str) -> list:
+    return snapshot["metrics"].get(name, {}).get("samples", [])
+
+
+@st.fragment
+def show_metrics_panel():
+    """
+    Expandable panel with per-stage latency, request counters, batching,
+    cache counters and queue depth from utils.metrics. Refresh reruns only
+    this panel.
+    """
+    metrics = get_metrics()
+    with st.expander("Performance metrics"):
+        if not metrics.enabled:
+            st.caption("Metrics are disabled (GENAI_METRICS=0).")
+            return
+        st.button("Refresh", key="metrics_refresh")
+        snapshot = metrics.snapshot()
+        stages = [{"pipeline": s["labels"]["pipeline"], "stage": s["labels"]["stage"], "count": s["count"],
+                   "mean ms": round(s["mean"] * 1000, 2), "p50 ms": round(s["p50"] * 1000, 2),
+                   "p95 ms": round(s["p95"] * 1000, 2)}
+                  for s in _samples(snapshot, "genai_stage_seconds")]
+        if not stages:
+            st.caption("No inference has run in this process yet.")
+            return
+        st.dataframe(stages, hide_index=True, width='stretch')
+
+        errors = {s["labels"]["pipeline"]: s["value"] for s in _samples(snapshot, "genai_request_errors_total")}
+        latency = {s["labels"]["pipeline"]: s for s in _samples(snapshot, "genai_request_seconds")}
+        requests = []
+        for sample in _samples(snapshot, "genai_requests_total"):
+            pipeline = sample["labels"]["pipeline"]
+            row = {"pipeline": pipeline, "requests": int(sample["value"]), "errors": int(errors.get(pipeline, 0))}
+            if pipeline in latency:
+                row["p50 ms"] = round(latency[pipeline]["p50"] * 1000, 1)
+                row["p95 ms"] = round(latency[pipeline]["p95"] * 1000, 1)
+            requests.append(row)
+        if requests:
+            st.dataframe(requests, hide_index=True, width='stretch')
+
+        # How well concurrent requests share model passes (DynamicBatcher, caption batches)
+        queue_wait = {s["labels"]["pipeline"]: s for s in _samples(snapshot, "genai_stage_seconds")
+                      if s["labels"]["stage"] == "batch_queue"}
+        batches = []
+        for sample in _samples(snapshot, "genai_batch_size"):
+            pipeline = sample["labels"]["pipeline"]
+            row = {"pipeline": pipeline, "passes": sample["count"], "items": int(sample["sum"]),
+                   "mean batch": round(sample["mean"], 1)}
+            if pipeline in queue_wait:
+                row["queue p50 ms"] = round(queue_wait[pipeline]["p50"] * 1000, 1)
+                row["queue p95 ms"] = round(queue_wait[pipeline]["p95"] * 1000, 1)
+            batches.append(row)
+        if batches:
+            st.dataframe(batches, hide_index=True, width='stretch')
+
+        lookups = {}
+        for sample in _samples(snapshot, "genai_cache_lookups_total"):
+            counts = lookups.setdefault(sample["labels"]["cache"], {})
+            counts[sample["labels"]["result"]] = int(sample["value"])
+        lines = [f"{cache} cache: {sum(v for r, v in counts.items() if r != 'miss')} hits / "
+                 f"{counts.get('miss', 0)} misses" for cache, counts in lookups.items()]
+        lines += [f"{s['labels']['queue']}: {int(s['value'])} waiting" for s in _samples(snapshot, "genai_queue_depth")]
+        lines += [f"load {s['labels']['model']}: {s['sum']:.1f}s" for s in _samples(snapshot, "genai_model_load_seconds")]
+        if lines:
+            st.caption(" | ".join(lines))
+
+        col_prom, col_json = st.columns(2)
+        col_prom.download_button("Download (Prometheus)", metrics.to_prometheus(), file_name="metrics.prom",
+                                 mime="text/plain")
+        col_json.download_button("Download (JSON)", metrics.to_json(), file_name="metrics.json",
+                                 mime="application/json")
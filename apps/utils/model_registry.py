@@ -0,0 +1,188 @@
+"""
+model_registry.py
+Process-wide registry of loaded models shared by every Streamlit session.
+
+Models are keyed by (name, device, dtype, backend), loaded once under a
+per-key lock, reference counted while in use and evicted least-recently-used
+first when the configured memory budget is exceeded.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional
+from utils.metrics import MODEL_MEMORY, model_load_timer
+
+# Memory budget for all registered models, in megabytes (0 disables eviction).
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("GENAI_MODEL_MEMORY_BUDGET_MB", "4096"))
+
+
+class ModelKey(NamedTuple):
+    """Identity of a loaded model."""
+    name: str
+    device: str
+    dtype: str
+    backend: str = "default"  # inference backend (see utils.inference_backend)
+
+    @property
+    def model_id(self) -> str:
+        """Identifier of the variant in cache keys and stored results ("name/device/dtype/backend")."""
+        return "/".join(self)
+
+
+@dataclass
+class _Entry:
+    model: Any
+    size_bytes: int
+    refcount: int = 0
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Estimate memory held by a model from its parameters and buffers.
+    Works for torch modules and HuggingFace pipelines (via ``pipeline.model``).
+    Returns:
+        Size in bytes (0 if it cannot be determined)
+    """
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+    total = 0
+    for tensor in module.parameters():
+        total += tensor.numel() * tensor.element_size()
+    for tensor in getattr(module, "buffers", lambda: [])():
+        total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelRegistry:
+    """
+    Thread-safe, process-level cache of loaded models.
+    - get(): load once (or return cached) and mark as recently used
+    - lease(): context manager pinning a model so it cannot be evicted while in use
+    - acquire()/release(): explicit reference counting behind lease()
+    """
+
+    def __init__(self, memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB):
+        self.memory_budget_bytes = max(0, memory_budget_mb) * 1024 * 1024
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def _load_lock(self, key: ModelKey) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _lookup(self, key: ModelKey, pin: bool) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if pin:
+                entry.refcount += 1
+            return entry.model
+
+    def _load(self, key: ModelKey, loader: Callable[[], Any], pin: bool) -> Any:
+        model = self._lookup(key, pin)
+        if model is not None:
+            return model
+        # Only one thread loads a given key; others wait and then hit the cache.
+        with self._load_lock(key):
+            model = self._lookup(key, pin)
+            if model is not None:
+                return model
+            with model_load_timer(key.model_id):
+                model = loader()
+            entry = _Entry(model=model, size_bytes=estimate_model_bytes(model), refcount=1 if pin else 0)
+            with self._lock:
+                self._entries[key] = entry
+                self._evict_locked(protect=key)
+            return model
+
+    def _evict_locked(self, protect: ModelKey):
+        """Drop least-recently-used, unreferenced models until within budget."""
+        if not self.memory_budget_bytes:
+            return
+        for key in list(self._entries):
+            if self.total_bytes_locked() <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if key == protect or entry.refcount > 0:
+                continue
+            del self._entries[key]
+
+    def total_bytes_locked(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def get(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model for key, loading it with loader on first use.
+        Args:
+            key: ModelKey identifying the model
+            loader: Zero-argument callable performing the actual load
+        Returns:
+            The shared model instance
+        """
+        return self._load(key, loader, pin=False)
+
+    def acquire(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """Like get(), but increments the reference count (pair with release())."""
+        return self._load(key, loader, pin=True)
+
+    def release(self, key: ModelKey):
+        """Decrement the reference count taken by acquire()."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.refcount > 0:
+                entry.refcount -= 1
+            self._evict_locked(protect=None)
+
+    @contextmanager
+    def lease(self, key: ModelKey, loader: Callable[[], Any]) -> Iterator[Any]:
+        """Pin the model for the duration of a with-block."""
+        model = self.acquire(key, loader)
+        try:
+            yield model
+        finally:
+            self.release(key)
+
+    def evict(self, key: ModelKey) -> bool:
+        """Remove an unreferenced model explicitly. Returns True if removed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refcount > 0:
+                return False
+            del self._entries[key]
+            return True
+
+    def stats(self) -> dict:
+        """Snapshot of loaded models, their sizes and reference counts."""
+        with self._lock:
+            return {
+                "budget_bytes": self.memory_budget_bytes,
+                "total_bytes": self.total_bytes_locked(),
+                "models": [
+                    {"key": tuple(key), "size_bytes": e.size_bytes, "refcount": e.refcount}
+                    for key, e in self._entries.items()
+                ],
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide ModelRegistry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+                registry = _registry
+                MODEL_MEMORY.collect_from("model_registry", lambda: {(): registry.stats()["total_bytes"]})
+    return _registry
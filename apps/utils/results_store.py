@@ -0,0 +1,321 @@
+"""Persistent, searchable store of transcripts and captions.
+
+Every result (transcript or caption) is kept as one row of a SQLite database
+under the FileHelper resource root, with its segments, model, language,
+audio duration, processing time and a content hash of the input. A row is
+unique per (kind, model, content hash), so storing the same input again
+updates it instead of adding a duplicate.
+
+Text is indexed with FTS5 (external content, kept in sync by triggers), and
+both listing and search page by id (keyset pagination: "rows older than the
+last id seen"), so every page is an index range scan however deep it is.
+Needs SQLite 3.35+ (upsert with RETURNING); without FTS5 support in the
+SQLite build, search falls back to LIKE.
+"""
+from __future__ import annotations
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from utils.file_helper import FileHelper
+
+TRANSCRIPT = "transcript"
+CAPTION = "caption"
+DEFAULT_PAGE_SIZE = 50
+BULK_CHUNK = 500  # records per transaction in add_many
+STORE_APP = "results"
+STORE_FILE = "results.sqlite3"
+
+_FIELDS = ("kind", "source", "content_hash", "model", "language", "text", "duration", "elapsed", "created")
+_COLUMNS = "id, " + ", ".join(_FIELDS)
+_TOKEN = re.compile(r"\w+\*?")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results ("
+    " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, source TEXT NOT NULL DEFAULT '', content_hash TEXT,"
+    " model TEXT NOT NULL DEFAULT '', language TEXT, text TEXT NOT NULL, duration REAL, elapsed REAL,"
+    " created REAL NOT NULL)",
+    # NULL content hashes are distinct, so results without a hash are never merged
+    "CREATE UNIQUE INDEX IF NOT EXISTS results_content ON results (kind, model, content_hash)",
+    "CREATE INDEX IF NOT EXISTS results_kind ON results (kind, id)",
+    "CREATE TABLE IF NOT EXISTS segments ("
+    " result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE, idx INTEGER NOT NULL,"
+    " start REAL NOT NULL, end REAL NOT NULL, text TEXT NOT NULL, PRIMARY KEY (result_id, idx)) WITHOUT ROWID",
+)
+_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5("
+    " text, source, content='results', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS results_ai AFTER INSERT ON results BEGIN"
+    " INSERT INTO results_fts (rowid, text, source) VALUES (new.id, new.text, new.source); END",
+    "CREATE TRIGGER IF NOT EXISTS results_ad AFTER DELETE ON results BEGIN"
+    " INSERT INTO results_fts (results_fts, rowid, text, source) VALUES ('delete', old.id, old.text, old.source);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS results_au AFTER UPDATE OF text, source ON results BEGIN"
+    " INSERT INTO results_fts (results_fts, rowid, text, source) VALUES ('delete', old.id, old.text, old.source);"
+    " INSERT INTO results_fts (rowid, text, source) VALUES (new.id, new.text, new.source); END",
+)
+
+
+@dataclass
+class StoredResult:
+    """One stored transcript or caption."""
+    id: int
+    kind: str
+    source: str
+    content_hash: Optional[str]
+    model: str
+    language: Optional[str]
+    text: str
+    duration: Optional[float]  # audio length in seconds (transcripts)
+    elapsed: Optional[float]  # processing time in seconds, when measured
+    created: float
+    snippet: Optional[str] = None  # highlighted match, set by search()
+    segments: List[Tuple[float, float, str]] = field(default_factory=list)  # filled by get()
+
+
+class ResultPage(NamedTuple):
+    """A page of results, newest first; pass next_cursor as `before` to get the next page."""
+    results: List[StoredResult]
+    next_cursor: Optional[int]
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word must match, a trailing
+    `*` makes a word a prefix match, and FTS5 operators are treated as words.
+    Returns:
+        query string, or None when the text has no words
+    """
+    terms = []
+    for token in _TOKEN.findall(text):
+        word, prefix = (token[:-1], "*") if token.endswith("*") else (token, "")
+        terms.append(f'"{word}"{prefix}')
+    return " ".join(terms) or None
+
+
+def transcription_record(result, **fields) -> dict:
+    """
+    Store fields for a TranscriptionResult (language, text, duration, segments).
+    Args:
+        result: TranscriptionResult
+        fields: source, content_hash, model, elapsed
+    """
+    return dict(kind=TRANSCRIPT, text=result.text, language=result.language, duration=result.duration,
+                segments=result.segments, **fields)
+
+
+def _segment(segment) -> Tuple[float, float, str]:
+    if isinstance(segment, (tuple, list)):
+        return float(segment[0]), float(segment[1]), str(segment[2])
+    return float(segment.start), float(segment.end), segment.text
+
+
+class ResultsStore:
+    """
+    SQLite store of results with full-text search.
+    - add() / add_many(): insert or update results (add_many in chunked transactions)
+    - page(): list results newest first, optionally by kind/model
+    - search(): full-text search, newest first, with highlighted snippets
+    - get(): one result with its segments
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        try:
+            for statement in _FTS_SCHEMA:
+                self._conn.execute(statement)
+            self.full_text = True
+        except sqlite3.OperationalError:  # SQLite built without FTS5
+            self.full_text = False
+        self._conn.commit()
+
+    def _insert_locked(self, kind: str, text: str, source: str = "", content_hash: Optional[str] = None,
+                       model: str = "", language: Optional[str] = None, duration: Optional[float] = None,
+                       elapsed: Optional[float] = None, segments: Optional[Iterable] = None,
+                       created: Optional[float] = None) -> int:
+        values = (kind, source, content_hash, model, language, text, duration, elapsed,
+                  time.time() if created is None else created)
+        cursor = self._conn.execute(
+            f"INSERT INTO results ({', '.join(_FIELDS)}) VALUES ({', '.join('?' * len(_FIELDS))})"
+            " ON CONFLICT (kind, model, content_hash) DO UPDATE SET source = excluded.source,"
+            " language = excluded.language, text = excluded.text, duration = excluded.duration,"
+            " elapsed = excluded.elapsed, created = excluded.created RETURNING id", values)
+        (result_id,) = cursor.fetchone()
+        if content_hash is not None:  # the upsert may have replaced an earlier result
+            self._conn.execute("DELETE FROM segments WHERE result_id = ?", (result_id,))
+        if segments:
+            self._conn.executemany("INSERT INTO segments (result_id, idx, start, end, text) VALUES (?, ?, ?, ?, ?)",
+                                   [(result_id, i, *_segment(s)) for i, s in enumerate(segments)])
+        return result_id
+
+    def add(self, kind: str, text: str, **fields) -> int:
+        """
+        Store one result, replacing an earlier one for the same kind, model and content hash.
+        Args:
+            kind: TRANSCRIPT or CAPTION
+            text: transcript or caption text
+            fields: source, content_hash, model, language, duration, elapsed,
+                segments (TranscriptSegment objects or (start, end, text) tuples), created
+        Returns:
+            id of the stored result
+        """
+        with self._lock, self._conn:
+            return self._insert_locked(kind, text, **fields)
+
+    def add_many(self, records: Iterable[dict], chunk: int = BULK_CHUNK) -> int:
+        """
+        Bulk insert records (keyword dicts as for add()), committing every
+        `chunk` records so a large batch neither holds the write lock for long
+        nor pays one commit per row.
+        Returns:
+            number of records stored
+        """
+        stored = 0
+        batch: List[dict] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= chunk:
+                stored += self._add_batch(batch)
+                batch = []
+        if batch:
+            stored += self._add_batch(batch)
+        return stored
+
+    def _add_batch(self, batch: List[dict]) -> int:
+        with self._lock, self._conn:
+            for record in batch:
+                self._insert_locked(**record)
+        return len(batch)
+
+    def _page(self, rows: list, limit: int) -> ResultPage:
+        results = [StoredResult(*row) for row in rows[:limit]]
+        return ResultPage(results, results[-1].id if len(rows) > limit else None)
+
+    def page(self, kind: Optional[str] = None, model: Optional[str] = None, before: Optional[int] = None,
+             limit: int = DEFAULT_PAGE_SIZE) -> ResultPage:
+        """
+        List results newest first.
+        Args:
+            kind / model: optional filters
+            before: next_cursor of the previous page
+            limit: page size
+        """
+        where, params = self._filters(kind, model, before, "id")
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM results{where} ORDER BY id DESC LIMIT ?",
+                                      (*params, limit + 1)).fetchall()
+        return self._page(rows, limit)
+
+    def search(self, query: str, kind: Optional[str] = None, model: Optional[str] = None,
+               before: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE) -> ResultPage:
+        """
+        Full-text search over text and source names, newest first. All words
+        must match (case and accent insensitive); `word*` matches a prefix.
+        Args:
+            query: free text
+            kind / model: optional filters
+            before: next_cursor of the previous page
+            limit: page size
+        """
+        if not self.full_text:
+            return self._search_like(query, kind, model, before, limit)
+        match = fts_query(query)
+        if match is None:
+            return self.page(kind, model, before, limit)
+        where, params = self._filters(kind, model, before, "results_fts.rowid", prefix="r.")
+        columns = ", ".join(f"r.{column}" for column in _COLUMNS.split(", "))
+        sql = (f"SELECT {columns}, snippet(results_fts, 0, '[', ']', '…', 16) FROM results_fts"
+               f" JOIN results r ON r.id = results_fts.rowid WHERE results_fts MATCH ?"
+               f"{where.replace(' WHERE', ' AND')} ORDER BY results_fts.rowid DESC LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(sql, (match, *params, limit + 1)).fetchall()
+        return self._page(rows, limit)
+
+    def _search_like(self, query, kind, model, before, limit) -> ResultPage:
+        words = [word.rstrip("*") for word in _TOKEN.findall(query)]
+        where, params = self._filters(kind, model, before, "id")
+        for word in words:
+            where += (" AND" if where else " WHERE") + " (text LIKE ? OR source LIKE ?)"
+            params += [f"%{word}%"] * 2
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM results{where} ORDER BY id DESC LIMIT ?",
+                                      (*params, limit + 1)).fetchall()
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _filters(kind, model, before, id_column: str, prefix: str = "") -> Tuple[str, list]:
+        clauses, params = [], []
+        if kind:
+            clauses.append(f"{prefix}kind = ?")
+            params.append(kind)
+        if model:
+            clauses.append(f"{prefix}model = ?")
+            params.append(model)
+        if before is not None:
+            clauses.append(f"{id_column} < ?")
+            params.append(before)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def get(self, result_id: int) -> Optional[StoredResult]:
+        """Return one result with its segments, or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM results WHERE id = ?", (result_id,)).fetchone()
+            if row is None:
+                return None
+            result = StoredResult(*row)
+            result.segments = self._conn.execute(
+                "SELECT start, end, text FROM segments WHERE result_id = ? ORDER BY idx", (result_id,)).fetchall()
+        return result
+
+    def find(self, kind: str, model: str, content_hash: str) -> Optional[StoredResult]:
+        """Return the stored result for an input already processed by this model, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM results WHERE kind = ? AND model = ? AND content_hash = ?",
+                                     (kind, model, content_hash)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def delete(self, result_id: int) -> bool:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM results WHERE id = ?", (result_id,)).rowcount > 0
+
+    def count(self, kind: Optional[str] = None) -> int:
+        where, params = self._filters(kind, None, None, "id")
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM results{where}", params).fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments")
+            self._conn.execute("DELETE FROM results")
+            if self.full_text:
+                self._conn.execute("INSERT INTO results_fts (results_fts) VALUES ('delete-all')")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT kind, COUNT(*) FROM results GROUP BY kind").fetchall())
+        return {"transcripts": counts.get(TRANSCRIPT, 0), "captions": counts.get(CAPTION, 0),
+                "full_text": self.full_text}
+
+
+_store: Optional[ResultsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_results_store() -> ResultsStore:
+    """Return the process-wide ResultsStore stored under the FileHelper resource root."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultsStore(FileHelper(STORE_APP).get_app_resource_dir() / STORE_FILE)
+    return _store
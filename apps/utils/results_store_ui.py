@@ -0,0 +1,54 @@
+"""
+results_store_ui.py
+Streamlit "Saved results" panel: browse and search the results store (utils.results_store).
+"""
+import time
+from typing import Optional
+import streamlit as st
+from utils.results_store import CAPTION, TRANSCRIPT, get_results_store
+
+
+def _results_view_changed():
+    st.session_state["results_cursors"] = [None]
+
+
+def _results_page(step: int, cursor: Optional[int] = None):
+    cursors = st.session_state["results_cursors"]
+    if step > 0:
+        cursors.append(cursor)
+    elif len(cursors) > 1:
+        cursors.pop()
+
+
+@st.fragment
+def show_results_panel():
+    """
+    Expandable history of saved transcripts and captions with full-text search.
+    Pages are fetched by keyset (older than the last row shown), and paging
+    or searching reruns only this panel.
+    """
+    store = get_results_store()
+    with st.expander("Saved results"):
+        col_query, col_kind = st.columns([3, 1])
+        query = col_query.text_input("Search transcripts and captions", key="results_query",
+                                     on_change=_results_view_changed)
+        kind = col_kind.selectbox("Type", ("all", TRANSCRIPT, CAPTION), key="results_kind",
+                                  on_change=_results_view_changed)
+        kind = None if kind == "all" else kind
+        cursors = st.session_state.setdefault("results_cursors", [None])
+        page = store.search(query, kind=kind, before=cursors[-1]) if query.strip() \
+            else store.page(kind=kind, before=cursors[-1])
+        stats = store.stats()
+        st.caption(f"{stats['transcripts']} transcripts, {stats['captions']} captions saved")
+        if not page.results:
+            st.caption("No matching results." if query.strip() else "Nothing saved yet.")
+            return
+        rows = [{"saved": time.strftime("%Y-%m-%d %H:%M", time.localtime(r.created)), "type": r.kind,
+                 "source": r.source, "model": r.model, "language": r.language or "",
+                 "text": r.snippet or r.text, "audio s": r.duration, "took s": r.elapsed} for r in page.results]
+        st.dataframe(rows, hide_index=True, width='stretch')
+        col_newer, col_older = st.columns(2)
+        col_newer.button("Newer", key="results_newer", disabled=len(cursors) == 1,
+                         on_click=_results_page, args=(-1,))
+        col_older.button("Older", key="results_older", disabled=page.next_cursor is None,
+                         on_click=_results_page, args=(1, page.next_cursor))
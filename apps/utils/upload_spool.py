@@ -0,0 +1,181 @@
+"""
+upload_spool.py
+Chunked, size-limited spooling of uploaded files.
+
+Each request gets its own SpooledUpload. Data is copied in CHUNK_BYTES
+pieces: small uploads stay in memory, larger ones roll over to an anonymous
+temporary file under the FileHelper resource root. The file is unlinked as
+soon as it is created, so nothing is left on disk even if the process dies,
+and two sessions can never read each other's audio. The size limit is
+enforced while copying, before anything is decoded.
+
+Readers get a zero-copy memoryview (the in-memory buffer, or an mmap of the
+spool file); close() releases it, or use the spool as a context manager.
+"""
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+from utils.file_helper import FileHelper
+
+MAX_UPLOAD_MB = int(os.environ.get("GENAI_UPLOAD_MAX_MB", "200"))
+MAX_AUDIO_SECONDS = float(os.environ.get("GENAI_UPLOAD_MAX_SECONDS", "3600"))
+SPOOL_MEMORY_MB = int(os.environ.get("GENAI_UPLOAD_SPOOL_MEMORY_MB", "8"))
+CHUNK_BYTES = 1024 * 1024
+SPOOL_SUBDIR = "upload_spool"
+
+UploadSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+def _spool_dir() -> Path:
+    return FileHelper("uploads").get_subdir(SPOOL_SUBDIR)
+
+
+class SpooledUpload:
+    """
+    Write-once spool for one upload.
+    - write(): append a chunk, raising UploadTooLargeError past max_bytes
+    - buffer(): zero-copy memoryview of everything written
+    - close(): drop the data (also on garbage collection)
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, memory_bytes: Optional[int] = None,
+                 name: str = ""):
+        self.max_bytes = MAX_UPLOAD_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.memory_bytes = SPOOL_MEMORY_MB * 1024 * 1024 if memory_bytes is None else memory_bytes
+        self.name = name
+        self.size = 0
+        self._file: Union[io.BytesIO, BinaryIO] = io.BytesIO()
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+    @property
+    def in_memory(self) -> bool:
+        return isinstance(self._file, io.BytesIO)
+
+    @property
+    def closed(self) -> bool:
+        return self._file is None
+
+    def write(self, chunk) -> int:
+        """
+        Append a chunk.
+        Raises:
+            UploadTooLargeError: if the upload grows past max_bytes
+            ValueError: if the spool was already read or closed
+        """
+        if self._file is None or self._view is not None:
+            raise ValueError("spool is closed for writing")
+        n = len(chunk)
+        if self.max_bytes and self.size + n > self.max_bytes:
+            raise self._too_large()
+        if self.in_memory and self.size + n > self.memory_bytes:
+            self._roll_over()
+        self._file.write(chunk)
+        self.size += n
+        return n
+
+    def _too_large(self) -> UploadTooLargeError:
+        return UploadTooLargeError(f"upload larger than {self.max_bytes / (1024 * 1024):.3g} MB")
+
+    def _roll_over(self):
+        """Move the in-memory data to an anonymous temporary file."""
+        spooled = tempfile.TemporaryFile(dir=_spool_dir(), prefix="upload-")
+        spooled.write(self._file.getbuffer())
+        self._file = spooled
+
+    def copy_from(self, source: UploadSource, chunk_bytes: int = CHUNK_BYTES) -> "SpooledUpload":
+        """
+        Copy bytes or a readable file object into the spool chunk by chunk.
+        The declared size (len() / .size) is checked first, so an oversized
+        upload is rejected without copying anything.
+        """
+        declared = len(source) if isinstance(source, (bytes, bytearray, memoryview)) \
+            else getattr(source, "size", None)
+        if self.max_bytes and isinstance(declared, int) and self.size + declared > self.max_bytes:
+            raise self._too_large()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source).cast("B")
+            for start in range(0, len(view), chunk_bytes):
+                self.write(view[start:start + chunk_bytes])
+            return self
+        if hasattr(source, "seek"):
+            source.seek(0)
+        while True:
+            chunk = source.read(chunk_bytes)
+            if not chunk:
+                return self
+            self.write(chunk)
+
+    def buffer(self) -> memoryview:
+        """
+        Read-only view of the spooled bytes; the spool accepts no more writes afterwards.
+        """
+        if self._file is None:
+            raise ValueError("spool is closed")
+        if self._view is None:
+            if self.in_memory:
+                self._view = self._file.getbuffer().toreadonly()
+            elif self.size == 0:
+                self._view = memoryview(b"")
+            else:
+                self._file.flush()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+        return self._view
+
+    def close(self):
+        """Release the buffer and the spool file. Safe to call more than once."""
+        if getattr(self, "_file", None) is None:
+            return
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                pass  # still referenced (e.g. a numpy view); freed with its last reference
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+        try:
+            self._file.close()
+        except BufferError:
+            pass
+        self._file = self._map = self._view = None
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __del__(self):
+        self.close()
+
+
+def spool_upload(source: UploadSource, max_bytes: Optional[int] = None, name: str = "") -> SpooledUpload:
+    """
+    Copy an upload (Streamlit UploadedFile, request body, bytes) into a new spool.
+    Args:
+        source: bytes-like object or readable file object
+        max_bytes: size limit (defaults to GENAI_UPLOAD_MAX_MB)
+        name: original file name, kept for messages
+    Raises:
+        UploadTooLargeError: if the upload exceeds the limit (nothing is kept)
+    """
+    spool = SpooledUpload(max_bytes=max_bytes, name=name or getattr(source, "name", ""))
+    try:
+        return spool.copy_from(source)
+    except BaseException:
+        spool.close()
+        raise
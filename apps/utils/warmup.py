@@ -0,0 +1,136 @@
+"""
+warmup.py
+Background model warm-up with readiness flags.
+
+Each task imports what it needs, loads its model into the shared registry
+and runs one dummy inference, so the first real request does not pay for
+imports, weight loading or lazy kernel initialization. Tasks run one after
+another on a single daemon thread started once per process; the UI and the
+HTTP API read the per-task status to show readiness.
+
+GENAI_STARTUP_MODE:
+    lazy (default): the Streamlit page renders immediately and each app
+        appears once its warm-up task has finished
+    eager: import and load everything on the script thread (previous behaviour)
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+STARTUP_MODE = os.environ.get("GENAI_STARTUP_MODE", "lazy").lower()
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+@dataclass
+class WarmupTask:
+    name: str
+    fn: Callable[[], None]
+    status: str = PENDING
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def settled(self) -> bool:
+        return self.status in (READY, FAILED)
+
+
+class ModelWarmup:
+    """
+    Ordered set of warm-up tasks run on a background thread.
+    - register(): add a task once (later registrations of the same name are ignored)
+    - start(): run pending tasks in registration order; safe to call on every rerun
+    - is_ready()/settled(): readiness checks; tasks() for display
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, WarmupTask] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at: Optional[float] = None
+
+    def register(self, name: str, fn: Callable[[], None]):
+        with self._lock:
+            if name not in self._tasks:
+                self._tasks[name] = WarmupTask(name, fn)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if not any(task.status == PENDING for task in self._tasks.values()):
+                return
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="model-warmup")
+            self._thread.start()
+
+    def _next_pending(self) -> Optional[WarmupTask]:
+        with self._lock:
+            for task in self._tasks.values():
+                if task.status == PENDING:
+                    task.status = RUNNING
+                    return task
+            return None
+
+    def _run(self):
+        while True:
+            task = self._next_pending()
+            if task is None:
+                return
+            started = time.perf_counter()
+            try:
+                task.fn()
+            except Exception as e:  # surfaced through the readiness display
+                task.seconds = time.perf_counter() - started
+                task.error = f"{type(e).__name__}: {e}"
+                task.status = FAILED
+            else:
+                task.seconds = time.perf_counter() - started
+                task.status = READY
+
+    def status(self, name: str) -> Optional[str]:
+        task = self._tasks.get(name)
+        return task.status if task else None
+
+    def is_ready(self, name: str) -> bool:
+        return self.status(name) == READY
+
+    def settled(self, name: str) -> bool:
+        """True once the task finished, successfully or not (unknown names count as settled)."""
+        task = self._tasks.get(name)
+        return task is None or task.settled
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until a task settles; returns whether it is ready."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self.settled(name):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            time.sleep(0.05)
+        return self.is_ready(name)
+
+    def tasks(self) -> List[WarmupTask]:
+        with self._lock:
+            return list(self._tasks.values())
+
+
+_warmup: Optional[ModelWarmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_model_warmup() -> ModelWarmup:
+    """Return the process-wide ModelWarmup, creating it on first use."""
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = ModelWarmup()
+    return _warmup
@@ -0,0 +1,50 @@
+"""
+warmup_ui.py
+Streamlit readiness flags and placeholders for the model warm-up (utils.warmup).
+"""
+import streamlit as st
+from utils.warmup import FAILED, READY, STARTUP_MODE, get_model_warmup
+
+WARMUP_POLL_SECONDS = 1.0
+
+
+def show_model_readiness():
+    """
+    Show one readiness flag per background warm-up task under the page header.
+    The page reruns when a task settles (see wait_for_warmup), refreshing the flags.
+    """
+    tasks = get_model_warmup().tasks()
+    if not tasks:
+        return
+    flags = []
+    for task in tasks:
+        if task.status == READY:
+            flags.append(f"{task.name}: ready ({task.seconds:.1f}s)")
+        elif task.status == FAILED:
+            flags.append(f"{task.name}: failed to load")
+        else:
+            flags.append(f"{task.name}: warming up...")
+    st.caption(" | ".join(flags))
+
+
+def wait_for_warmup(name: str, label: str) -> bool:
+    """
+    Gate an app on its warm-up task in lazy startup mode.
+    Args:
+        name: Warm-up task name
+        label: App name shown while waiting
+    Returns:
+        True when the app can render (eager mode, or the task finished or failed);
+        otherwise renders a placeholder that reruns the page once the task settles
+    """
+    if STARTUP_MODE == "eager" or get_model_warmup().settled(name):
+        return True
+    _warmup_placeholder(name, label)
+    return False
+
+
+@st.fragment(run_every=WARMUP_POLL_SECONDS)
+def _warmup_placeholder(name: str, label: str):
+    if get_model_warmup().settled(name):
+        st.rerun()
+    st.info(f"{label} is loading its model in the background...")